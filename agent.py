@@ -1,4 +1,5 @@
 import random
+import time
 from enum import Enum
 
 class Strategy(Enum):
@@ -6,11 +7,17 @@ class Strategy(Enum):
     GREEDY = "greedy"
     DEFENSIVE = "defensive"
     PATROL = "patrol"
+    SEARCH = "search"
 
 class Agent:
-    def __init__(self, x, y, strategy, color, grid):
-        self.x = x
-        self.y = y
+    # Sabit alan listesi: örnek başına __dict__ tutulmaz, kopyalama ucuzlar
+    __slots__ = ('_x', '_y', 'strategy', 'color', 'grid', 'score', 'patrol_points',
+                 'current_patrol_index', 'image', 'rng', 'detection_range', 'move_chance',
+                 'move_delay', 'planner', 'search_ms')
+    
+    def __init__(self, x, y, strategy, color, grid, rng=None):
+        self._x = x
+        self._y = y
         self.strategy = strategy
         self.color = color
         self.grid = grid
@@ -18,9 +25,66 @@ class Agent:
         self.patrol_points = []
         self.current_patrol_index = 0
         self.image = None  # Add image attribute
+        self.rng = rng if rng is not None else random  # Rastgelelik kaynağı (tekrarlanabilirlik için)
+        self.detection_range = None  # None: tüm grid'i algılar
+        self.move_chance = None  # Zorluk ayarlarından gelen hareket olasılığı
+        self.move_delay = 0  # Yavaş zeminden çıkmadan önce beklenecek tur sayısı
+        self.planner = None  # SEARCH stratejisinin arama motoru (bkz. search.py)
+        self.search_ms = None  # Canlı oyunda tur başına arama süresi (ms); None: yalnızca düğüm bütçesi
+        grid.agent_index.insert(self)
         
-    def move(self, other_agents):
-        """Ajanın stratejisine göre hareket etmesini sağlar."""
+    def clone(self, grid, rng):
+        """Ajanın aynı durumdaki bir kopyasını başka bir grid üzerinde oluşturur."""
+        agent = Agent.__new__(Agent)
+        agent._x = self._x
+        agent._y = self._y
+        agent.strategy = self.strategy
+        agent.color = self.color
+        agent.grid = grid
+        agent.score = self.score
+        agent.patrol_points = list(self.patrol_points)
+        agent.current_patrol_index = self.current_patrol_index
+        agent.image = self.image
+        agent.rng = rng
+        agent.detection_range = self.detection_range
+        agent.move_chance = self.move_chance
+        agent.move_delay = self.move_delay
+        agent.planner = self.planner.copy(grid) if self.planner is not None else None
+        agent.search_ms = self.search_ms
+        grid.agent_index.insert(agent)
+        return agent
+        
+    @property
+    def x(self):
+        return self._x
+    
+    @x.setter
+    def x(self, value):
+        old_x = self._x
+        self._x = value
+        self.grid.agent_index.moved(self, old_x, self._y)
+        
+    @property
+    def y(self):
+        return self._y
+    
+    @y.setter
+    def y(self, value):
+        old_y = self._y
+        self._y = value
+        self.grid.agent_index.moved(self, self._x, old_y)
+        
+    def move(self, other_agents=None):
+        """Ajanın stratejisine göre hareket etmesini sağlar.
+        
+        other_agents verilmezse en yakın ajan grid'in uzamsal indeksinden bulunur.
+        Yavaş zemine giren ajan, zeminin maliyeti kadar tur orada kalır.
+        Hareket ettiyse True döndürür.
+        """
+        if self.move_delay:
+            self.move_delay -= 1
+            return False
+        old_position = (self.x, self.y)
         if self.strategy == Strategy.RANDOM:
             self._move_random()
         elif self.strategy == Strategy.GREEDY:
@@ -29,43 +93,72 @@ class Agent:
             self._move_defensive(other_agents)
         elif self.strategy == Strategy.PATROL:
             self._move_patrol()
-            
+        elif self.strategy == Strategy.SEARCH:
+            self._move_search()
+        if (self.x, self.y) == old_position:
+            return False
+        self.move_delay = self.grid.move_cost(self.x, self.y) - 1
+        return True
+
+    def can_enter(self, x, y):
+        """Hücreye girilebilir mi: geçerli olmalı ve başka bir yapay zeka ajanı tarafından tutulmamalı.
+        
+        Oyuncular (stratejisi olmayan ajanlar) hücre tutmaz; onlara çarpmak
+        çarpışma kurallarına bırakılır. Aynı hücreye yönelen iki ajandan önce
+        hareket eden girer, sonraki yerinde kalır.
+        """
+        if not self.grid.is_valid_position(x, y):
+            return False
+        return all(other.strategy is None for other in self.grid.agents_at(x, y))
+
+    def _find_closest(self, other_agents):
+        """Algılama menzilindeki en yakın ajanı döndürür (yoksa None)."""
+        if other_agents is None:
+            return self.grid.agent_index.nearest(self.x, self.y, exclude=self,
+                                                 max_distance=self.detection_range)
+        if self.detection_range is not None:
+            other_agents = [a for a in other_agents
+                            if abs(a.x - self.x) + abs(a.y - self.y) <= self.detection_range]
+        if not other_agents:
+            return None
+        return min(other_agents,
+                   key=lambda a: abs(a.x - self.x) + abs(a.y - self.y))
+        
+    def _find_player(self):
+        """Algılama menzilindeki en yakın oyuncuyu döndürür (yoksa None)."""
+        radius = self.detection_range
+        if radius is None:
+            radius = self.grid.width + self.grid.height
+        for agent in self.grid.agent_index.within(self.x, self.y, radius, exclude=self):
+            if agent.strategy is None:
+                return agent
+        return None
+        
     def _move_random(self):
         """Rastgele hareket stratejisi."""
-        neighbors = self.grid.get_neighbors(self.x, self.y)
+        neighbors = [cell for cell in self.grid.get_neighbors(self.x, self.y) if self.can_enter(*cell)]
         if neighbors:
-            self.x, self.y = random.choice(neighbors)
+            self.x, self.y = self.rng.choice(neighbors)
             
     def _move_greedy(self, other_agents):
         """En yakın hedefe doğru hareket stratejisi."""
-        if not other_agents:
+        closest_agent = self._find_closest(other_agents)
+        if closest_agent is None:
             self._move_random()
             return
-            
-        closest_agent = min(other_agents, 
-                          key=lambda a: abs(a.x - self.x) + abs(a.y - self.y))
-        
-        dx = closest_agent.x - self.x
-        dy = closest_agent.y - self.y
         
-        if abs(dx) > abs(dy):
-            new_x = self.x + (1 if dx > 0 else -1)
-            if self.grid.is_valid_position(new_x, self.y):
-                self.x = new_x
-        else:
-            new_y = self.y + (1 if dy > 0 else -1)
-            if self.grid.is_valid_position(self.x, new_y):
-                self.y = new_y
+        # Engel varsa hedefin paylaşılan akış alanından bir sonraki adımı oku
+        step = self.grid.next_step(self.x, self.y, closest_agent.x, closest_agent.y)
+        if step is not None and self.can_enter(*step):
+            self.x, self.y = step
                 
     def _move_defensive(self, other_agents):
         """Diğer ajanlardan uzaklaşma stratejisi."""
-        if not other_agents:
+        # En yakın ajanı bul
+        closest_agent = self._find_closest(other_agents)
+        if closest_agent is None:
             self._move_random()
             return
-            
-        # En yakın ajanı bul
-        closest_agent = min(other_agents, 
-                          key=lambda a: abs(a.x - self.x) + abs(a.y - self.y))
         
         # En yakın ajanın tersi yönünde hareket et
         dx = self.x - closest_agent.x
@@ -73,11 +166,11 @@ class Agent:
         
         if abs(dx) > abs(dy):
             new_x = self.x + (1 if dx > 0 else -1)
-            if self.grid.is_valid_position(new_x, self.y):
+            if self.can_enter(new_x, self.y):
                 self.x = new_x
         else:
             new_y = self.y + (1 if dy > 0 else -1)
-            if self.grid.is_valid_position(self.x, new_y):
+            if self.can_enter(self.x, new_y):
                 self.y = new_y
                 
     def _move_patrol(self):
@@ -104,9 +197,24 @@ class Agent:
         
         if abs(dx) > abs(dy):
             new_x = self.x + (1 if dx > 0 else -1)
-            if self.grid.is_valid_position(new_x, self.y):
+            if self.can_enter(new_x, self.y):
                 self.x = new_x
         else:
             new_y = self.y + (1 if dy > 0 else -1)
-            if self.grid.is_valid_position(self.x, new_y):
-                self.y = new_y 
\ No newline at end of file
+            if self.can_enter(self.x, new_y):
+                self.y = new_y 
+
+    def _move_search(self):
+        """Oyuncuyu ileriye dönük aramayla kovalama stratejisi.
+        
+        Planlayıcı oyuncunun kaçışlarını da hesaba katarak birkaç tur ilerisini
+        arar (bkz. search.Planner); canlı oyunda arama search_ms ile de sınırlanır.
+        Menzilde oyuncu yoksa rastgele hareket eder.
+        """
+        player = self._find_player()
+        if player is None or self.planner is None:
+            self._move_random()
+            return
+        steps = [cell for cell in self.grid.get_neighbors(self.x, self.y) if self.can_enter(*cell)]
+        deadline = None if self.search_ms is None else time.perf_counter() + self.search_ms / 1000
+        self.x, self.y = self.planner.best_move(self.x, self.y, player.x, player.y, steps, deadline)
@@ -0,0 +1,323 @@
+"""Benchmark strategies, grid queries, simulation ticks and board rendering on a headless display.
+
+Example:
+    python benchmarks.py --output bench.json
+    python benchmarks.py --output new.json --compare bench.json --threshold 0.15
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import numpy as np
+import pygame
+
+from agent import Agent, Strategy
+from grid import Grid
+from renderer import BoardRenderer
+from settings import CELL_SIZE, DIFFICULTY_SETTINGS, Difficulty
+from swarm import Swarm
+from world import World
+
+# Each timed run repeats the operation until it takes at least this long
+MIN_RUN_TIME = 0.05
+
+# Independent timed runs per benchmark; the median is compared across commits
+REPEATS = 5
+
+# Board sizes (cells) and agent counts of the scaling curves
+GRID_SIZES = [(20, 15), (80, 60), (320, 240)]
+AGENT_COUNTS = [10, 100, 1000]
+QUICK_GRID_SIZES = GRID_SIZES[:2]
+QUICK_AGENT_COUNTS = AGENT_COUNTS[:2]
+
+# Board of the per-strategy Agent.move benchmark
+MOVE_GRID_SIZE = (80, 60)
+
+# The vectorized Swarm is measured with this many times more agents
+SWARM_SCALE = 10
+
+BENCH_CELL_SIZE = 8
+AGENT_COLORS = [(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 0)]
+
+def measure(operation, repeats=REPEATS, min_run_time=MIN_RUN_TIME):
+    """Seconds per call of operation: (best, median) over repeats calibrated runs"""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            operation()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_run_time:
+            break
+        number = max(number * 2, int(number * min_run_time / max(elapsed, 1e-9)))
+    per_call = [elapsed / number]
+    for _ in range(repeats - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            operation()
+        per_call.append((time.perf_counter() - start) / number)
+    return min(per_call), statistics.median(per_call)
+
+def scattered_agents(grid, count, strategies, seed):
+    """count agents at seeded random cells, cycling through strategies"""
+    rng = random.Random(seed)
+    return [Agent(rng.randrange(grid.width), rng.randrange(grid.height),
+                  strategies[i % len(strategies)], AGENT_COLORS[i % len(AGENT_COLORS)], grid, rng)
+            for i in range(count)]
+
+def bench_agent_move(strategy, grid_size, count):
+    """One Agent.move of a single strategy, averaged over count agents"""
+    grid = Grid(grid_size[0], grid_size[1], BENCH_CELL_SIZE)
+    agents = scattered_agents(grid, count, [strategy], seed=1)
+    scattered_agents(grid, count, [Strategy.RANDOM], seed=2)  # Something to chase or flee
+
+    def operation():
+        for agent in agents:
+            agent.move()
+    best, median = measure(operation)
+    return best / count, median / count
+
+def bench_grid_queries(grid_size):
+    """Per-call cost of get_neighbors, is_valid_position and the vectorized check"""
+    grid = Grid(grid_size[0], grid_size[1], BENCH_CELL_SIZE)
+    rng = np.random.default_rng(3)
+    # A margin outside the board so some lookups are invalid
+    xs = rng.integers(-2, grid.width + 2, 1000)
+    ys = rng.integers(-2, grid.height + 2, 1000)
+    cells = list(zip(xs.tolist(), ys.tolist()))
+    inside = [(x, y) for x, y in cells if grid.in_bounds(x, y)]
+
+    def neighbors():
+        for x, y in inside:
+            grid.get_neighbors(x, y)
+
+    def valid():
+        for x, y in cells:
+            grid.is_valid_position(x, y)
+
+    def vectorized():
+        grid.are_valid_positions(xs, ys)
+
+    results = {}
+    for name, operation, calls in (('get_neighbors', neighbors, len(inside)),
+                                   ('is_valid_position', valid, len(cells)),
+                                   ('are_valid_positions', vectorized, len(cells))):
+        best, median = measure(operation)
+        results[name] = (best / calls, median / calls)
+    return results
+
+def bench_tick(grid_size, count):
+    """One simulation tick of count mixed-strategy Agent objects, moved in turn"""
+    grid = Grid(grid_size[0], grid_size[1], BENCH_CELL_SIZE)
+    agents = scattered_agents(grid, count, list(Strategy), seed=4)
+
+    def operation():
+        for agent in agents:
+            agent.move()
+    return measure(operation)
+
+def bench_swarm_tick(grid_size, count):
+    """One Swarm.step of count mixed-strategy agents"""
+    grid = Grid(grid_size[0], grid_size[1], BENCH_CELL_SIZE)
+    swarm = Swarm.random(grid, count, seed=5)
+    return measure(swarm.step)
+
+def bench_world_tick():
+    """One World.step of the real game on every difficulty, restarting finished games"""
+    worlds = [World(difficulty, seed=6) for difficulty in range(3)]
+
+    def operation():
+        for world in worlds:
+            if world.finished:
+                world.reset()
+            world.step()
+    best, median = measure(operation)
+    return best / len(worlds), median / len(worlds)
+
+def bench_search_move():
+    """One full-budget Planner.best_move of the Hard searching agent, starting from an empty table"""
+    world = World(Difficulty.HARD, seed=8)
+    agent = next(a for a in world.agents if a.strategy == Strategy.SEARCH)
+    player = world.user_agent
+    steps = world.grid.get_neighbors(agent.x, agent.y)
+
+    def operation():
+        agent.planner.clear()
+        agent.planner.best_move(agent.x, agent.y, player.x, player.y, steps)
+    return measure(operation)
+
+def bench_render(count, dirty_rects, cell_size=CELL_SIZE):
+    """One board frame: background restore, count agent sprites and present"""
+    width, height = 800, 600
+    screen = pygame.display.set_mode((width, height))
+    background = pygame.Surface((width, height)).convert()
+    background.fill((18, 18, 18))
+    for x in range(0, width + 1, cell_size):
+        pygame.draw.line(background, (40, 40, 40), (x, 0), (x, height))
+    for y in range(0, height + 1, cell_size):
+        pygame.draw.line(background, (40, 40, 40), (0, y), (width, y))
+    renderer = BoardRenderer(screen, background, dirty_rects)
+    rng = random.Random(7)
+    columns, rows = width // cell_size, height // cell_size
+    positions = [[rng.randrange(columns), rng.randrange(rows)] for _ in range(count)]
+
+    def operation():
+        for position in positions:
+            position[0] = min(columns - 1, max(0, position[0] + rng.choice((-1, 0, 1))))
+        renderer.begin_frame()
+        renderer.draw_agents((x, y, AGENT_COLORS[i % len(AGENT_COLORS)], None)
+                             for i, (x, y) in enumerate(positions))
+        renderer.present()
+    return measure(operation)
+
+def growth_exponent(sizes, seconds):
+    """Least-squares slope of log(time) against log(size): ~1 is linear, ~2 quadratic"""
+    if len(sizes) < 2:
+        return None
+    return float(np.polyfit(np.log(sizes), np.log(seconds), 1)[0])
+
+def run_benchmarks(quick=False, log=sys.stderr):
+    """Run every benchmark; returns a list of result dicts"""
+    grid_sizes = QUICK_GRID_SIZES if quick else GRID_SIZES
+    agent_counts = QUICK_AGENT_COUNTS if quick else AGENT_COUNTS
+    results = []
+
+    def record(name, params, timing, unit='call'):
+        best, median = timing
+        results.append({'name': name, 'params': params, 'unit': unit,
+                        'best_s': best, 'median_s': median})
+        params_text = ' '.join(f'{key}={value}' for key, value in params.items())
+        print(f"{name:<24} {params_text:<36} {median * 1e6:12.2f} us/{unit}", file=log)
+
+    for strategy in Strategy:
+        for count in agent_counts:
+            params = {'strategy': strategy.value, 'grid': '{}x{}'.format(*MOVE_GRID_SIZE), 'agents': count}
+            record('agent_move', params, bench_agent_move(strategy, MOVE_GRID_SIZE, count), 'move')
+
+    for size in grid_sizes:
+        for name, timing in bench_grid_queries(size).items():
+            record(name, {'grid': f'{size[0]}x{size[1]}'}, timing)
+
+    for size in grid_sizes:
+        for count in agent_counts:
+            grid_name = f'{size[0]}x{size[1]}'
+            record('agent_tick', {'grid': grid_name, 'agents': count}, bench_tick(size, count), 'tick')
+            record('swarm_tick', {'grid': grid_name, 'agents': count * SWARM_SCALE},
+                   bench_swarm_tick(size, count * SWARM_SCALE), 'tick')
+
+    record('world_tick', {}, bench_world_tick(), 'tick')
+    record('search_move', {'nodes': DIFFICULTY_SETTINGS[Difficulty.HARD]['agent_behaviors']['search']['search_nodes']},
+           bench_search_move(), 'move')
+
+    pygame.display.init()
+    try:
+        for dirty_rects in (True, False):
+            for count in agent_counts:
+                record('render_frame', {'agents': count, 'dirty_rects': dirty_rects},
+                       bench_render(count, dirty_rects), 'frame')
+    finally:
+        pygame.display.quit()
+    return results
+
+def scaling_curves(results):
+    """Growth exponents of tick and render cost against agent count, per fixed other parameters"""
+    series = {}
+    for result in results:
+        params = dict(result['params'])
+        count = params.pop('agents', None)
+        if count is None or result['name'] == 'agent_move':
+            continue
+        key = (result['name'], tuple(sorted(params.items())))
+        series.setdefault(key, []).append((count, result['median_s']))
+    curves = []
+    for (name, params), points in series.items():
+        points.sort()
+        curves.append({'name': name, 'params': dict(params),
+                       'agents': [count for count, _ in points],
+                       'median_s': [seconds for _, seconds in points],
+                       'exponent': growth_exponent(*zip(*points))})
+    return curves
+
+def environment():
+    """Interpreter, library and commit identifiers stored with the results"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pygame': pygame.version.ver,
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'video_driver': os.environ.get('SDL_VIDEODRIVER')
+    }
+
+def result_key(result):
+    return result['name'] + json.dumps(result['params'], sort_keys=True)
+
+def compare(results, baseline, threshold, out=sys.stdout):
+    """Print median ratios against a baseline run; returns the results that got slower than threshold"""
+    previous = {result_key(r): r for r in baseline['results']}
+    regressions = []
+    print(f"\n{'benchmark':<60} {'ratio':>8}", file=out)
+    for result in results:
+        old = previous.get(result_key(result))
+        if old is None:
+            continue
+        ratio = result['median_s'] / old['median_s']
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  SLOWER'
+            regressions.append(result)
+        elif ratio < 1 / (1 + threshold):
+            flag = '  faster'
+        params_text = ' '.join(f'{key}={value}' for key, value in result['params'].items())
+        print(f"{result['name'] + ' ' + params_text:<60} {ratio:8.2f}{flag}", file=out)
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', help='write results and scaling curves to this JSON file')
+    parser.add_argument('--compare', help='baseline JSON file from an earlier run')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='slowdown ratio above which --compare fails (default: 0.2 = 20%%)')
+    parser.add_argument('--quick', action='store_true', help='smaller grids and agent counts')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    results = run_benchmarks(args.quick)
+    curves = scaling_curves(results)
+    print(f"\n{'scaling with agent count':<60} {'exponent':>8}")
+    for curve in curves:
+        params_text = ' '.join(f'{key}={value}' for key, value in curve['params'].items())
+        print(f"{curve['name'] + ' ' + params_text:<60} {curve['exponent']:8.2f}")
+    print(f"\nbenchmarks took {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'environment': environment(), 'results': results, 'scaling': curves}, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) slower than the baseline by more than "
+                  f"{args.threshold:.0%}", file=sys.stderr)
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
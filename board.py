@@ -0,0 +1,108 @@
+"""Drawing of the game board, shared by the window (main.py) and offscreen rendering (offscreen.py)."""
+import numpy as np
+import pygame
+
+from settings import CELL_SIZE, MODERN_COLORS
+from grid import WALL, SLOW
+
+# Agent images, relative to the working directory
+USER_IMAGE = "me.jpg"
+DEFENSIVE_IMAGE = "raz.jpeg"
+AGENT_IMAGES = [(USER_IMAGE, (CELL_SIZE, CELL_SIZE)), (DEFENSIVE_IMAGE, (CELL_SIZE, CELL_SIZE))]
+
+FONT_SIZE = 36
+SCORE_FONT_SIZE = 72
+
+def set_agent_images(world, resources):
+    """Give the extra agents of a freshly reset world the defensive agent image"""
+    defensive_image = resources.image(DEFENSIVE_IMAGE, (CELL_SIZE, CELL_SIZE))
+    for agent in world.agents[2:]:
+        agent.image = defensive_image  # Extra agents share the defensive agent image
+
+def interpolate(previous, agent, alpha):
+    """Cell position of agent blended between the previous and the current tick"""
+    prev_x, prev_y = previous
+    if abs(agent.x - prev_x) + abs(agent.y - prev_y) > 1:
+        return agent.x, agent.y  # Teleported (respawn): snap instead of sliding
+    return (prev_x + (agent.x - prev_x) * alpha,
+            prev_y + (agent.y - prev_y) * alpha)
+
+def agent_sprites(world, previous_positions, alpha, user_image):
+    """(x, y, color, image) of every agent, interpolated, then the players (see BoardRenderer.draw_agents)"""
+    sprites = []
+    for agent, previous in zip(world.agents, previous_positions):
+        x, y = interpolate(previous, agent, alpha)
+        sprites.append((x, y, agent.color, agent.image))
+    # Players move on key press, so they are always drawn where they are
+    for player in world.players:
+        if player is not world.user_agent:
+            sprites.append((player.x, player.y, player.color, None))
+    sprites.append((world.user_agent.x, world.user_agent.y, world.user_agent.color, user_image))
+    return sprites
+
+def draw_modern_grid(surface, columns, rows):
+    """Draw a modern grid with gradient lines over columns x rows visible cells"""
+    for x in range(columns + 1):
+        alpha = int(100 * (1 - x/columns))
+        pygame.draw.line(surface, (*MODERN_COLORS['grid'], alpha),
+                        (x * CELL_SIZE, 0),
+                        (x * CELL_SIZE, rows * CELL_SIZE))
+    for y in range(rows + 1):
+        alpha = int(100 * (1 - y/rows))
+        pygame.draw.line(surface, (*MODERN_COLORS['grid'], alpha),
+                        (0, y * CELL_SIZE),
+                        (columns * CELL_SIZE, y * CELL_SIZE))
+
+def draw_terrain(surface, terrain, camera):
+    """Fill the wall and slow cells of a grid's terrain layer (Grid.grid) inside the camera's view"""
+    x0, y0, x1, y1 = camera.visible_cells
+    visible = terrain.region(x0, y0, x1, y1)
+    for terrain, color in ((WALL, MODERN_COLORS['wall']), (SLOW, MODERN_COLORS['slow'])):
+        for y, x in zip(*np.nonzero(visible == terrain)):
+            surface.fill(color, (x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE))
+
+def build_board_background(size, terrain, camera, text_cache, resources):
+    """Pre-render the parts of the view that only change with the terrain or camera: fill, grid and labels"""
+    background = pygame.Surface(size)
+    if pygame.display.get_surface() is not None:
+        background = background.convert()
+    background.fill(MODERN_COLORS['background'])
+    draw_terrain(background, terrain, camera)
+    x0, y0, x1, y1 = camera.visible_cells
+    draw_modern_grid(background, x1 - x0, y1 - y0)
+
+    # Draw modern controls info
+    controls_text = text_cache.get_text('Controls: Arrow Keys', resources.font(FONT_SIZE), MODERN_COLORS['text'])
+    background.blit(controls_text, (size[0] - 300, (y1 - y0) * CELL_SIZE + 10))
+
+    target_text = text_cache.get_text('Target: Green Dot (+10 points)', resources.font(FONT_SIZE), MODERN_COLORS['success'])
+    background.blit(target_text, (size[0]//2 - 150, (y1 - y0) * CELL_SIZE + 10))
+    return background
+
+def draw_modern_score_box(surface, score, target_score, text_cache, resources, surface_pool):
+    """Draw a modern score box with glass effect; returns the area drawn"""
+    box_width = 200
+    box_height = 100
+    box_x = 20
+    box_y = 20
+
+    # Glass effect background
+    glass_surface = surface_pool.get((box_width, box_height), (255, 255, 255, 30))
+    surface.blit(glass_surface, (box_x, box_y))
+
+    # Border
+    pygame.draw.rect(surface, MODERN_COLORS['accent'],
+                    (box_x, box_y, box_width, box_height),
+                    2, border_radius=10)
+
+    # Score text
+    score_text = text_cache.get_text(str(score), resources.font(SCORE_FONT_SIZE), MODERN_COLORS['accent'])
+    score_rect = score_text.get_rect(center=(box_x + box_width//2, box_y + box_height//2))
+    surface.blit(score_text, score_rect)
+
+    # Target score
+    target_text = text_cache.get_text(f"Target: {target_score}", resources.font(FONT_SIZE), MODERN_COLORS['text'])
+    target_rect = target_text.get_rect(center=(box_x + box_width//2, box_y + box_height + 20))
+    surface.blit(target_text, target_rect)
+
+    return target_rect.union((box_x, box_y, box_width, box_height))
@@ -0,0 +1,47 @@
+"""Viewport onto a board larger than the window, following the player cell by cell."""
+
+class Camera:
+    """Board cells shown in a view of view_size pixels, scrolled in whole cells.
+
+    follow() centres the view on a cell, clamped so it never shows past the
+    board edge; on a board that fits the view the camera stays at (0, 0).
+    Scrolling in whole cells keeps the baked board background valid until
+    the followed cell crosses into a new view.
+    """
+
+    def __init__(self, view_size, board_size, cell_size):
+        self.cell_size = cell_size
+        self.columns = view_size[0] // cell_size
+        self.rows = view_size[1] // cell_size
+        self.board_size = board_size
+        self.x = 0  # Top-left visible cell
+        self.y = 0
+
+    def follow(self, x, y):
+        """Centre the view on cell (x, y); returns True if the camera moved"""
+        new_x = max(0, min(x - self.columns // 2, self.board_size[0] - self.columns))
+        new_y = max(0, min(y - self.rows // 2, self.board_size[1] - self.rows))
+        if (new_x, new_y) == (self.x, self.y):
+            return False
+        self.x, self.y = new_x, new_y
+        return True
+
+    @property
+    def visible_cells(self):
+        """(x0, y0, x1, y1): cells x0 <= x < x1, y0 <= y < y1 are on screen"""
+        return (self.x, self.y,
+                min(self.x + self.columns, self.board_size[0]), min(self.y + self.rows, self.board_size[1]))
+
+    def is_visible(self, x, y, margin=1):
+        """Whether cell (x, y) is within margin cells of the view"""
+        return (self.x - margin <= x < self.x + self.columns + margin
+                and self.y - margin <= y < self.y + self.rows + margin)
+
+    @property
+    def origin(self):
+        """Board pixel shown at the top-left corner of the view"""
+        return (self.x * self.cell_size, self.y * self.cell_size)
+
+    def to_screen(self, x, y):
+        """Pixel position of the top-left corner of (possibly fractional) cell (x, y)"""
+        return (int((x - self.x) * self.cell_size), int((y - self.y) * self.cell_size))
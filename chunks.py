@@ -0,0 +1,166 @@
+"""Chunked 2-D array that only allocates the blocks holding non-default values."""
+import numpy as np
+
+# Side of a square chunk in cells; a power of two so indices split with shifts and masks
+CHUNK_SIZE = 32
+
+class ChunkedArray:
+    """width x height array stored as CHUNK_SIZE square blocks, allocated on first write.
+
+    Cells of unallocated chunks read as fill, so untouched regions of a huge
+    map cost nothing. Indexing follows NumPy's [y, x] order for scalars and
+    index arrays alike. Allocated chunks live in one pool array addressed by a
+    small table of chunk slots, so a vectorized gather is a few NumPy calls;
+    scalar access goes through nested lists of chunk views instead, which is
+    cheaper than NumPy indexing for a single cell. copy() shares all of them
+    with the original until either side is next written (copy on write).
+    """
+
+    def __init__(self, width, height, fill=0, dtype=np.int32, chunk_size=CHUNK_SIZE):
+        if chunk_size & (chunk_size - 1):
+            raise ValueError("chunk_size must be a power of two")
+        self.width = width
+        self.height = height
+        self.dtype = np.dtype(dtype)
+        self.fill = self.dtype.type(fill).item()
+        self.chunk_size = chunk_size
+        self.shift = chunk_size.bit_length() - 1
+        self.mask = chunk_size - 1
+        # Pool slot of every chunk, -1 while it is unallocated
+        self.slots = np.full(((height + self.mask) >> self.shift, (width + self.mask) >> self.shift),
+                             -1, dtype=np.int32)
+        self.pool = np.empty((0, chunk_size, chunk_size), dtype=self.dtype)
+        self.chunk_count = 0
+        self.shared = False  # slots, pool and views are shared with a copy
+        self._refresh_views()
+
+    def _own(self):
+        """Take private copies of the storage shared with a copy, before writing"""
+        self.slots = self.slots.copy()
+        self.pool = self.pool[:self.chunk_count].copy()
+        self.shared = False
+        self._refresh_views()
+
+    def _refresh_views(self):
+        # views[cy][cx]: the pool entry of a chunk, or None while it is unallocated
+        pool = self.pool
+        self.views = [[pool[slot] if slot >= 0 else None for slot in row] for row in self.slots.tolist()]
+
+    @property
+    def shape(self):
+        return (self.height, self.width)
+
+    @property
+    def nbytes(self):
+        return self.slots.nbytes + self.pool.nbytes
+
+    def get(self, x, y):
+        """Value at an in-bounds cell, as a Python scalar"""
+        shift = self.shift
+        chunk = self.views[y >> shift][x >> shift]
+        if chunk is None:
+            return self.fill
+        mask = self.mask
+        return chunk.item(y & mask, x & mask)
+
+    def set(self, x, y, value):
+        """Store value at an in-bounds cell, allocating its chunk if needed"""
+        cy, cx = y >> self.shift, x >> self.shift
+        chunk = self.views[cy][cx]
+        if chunk is None and value == self.fill:
+            return
+        if self.shared:
+            self._own()
+            chunk = self.views[cy][cx]
+        if chunk is None:
+            chunk = self._allocate(cy, cx)
+        chunk[y & self.mask, x & self.mask] = value
+
+    def __getitem__(self, key):
+        y, x = key
+        if np.ndim(y) == 0 and np.ndim(x) == 0:
+            return self.get(x, y)
+        return self.gather(np.asarray(x), np.asarray(y))
+
+    def __setitem__(self, key, value):
+        y, x = key
+        self.set(x, y, value)
+
+    def gather(self, xs, ys):
+        """Values at arrays of in-bounds cells"""
+        slots = self.slots[ys >> self.shift, xs >> self.shift]
+        if not self.chunk_count:
+            return np.full(slots.shape, self.fill, dtype=self.dtype)
+        values = self.pool[np.maximum(slots, 0), ys & self.mask, xs & self.mask]
+        values[slots < 0] = self.fill
+        return values
+
+    def _allocate(self, cy, cx):
+        slot = self.chunk_count
+        if slot == len(self.pool):
+            pool = np.empty((max(4, 2 * slot), self.chunk_size, self.chunk_size), dtype=self.dtype)
+            pool[:slot] = self.pool[:slot]
+            self.pool = pool
+            self._refresh_views()
+        chunk = self.pool[slot]
+        chunk.fill(self.fill)
+        self.slots[cy, cx] = slot
+        self.views[cy][cx] = chunk
+        self.chunk_count += 1
+        return chunk
+
+    def region(self, x0, y0, x1, y1):
+        """Dense copy of the cells x0 <= x < x1, y0 <= y < y1 (clipped to the array)"""
+        x0, y0 = max(x0, 0), max(y0, 0)
+        x1, y1 = min(x1, self.width), min(y1, self.height)
+        out = np.full((max(y1 - y0, 0), max(x1 - x0, 0)), self.fill, dtype=self.dtype)
+        if not out.size or not self.chunk_count:
+            return out
+        size = self.chunk_size
+        cy0, cx0 = y0 >> self.shift, x0 >> self.shift
+        window = self.slots[cy0:((y1 - 1) >> self.shift) + 1, cx0:((x1 - 1) >> self.shift) + 1]
+        for cy, cx in zip(*np.nonzero(window >= 0)):
+            # Overlap of this chunk with the region, in absolute cells
+            top, left = (cy0 + cy) * size, (cx0 + cx) * size
+            ty0, ty1 = max(top, y0), min(top + size, y1)
+            tx0, tx1 = max(left, x0), min(left + size, x1)
+            out[ty0 - y0:ty1 - y0, tx0 - x0:tx1 - x0] = \
+                self.pool[window[cy, cx], ty0 - top:ty1 - top, tx0 - left:tx1 - left]
+        return out
+
+    def to_array(self):
+        """The whole array as a dense NumPy array"""
+        return self.region(0, 0, self.width, self.height)
+
+    def load(self, array):
+        """Replace the contents with a dense (height, width) array, keeping only non-fill chunks"""
+        array = np.asarray(array)
+        if array.shape != self.shape:
+            raise ValueError(f"expected an array of shape {self.shape}, got {array.shape}")
+        size = self.chunk_size
+        rows, columns = self.slots.shape
+        padded = np.full((rows * size, columns * size), self.fill, dtype=self.dtype)
+        padded[:self.height, :self.width] = array
+        blocks = padded.reshape(rows, size, columns, size).swapaxes(1, 2)
+        used = np.any(blocks != self.fill, axis=(2, 3))
+        self.pool = blocks[used]
+        self.chunk_count = len(self.pool)
+        self.slots = np.full(self.slots.shape, -1, dtype=np.int32)
+        self.slots[used] = np.arange(self.chunk_count, dtype=np.int32)
+        self.shared = False
+        self._refresh_views()
+
+    def clear(self):
+        """Reset every cell to fill and release the chunks"""
+        self.slots = np.full(self.slots.shape, -1, dtype=np.int32)
+        self.pool = np.empty((0, self.chunk_size, self.chunk_size), dtype=self.dtype)
+        self.chunk_count = 0
+        self.shared = False
+        self._refresh_views()
+
+    def copy(self):
+        """Copy sharing this array's storage until either of them is written"""
+        array = ChunkedArray.__new__(ChunkedArray)
+        array.__dict__.update(self.__dict__)
+        array.shared = self.shared = True
+        return array
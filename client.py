@@ -0,0 +1,342 @@
+"""Client side of server.py: a World stand-in for the pygame front end, and loopback load-test bots.
+
+Example:
+    GAME_SERVER=localhost:8765 python main.py
+    python client.py localhost:8765 --bots 300 --seconds 10
+"""
+import argparse
+import asyncio
+import json
+import queue
+import random
+import socket
+import sys
+import threading
+import time
+
+from agent import Strategy
+from grid import Grid
+from server import DEFAULT_PORT, MAX_LINE, encode
+from settings import CELL_SIZE, DIFFICULTY_SETTINGS
+from world import Event
+
+# Ticks a client may lag behind before step() applies its whole backlog at once
+MAX_BACKLOG = 3
+
+class RemoteAgent:
+    """Position, strategy (None for players) and color of an agent on the server"""
+    __slots__ = ('id', 'x', 'y', 'strategy', 'color', 'image')
+
+    def __init__(self, agent_id, x, y, kind, color):
+        self.id = agent_id
+        self.x = x
+        self.y = y
+        self.strategy = Strategy(kind) if kind is not None else None
+        self.color = tuple(color)
+        self.image = None
+
+class Mirror:
+    """Copy of the server's game built from its keyframes and deltas.
+
+    A delta that does not follow the last applied tick, or names an agent
+    the mirror does not have, means messages were lost: the mirror then
+    skips deltas until the next keyframe (the server sends them regularly
+    and to every client that fell behind) instead of raising.
+    """
+
+    def __init__(self):
+        self.agents = {}  # Id -> RemoteAgent, in the server's order
+        self.player = None  # Id of this client's player
+        self.grid = None
+        self.difficulty = None
+        self.tick_rate = None
+        self.tick = 0
+        self.round = None
+        self.score = 0
+        self.target_score = 0
+        self.state = 'playing'
+        self.synced = False  # Whether deltas apply: after a keyframe and until a gap
+        self.gaps = 0  # Times the mirror lost track and waited for a keyframe
+
+    def apply(self, message):
+        """Update from one server message; returns its Events"""
+        kind = message['type']
+        if kind == 'delta':
+            if not self.synced:
+                return []
+            if message['tick'] != self.tick + 1:
+                self._lose_sync()
+                return []
+            agents = self.agents
+            try:
+                for agent_id in message.get('removed', ()):
+                    del agents[agent_id]
+                for agent_id, x, y in message['moved']:
+                    agent = agents[agent_id]
+                    agent.x, agent.y = x, y
+            except KeyError:
+                self._lose_sync()
+                return []
+            self.tick = message['tick']
+            for description in message.get('added', ()):
+                agents[description[0]] = RemoteAgent(*description)
+            self.score = message.get('score', self.score)
+            self.state = message.get('state', self.state)
+            return [Event(*event) for event in message.get('events', ())]
+        if kind == 'keyframe':
+            if 'terrain' in message:
+                self.grid.clear()
+                if message['terrain'] is not None:
+                    self.grid.load_terrain(message['terrain'])
+            # Within a round the same objects are kept, so images set on them stay
+            old_agents = self.agents if message['round'] == self.round else {}
+            self.agents = {}
+            for description in message['agents']:
+                agent = old_agents.get(description[0])
+                if agent is None:
+                    agent = RemoteAgent(*description)
+                else:
+                    agent.x, agent.y = description[1:3]
+                self.agents[description[0]] = agent
+            self.tick = message['tick']
+            self.round = message['round']
+            self.score = message['score']
+            self.target_score = message['target_score']
+            self.state = message['state']
+            self.synced = True
+        elif kind == 'joined':
+            self.player = message['player']
+        elif kind == 'welcome':
+            self.difficulty = message['difficulty']
+            self.tick_rate = message['tick_rate']
+            self.grid = Grid(message['width'], message['height'], CELL_SIZE)
+        return []
+
+    def _lose_sync(self):
+        self.synced = False
+        self.gaps += 1
+
+    def positions(self):
+        return {agent_id: (agent.x, agent.y) for agent_id, agent in self.agents.items()}
+
+class RemoteWorld:
+    """The parts of World the pygame front end uses, backed by a server connection.
+
+    A background thread reads server messages into a queue; step() applies
+    the next tick's delta (or the whole backlog when more than MAX_BACKLOG
+    ticks behind), so the front end's fixed timestep paces the mirror like a
+    local simulation. move_player() sends the key press right away.
+    """
+
+    def __init__(self, address, timeout=5.0):
+        host, _, port = address.rpartition(':')
+        self.address = (host or 'localhost', int(port or DEFAULT_PORT))
+        self.timeout = timeout
+        self.terrain = None
+        self.seed = None
+        self._connect()
+
+    def _connect(self):
+        sock = socket.create_connection(self.address, self.timeout)
+        sock.settimeout(None)
+        self.socket = sock
+        self.mirror = Mirror()
+        self.messages = queue.Queue()
+        self.connected = True
+        self.user_agent = None
+        threading.Thread(target=self._read, args=(self.socket, self.messages), daemon=True).start()
+        self._join()
+        self.difficulty = self.mirror.difficulty
+        # Ticks are paced by the server's rate, which may differ from the difficulty's
+        self.settings = dict(DIFFICULTY_SETTINGS[self.difficulty], agent_speed=self.mirror.tick_rate)
+
+    def _read(self, sock, messages):
+        try:
+            for line in sock.makefile('rb'):
+                messages.put(json.loads(line))
+        except (OSError, ValueError):
+            pass
+        messages.put(None)
+
+    def _join(self):
+        """Ask for a player and wait until it is on the board"""
+        self._send({'type': 'join'})
+        deadline = time.monotonic() + self.timeout
+        while self.connected and self._own_agent() is None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"no player from {self.address[0]}:{self.address[1]}")
+            try:
+                self._apply(self.messages.get(timeout=remaining))
+            except queue.Empty:
+                pass
+        if not self.connected:
+            raise ConnectionError(f"{self.address[0]}:{self.address[1]} closed the connection")
+        self.user_agent = self._own_agent()
+
+    def _own_agent(self):
+        return self.mirror.agents.get(self.mirror.player)
+
+    def _send(self, message):
+        try:
+            self.socket.sendall(encode(message))
+        except OSError:
+            self.connected = False
+
+    def _apply(self, message):
+        if message is None:
+            self.connected = False
+            return []
+        return self.mirror.apply(message)
+
+    @property
+    def grid(self):
+        return self.mirror.grid
+
+    @property
+    def agents(self):
+        return [agent for agent in self.mirror.agents.values() if agent.strategy is not None]
+
+    @property
+    def players(self):
+        return [agent for agent in self.mirror.agents.values() if agent.strategy is None]
+
+    @property
+    def tick(self):
+        return self.mirror.tick
+
+    @property
+    def score(self):
+        return self.mirror.score
+
+    @property
+    def target_score(self):
+        return self.mirror.target_score
+
+    @property
+    def game_won(self):
+        return self.mirror.state == 'won'
+
+    @property
+    def game_over(self):
+        """The round is lost, this client's player was caught or the server went away"""
+        return (self.mirror.state == 'over' or not self.connected
+                or (self.mirror.state == 'playing' and self._own_agent() is None))
+
+    @property
+    def finished(self):
+        return self.game_over or self.game_won
+
+    def move_player(self, action):
+        if self.finished:
+            return False
+        self._send({'type': 'action', 'action': int(action)})
+        return True
+
+    def step(self):
+        """Apply the server's next tick; returns its Events"""
+        events = []
+        catch_up = self.messages.qsize() > MAX_BACKLOG
+        while True:
+            try:
+                message = self.messages.get_nowait()
+            except queue.Empty:
+                break
+            events += self._apply(message)
+            if message is not None and message['type'] == 'delta' and not catch_up:
+                break
+        if self._own_agent() is not None:
+            self.user_agent = self._own_agent()
+        return events
+
+    def reset(self):
+        """Play again: apply what arrived meanwhile and join with a new player (reconnecting if needed).
+
+        If the server cannot be reached or sends no player in time, the world
+        stays as it was, finished and disconnected; reset() may be tried again.
+        """
+        if self.connected:
+            while not self.messages.empty():
+                self._apply(self.messages.get_nowait())
+            try:
+                self._join()
+            except OSError:  # TimeoutError included
+                self.connected = False
+            return
+        previous = self.socket, self.mirror, self.messages, self.user_agent
+        self.socket.close()
+        try:
+            self._connect()
+        except OSError:
+            if self.socket is not previous[0]:
+                self.socket.close()
+            self.socket, self.mirror, self.messages, self.user_agent = previous
+            self.connected = False
+
+    def close(self):
+        self.socket.close()
+
+async def run_bot(host, port, seconds, rng, stats):
+    """Join, press random keys and check every keyframe against the delta-built state"""
+    reader, writer = await asyncio.open_connection(host, port, limit=MAX_LINE)
+    mirror = Mirror()
+    writer.write(encode({'type': 'join'}))
+    loop = asyncio.get_running_loop()
+    end = loop.time() + seconds
+    try:
+        while True:
+            remaining = end - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                line = await asyncio.wait_for(reader.readline(), remaining)
+            except asyncio.TimeoutError:
+                break
+            if not line:
+                stats['disconnected'] += 1
+                break
+            message = json.loads(line)
+            stats['messages'] += 1
+            stats['bytes'] += len(line)
+            if message['type'] == 'keyframe' and message['round'] == mirror.round and message['tick'] == mirror.tick:
+                expected = {description[0]: tuple(description[1:3]) for description in message['agents']}
+                stats['keyframes checked'] += 1
+                stats['keyframe mismatches'] += expected != mirror.positions()
+            mirror.apply(message)
+            if message['type'] == 'delta':
+                if mirror.state == 'playing' and mirror.player not in mirror.agents:
+                    writer.write(encode({'type': 'join'}))
+                elif rng.random() < 0.5:
+                    writer.write(encode({'type': 'action', 'action': rng.randint(1, 4)}))
+    finally:
+        stats['bad deltas'] += mirror.gaps
+        writer.close()
+
+async def run_bots(host, port, count, seconds, seed):
+    stats = dict.fromkeys(['messages', 'bytes', 'keyframes checked', 'keyframe mismatches',
+                           'bad deltas', 'disconnected'], 0)
+    master = random.Random(seed)
+    await asyncio.gather(*(run_bot(host, port, seconds, random.Random(master.getrandbits(64)), stats)
+                           for _ in range(count)))
+    return stats
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('address', nargs='?', default=f'localhost:{DEFAULT_PORT}', help='host:port')
+    parser.add_argument('--bots', type=int, default=100, help='concurrent connections')
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    host, _, port = args.address.rpartition(':')
+    start = time.perf_counter()
+    stats = asyncio.run(run_bots(host or 'localhost', int(port), args.bots, args.seconds, args.seed))
+    elapsed = time.perf_counter() - start
+    print(f"{args.bots} bots for {elapsed:.1f}s")
+    for key, value in stats.items():
+        print(f"  {key:20} {value:,}")
+    print(f"  {'bytes/bot/s':20} {stats['bytes'] / args.bots / elapsed:,.0f}")
+    return 1 if stats['keyframe mismatches'] or stats['bad deltas'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
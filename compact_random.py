@@ -0,0 +1,54 @@
+"""random.Random with a PCG32 generator, whose whole state is one 64-bit integer."""
+import os
+import random
+
+_MULTIPLIER = 6364136223846793005
+_INCREMENT = 1442695040888963407
+_MASK64 = (1 << 64) - 1
+
+class CompactRandom(random.Random):
+    """Drop-in random.Random backed by PCG32 (XSH RR) instead of the Mersenne Twister.
+
+    getstate() is a single int, so game snapshots can copy the generator in
+    eight bytes rather than the Twister's 2.5 KB. randrange, choice, shuffle
+    and friends work unchanged through getrandbits and random.
+    """
+
+    def seed(self, a=None, version=2):
+        if a is None:
+            a = int.from_bytes(os.urandom(8), 'little')
+        elif not isinstance(a, int):
+            import hashlib  # Only string seeds need it; keeps headless imports light
+            a = int.from_bytes(hashlib.sha512(str(a).encode('utf-8')).digest()[:8], 'little')
+        # Standard PCG32 seeding: advance once, add the seed, advance again
+        self.state = (_INCREMENT + a) & _MASK64
+        self.state = (self.state * _MULTIPLIER + _INCREMENT) & _MASK64
+        self.gauss_next = None
+
+    def _next32(self):
+        old = self.state
+        self.state = (old * _MULTIPLIER + _INCREMENT) & _MASK64
+        shifted = (((old >> 18) ^ old) >> 27) & 0xFFFFFFFF
+        rotation = old >> 59
+        return ((shifted >> rotation) | (shifted << (-rotation & 31))) & 0xFFFFFFFF
+
+    def getrandbits(self, k):
+        if k <= 32:
+            return self._next32() >> (32 - k) if k else 0
+        result = 0
+        bits = 0
+        while bits < k:
+            result |= self._next32() << bits
+            bits += 32
+        return result & ((1 << k) - 1)
+
+    def random(self):
+        # 53 random bits, as in random.Random.random
+        return ((self._next32() >> 5) * 67108864 + (self._next32() >> 6)) * (1.0 / 9007199254740992)
+
+    def getstate(self):
+        return self.state
+
+    def setstate(self, state):
+        self.state = state
+        self.gauss_next = None
@@ -0,0 +1,183 @@
+"""Shared distance fields towards target cells, filled by vectorized search and repaired in place."""
+import heapq
+
+import numpy as np
+
+# Distance of cells that cannot reach the target
+UNREACHABLE = -1
+
+# Larger than any real distance while a field is being filled
+_INF = np.iinfo(np.int32).max
+
+# Repairs that would revisit more than this fraction of the grid refill it instead,
+# since the vectorized fill is faster than the per-cell repair beyond that point
+REPAIR_LIMIT = 0.02
+
+def preferred_steps(x, y, target_x, target_y):
+    """Neighbours of (x, y) in the order chasers try them.
+
+    The step along the axis with the larger remaining offset comes first,
+    as with the old straight-line chase; on a board without terrain it is
+    always on a shortest walk.
+    """
+    dx = target_x - x
+    dy = target_y - y
+    step_x = (x + (1 if dx > 0 else -1), y)
+    step_y = (x, y + (1 if dy > 0 else -1))
+    steps = [step_x, step_y] if abs(dx) > abs(dy) else [step_y, step_x]
+    return steps + [(x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)]
+
+class FlowField:
+    """Cost of the cheapest walk from every cell of grid to the target cell.
+
+    Entering a cell costs Grid.dense_costs() there (0 means a wall). The field is
+    filled once by a NumPy bucketed Dijkstra search; every chaser heading
+    for the same cell then reads its next step in O(1). Terrain edits are
+    applied with update_cell, which only revisits the cells whose distance
+    can change.
+    """
+
+    def __init__(self, grid, target_x, target_y):
+        self.grid = grid
+        self.target = (target_x, target_y)
+        self.distance = np.full((grid.height, grid.width), UNREACHABLE, dtype=np.int32)
+        self._fill()
+
+    def _fill(self):
+        width, height = self.grid.width, self.grid.height
+        costs = self.grid.dense_costs().reshape(-1)
+        work = np.full(width * height, _INF, dtype=np.int32)
+        start = self.target[1] * width + self.target[0]
+        work[start] = 0
+        # Scratch array that keeps one copy of each cell queued from several sides
+        slot = np.empty(width * height, dtype=np.intp)
+        buckets = {0: [np.array([start], dtype=np.intp)]} if costs[start] else {}
+        while buckets:
+            level = min(buckets)
+            cells = np.concatenate(buckets.pop(level))
+            cells = cells[work[cells] == level]
+            order = np.arange(cells.size)
+            slot[cells] = order
+            cells = cells[slot[cells] == order]
+            # A step from a neighbour into cell costs the cell's own entry cost
+            step = level + costs[cells]
+            column = cells % width
+            masks = (cells >= width, cells < (height - 1) * width, column > 0, column < width - 1)
+            offsets = (-width, width, -1, 1)
+            reached = np.concatenate([cells[mask] + offset for mask, offset in zip(masks, offsets)])
+            new_distance = np.concatenate([step[mask] for mask in masks])
+            better = (costs[reached] > 0) & (new_distance < work[reached])
+            reached = reached[better]
+            new_distance = new_distance[better]
+            # Write the largest distances first so the smallest one wins for duplicates
+            for value in np.unique(new_distance)[::-1].tolist():
+                selected = reached[new_distance == value]
+                work[selected] = value
+                buckets.setdefault(value, []).append(selected)
+        work[work == _INF] = UNREACHABLE
+        self.distance[...] = work.reshape(height, width)
+
+    def _neighbors(self, x, y):
+        for new_x, new_y in ((x, y + 1), (x + 1, y), (x, y - 1), (x - 1, y)):
+            if self.grid.in_bounds(new_x, new_y):
+                yield new_x, new_y
+
+    def update_cell(self, x, y, old_cost):
+        """Repair the field after the entry cost of (x, y) changed from old_cost"""
+        new_cost = self.grid.dense_costs()[y, x]
+        if new_cost == old_cost:
+            return
+        if (x, y) == self.target:
+            self._fill()
+        elif new_cost and (not old_cost or new_cost < old_cost):
+            self._lower(x, y)
+        else:
+            self._raise(x, y, old_cost)
+
+    def _lower(self, x, y):
+        """The cell got cheaper or was opened: distances can only shrink"""
+        distance = self.distance
+        costs = self.grid.dense_costs()
+        best = min((distance[ny, nx] + costs[ny, nx]
+                    for nx, ny in self._neighbors(x, y)
+                    if distance[ny, nx] >= 0 and costs[ny, nx]), default=None)
+        if best is not None and (distance[y, x] < 0 or best < distance[y, x]):
+            distance[y, x] = best
+        if distance[y, x] >= 0:
+            self._propagate([(int(distance[y, x]), x, y)])
+
+    def _raise(self, x, y, old_cost):
+        """The cell got dearer or was walled off: repair the cells that relied on it"""
+        distance = self.distance
+        costs = self.grid.dense_costs()
+        if distance[y, x] < 0:
+            return  # Nothing reaches the target through an unreachable cell
+        # Everything whose cheapest walk may have entered (x, y): follow the
+        # tight edges out of it, i.e. neighbours exactly one entry cost further
+        through = distance[y, x] + old_cost
+        stack = [(nx, ny) for nx, ny in self._neighbors(x, y) if distance[ny, nx] == through]
+        stale = set()
+        limit = REPAIR_LIMIT * distance.size
+        while stack:
+            cell = stack.pop()
+            if cell in stale:
+                continue
+            stale.add(cell)
+            if len(stale) > limit:
+                if not costs[y, x]:
+                    distance[y, x] = UNREACHABLE
+                self._fill()
+                return
+            cx, cy = cell
+            through = distance[cy, cx] + costs[cy, cx]
+            stack.extend((nx, ny) for nx, ny in self._neighbors(cx, cy) if distance[ny, nx] == through)
+
+        if not costs[y, x]:
+            distance[y, x] = UNREACHABLE
+        for cx, cy in stale:
+            distance[cy, cx] = UNREACHABLE
+        # Re-enter the stale region from its still valid border
+        heap = []
+        for cx, cy in stale:
+            best = min((distance[ny, nx] + costs[ny, nx] for nx, ny in self._neighbors(cx, cy)
+                        if distance[ny, nx] >= 0 and costs[ny, nx] and (nx, ny) not in stale),
+                       default=None)
+            if best is not None:
+                distance[cy, cx] = best
+                heap.append((int(best), cx, cy))
+        heapq.heapify(heap)
+        self._propagate(heap)
+
+    def _propagate(self, heap):
+        """Dijkstra from the cells in heap, lowering every distance it can"""
+        distance = self.distance
+        costs = self.grid.dense_costs()
+        while heap:
+            current, x, y = heapq.heappop(heap)
+            if distance[y, x] != current:
+                continue
+            step = current + int(costs[y, x])
+            for nx, ny in self._neighbors(x, y):
+                if costs[ny, nx] and (distance[ny, nx] < 0 or step < distance[ny, nx]):
+                    distance[ny, nx] = step
+                    heapq.heappush(heap, (step, nx, ny))
+
+    def distance_at(self, x, y):
+        """Cost of the cheapest walk from (x, y) to the target, or UNREACHABLE"""
+        return int(self.distance[y, x])
+
+    def next_step(self, x, y):
+        """Neighbouring cell on a cheapest walk to the target, or None if there is none.
+
+        Ties between equally good steps are broken by preferred_steps.
+        """
+        here = self.distance[y, x]
+        if here <= 0:
+            return None
+        costs = self.grid.dense_costs()
+        for new_x, new_y in preferred_steps(x, y, *self.target):
+            if (self.grid.is_valid_position(new_x, new_y)
+                    and self.distance[new_y, new_x] >= 0
+                    and self.distance[new_y, new_x] + costs[new_y, new_x] == here):
+                return new_x, new_y
+        return None
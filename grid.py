@@ -1,30 +1,191 @@
+from collections import OrderedDict, namedtuple
+
 import numpy as np
 
+from chunks import ChunkedArray
+from flowfield import FlowField, preferred_steps
+from spatial import SpatialHash
+
+# Aynı anda saklanan en fazla akış alanı sayısı
+FLOW_FIELD_CACHE_SIZE = 32
+
+# Bundan fazla hücre geri sarılırken akış alanları onarılmak yerine atılır
+REWIND_REPAIR_LIMIT = 64
+
+# Zemin türleri (Grid.grid değerleri)
+FLOOR = 0
+WALL = 1
+SLOW = 2
+
+# Bir zemine girmenin tur cinsinden maliyeti (0: geçilemez)
+TERRAIN_COSTS = {FLOOR: 1, WALL: 0, SLOW: 2}
+
+# Harita metinlerindeki karakterler
+TERRAIN_SYMBOLS = {'.': FLOOR, '#': WALL, '~': SLOW}
+
+# Karakter kodu -> zemin (-1: tanınmayan karakter) ve zemin -> maliyet tabloları
+_SYMBOL_TABLE = np.full(256, -1, dtype=np.int8)
+for _symbol, _terrain in TERRAIN_SYMBOLS.items():
+    _SYMBOL_TABLE[ord(_symbol)] = _terrain
+_COST_TABLE = np.array([TERRAIN_COSTS[t] for t in sorted(TERRAIN_COSTS)], dtype=np.int32)
+
+class TerrainEdit(namedtuple('TerrainEdit', ['previous', 'x', 'y', 'old', 'new', 'count'])):
+    """Zemin günlüğünün bir kaydı: (x, y) hücresi old'dan new'e değişti.
+    
+    Kayıtlar değişmezdir; previous ile son yüklemeye kadar uzanan ve
+    kopyalar arasında paylaşılan bir zincir kurarlar. count zincirdeki
+    kayıt sayısıdır.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def after(cls, previous, x, y, old, new):
+        return cls(previous, x, y, old, new, previous.count + 1 if previous is not None else 1)
+
 class Grid:
     def __init__(self, width, height, cell_size):
         self.width = width
         self.height = height
         self.cell_size = cell_size
-        self.grid = np.zeros((height, width), dtype=int)
+        # Katmanlar parçalı (chunked) saklanır: düz zemin olan bölgeler bellek harcamaz
+        self.grid = ChunkedArray(width, height, FLOOR, np.int8)  # Zemin katmanı
+        self.costs = ChunkedArray(width, height, TERRAIN_COSTS[FLOOR], np.int32)  # Hücreye girme maliyetleri
+        self._dense_costs = None  # Akış alanları için maliyetlerin yoğun kopyası
+        self.terrain_version = 0  # Zemin her değiştiğinde artar
+        self.terrain_cells = 0  # Düz zemin olmayan hücre sayısı
+        self.terrain_edits = None  # Son yüklemeden beri set_cell günlüğünün son kaydı (bkz. TerrainEdit)
+        self.agent_index = SpatialHash()  # Ajanların uzamsal indeksi
+        self.flow_fields = OrderedDict()  # Hedef hücre -> FlowField (LRU)
         
-    def is_valid_position(self, x, y):
+    def copy(self):
+        """Aynı zemine sahip, ajan indeksi ve akış alanları boş bir kopya döndürür."""
+        grid = Grid.__new__(Grid)
+        grid.__dict__.update(self.__dict__)
+        grid.grid = self.grid.copy()
+        grid.costs = self.costs.copy()
+        grid._dense_costs = None
+        grid.agent_index = SpatialHash()
+        grid.flow_fields = OrderedDict()
+        return grid
+        
+    def in_bounds(self, x, y):
         """Verilen koordinatların grid içinde olup olmadığını kontrol eder."""
         return 0 <= x < self.width and 0 <= y < self.height
+        
+    def is_valid_position(self, x, y):
+        """Verilen koordinatların grid içinde ve duvar dışında olup olmadığını kontrol eder."""
+        return 0 <= x < self.width and 0 <= y < self.height and self.costs.get(x, y) > 0
+    
+    def are_valid_positions(self, xs, ys):
+        """Koordinat dizileri için vektörel geçerlilik maskesi döndürür."""
+        valid = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        valid[valid] = self.costs[ys[valid], xs[valid]] > 0
+        return valid
+    
+    def agents_at(self, x, y):
+        """(x, y) hücresindeki ajanları indekse eklenme sırasıyla döndürür (boşsa boş demet)."""
+        return self.agent_index.at(x, y)
+
+    def move_cost(self, x, y):
+        """Hücreye girmenin tur cinsinden maliyetini döndürür (0: duvar)."""
+        return self.costs.get(x, y)
     
     def get_cell(self, x, y):
         """Belirtilen koordinattaki hücrenin değerini döndürür."""
-        if self.is_valid_position(x, y):
-            return self.grid[y][x]
+        if self.in_bounds(x, y):
+            return self.grid.get(x, y)
         return None
     
     def set_cell(self, x, y, value):
-        """Belirtilen koordinattaki hücrenin değerini ayarlar."""
-        if self.is_valid_position(x, y):
-            self.grid[y][x] = value
+        """Belirtilen koordinattaki zemini ayarlar.
+        
+        Önbellekteki akış alanları baştan hesaplanmak yerine yalnızca
+        değişiklikten etkilenen hücrelerde onarılır.
+        """
+        if not self.in_bounds(x, y) or self.grid.get(x, y) == value:
+            return
+        self.terrain_edits = TerrainEdit.after(self.terrain_edits, x, y, self.grid.get(x, y), value)
+        self._write_cell(x, y, value)
+
+    def _write_cell(self, x, y, value):
+        old_cost = int(self.costs.get(x, y))
+        self.terrain_cells += int(value != FLOOR) - int(self.grid.get(x, y) != FLOOR)
+        self.grid.set(x, y, value)
+        self.costs.set(x, y, TERRAIN_COSTS[value])
+        if self._dense_costs is not None:
+            self._dense_costs[y, x] = TERRAIN_COSTS[value]
+        self.terrain_version += 1
+        for field in self.flow_fields.values():
+            field.update_cell(x, y, old_cost)
+
+    def rewind_terrain(self, edits):
+        """Zemini günlüğün edits kaydındaki haline getirir (None: son yüklemedeki hali).
+        
+        edits bu grid'in ya da kopyalarının son yüklemeden beri tuttuğu bir
+        günlükten olmalıdır. Yalnızca iki kaydın ortak atasından bu yana
+        değişen hücreler yeniden yazılır.
+        """
+        undo, redo = [], []
+        current, target = self.terrain_edits, edits
+        while current is not target:
+            if target is None or (current is not None and current.count >= target.count):
+                undo.append(current)
+                current = current.previous
+            else:
+                redo.append(target)
+                target = target.previous
+        if len(undo) + len(redo) > REWIND_REPAIR_LIMIT:
+            self.flow_fields.clear()
+        for edit in undo:
+            self._write_cell(edit.x, edit.y, edit.old)
+        for edit in reversed(redo):
+            self._write_cell(edit.x, edit.y, edit.new)
+        self.terrain_edits = edits
+            
+    def load_terrain(self, terrain):
+        """Zemin katmanını toptan yükler.
+        
+        terrain, zemin kodlarından oluşan bir dizi ya da '.', '#' ve '~'
+        karakterlerinden oluşan satırlar olabilir.
+        """
+        if all(isinstance(row, str) for row in terrain):
+            # Büyük haritalar için karakterler tek seferde tablodan çevrilir
+            text = ''.join(terrain).encode('ascii', 'replace')
+            terrain = _SYMBOL_TABLE[np.frombuffer(text, dtype=np.uint8)]
+            if len(terrain) != self.width * self.height or (terrain < 0).any():
+                raise ValueError("harita satırları grid boyutunda olmalı ve yalnızca '.', '#' ve '~' içermeli")
+            terrain = terrain.reshape(self.height, self.width)
+        else:
+            terrain = np.array([[TERRAIN_SYMBOLS[c] for c in row] if isinstance(row, str) else row
+                                for row in terrain], dtype=np.int8)
+        self.grid.load(terrain)
+        self.costs.load(_COST_TABLE[terrain])
+        self._dense_costs = None
+        self.terrain_cells = int(np.count_nonzero(terrain != FLOOR))
+        self.terrain_edits = None
+        self.terrain_version += 1
+        self.flow_fields.clear()
             
     def clear(self):
         """Grid'i temizler."""
-        self.grid.fill(0)
+        self.grid.clear()
+        self.costs.clear()
+        self._dense_costs = None
+        self.terrain_cells = 0
+        self.terrain_edits = None
+        self.terrain_version += 1
+        self.agent_index.clear()
+        self.flow_fields.clear()
+        
+    def dense_costs(self):
+        """Tüm grid'in maliyetlerini yoğun bir dizi olarak döndürür.
+        
+        Yalnızca akış alanları için ilk istendiğinde oluşturulur; zemin
+        değiştikçe yerinde güncellenir.
+        """
+        if self._dense_costs is None:
+            self._dense_costs = self.costs.to_array()
+        return self._dense_costs
         
     def get_neighbors(self, x, y):
         """Verilen koordinatın komşu hücrelerini döndürür."""
@@ -33,4 +194,33 @@ class Grid:
             new_x, new_y = x + dx, y + dy
             if self.is_valid_position(new_x, new_y):
                 neighbors.append((new_x, new_y))
-        return neighbors 
\ No newline at end of file
+        return neighbors
+
+    def flow_field(self, x, y):
+        """(x, y) hedefine giden akış alanını döndürür.
+        
+        Alan hedef hücre başına bir kez hesaplanır ve aynı hedefi kovalayan
+        tüm ajanlar tarafından paylaşılır.
+        """
+        key = (x, y)
+        field = self.flow_fields.get(key)
+        if field is None:
+            field = FlowField(self, x, y)
+            self.flow_fields[key] = field
+            if len(self.flow_fields) > FLOW_FIELD_CACHE_SIZE:
+                self.flow_fields.popitem(last=False)
+        else:
+            self.flow_fields.move_to_end(key)
+        return field
+
+    def next_step(self, x, y, target_x, target_y):
+        """(x, y)'den hedefe giden en ucuz yoldaki bir sonraki hücreyi döndürür (yoksa None).
+        
+        Engelsiz grid'de Manhattan uzaklığı kesin olduğundan akış alanı
+        kurulmaz; hedefe doğru düz adım atılır.
+        """
+        if self.terrain_cells:
+            return self.flow_field(target_x, target_y).next_step(x, y)
+        if (x, y) == (target_x, target_y):
+            return None
+        return preferred_steps(x, y, target_x, target_y)[0]
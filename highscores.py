@@ -0,0 +1,225 @@
+"""High-score service: in-memory leaderboards persisted to an append-only log by a writer thread."""
+import atexit
+import bisect
+import json
+import os
+import queue
+import threading
+import time
+
+from settings import Difficulty
+
+HIGH_SCORES_LOG = "high_scores.log"
+LEGACY_HIGH_SCORES_FILE = "high_scores.json"
+
+# The old global top list had no difficulty; its games ran at the old default
+LEGACY_DIFFICULTY = Difficulty.EASY
+
+# Entries kept per leaderboard
+TOP_K = 5
+
+# Keys every logged record has; lines without them are skipped on load
+RECORD_KEYS = ('name', 'score', 'difficulty', 'seq')
+
+# Rewrite the log once it holds this many lines more than the entries still needed
+COMPACT_SLACK = 1000
+
+_STOP = object()
+
+def _is_record(record):
+    """Whether a parsed log line has the keys and types of a score record"""
+    return (isinstance(record, dict) and all(key in record for key in RECORD_KEYS)
+            and isinstance(record['seq'], int) and isinstance(record['score'], (int, float)))
+
+class Leaderboard:
+    """Top-k records ordered by score, earlier records first on ties"""
+
+    def __init__(self, k):
+        self.k = k
+        self.keys = []
+        self.records = []
+
+    def add(self, record):
+        """Insert record if it makes the top k; returns True if it did"""
+        key = (-record['score'], record['seq'])
+        index = bisect.bisect(self.keys, key)
+        if index >= self.k:
+            return False
+        self.keys.insert(index, key)
+        self.records.insert(index, record)
+        del self.keys[self.k:]
+        del self.records[self.k:]
+        return True
+
+    def __iter__(self):
+        return iter(self.records)
+
+class HighScoreService:
+    """Leaderboards per difficulty and per player, loaded once and kept in memory.
+
+    record() updates memory immediately and hands the write to a background
+    thread that appends one JSON line per score and fsyncs each batch. A
+    torn last line from a crash is skipped on load. Once the log grows
+    COMPACT_SLACK lines past what the leaderboards need, it is rewritten
+    atomically with only the records still on a leaderboard.
+    """
+
+    def __init__(self, path=HIGH_SCORES_LOG, top_k=TOP_K, legacy_path=LEGACY_HIGH_SCORES_FILE):
+        self.path = path
+        self.top_k = top_k
+        self.lock = threading.Lock()
+        self.boards = {}
+        self.player_boards = {}
+        self.next_seq = 0
+        self.written_seq = -1
+        self.log_lines = 0
+        self.file_lock = threading.Lock()
+        self.pending = queue.Queue()
+
+        self._load(legacy_path)
+        self.writer = threading.Thread(target=self._write_loop, name="high-score-writer", daemon=True)
+        self.writer.start()
+        atexit.register(self.close)
+
+    def _load(self, legacy_path):
+        records = []
+        if os.path.exists(self.path):
+            with open(self.path, 'rb') as f:
+                data = f.read()
+            complete = data.rfind(b'\n') + 1
+            if complete < len(data):
+                # Drop a torn last line from a crash so the next append starts clean
+                with open(self.path, 'r+b') as f:
+                    f.truncate(complete)
+            for line in data[:complete].splitlines():
+                self.log_lines += 1
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if _is_record(record):
+                    records.append(record)
+            self.written_seq = max((r['seq'] for r in records), default=-1)
+        elif legacy_path and os.path.exists(legacy_path):
+            # One-time import of the old global top list
+            try:
+                with open(legacy_path, 'r') as f:
+                    legacy = json.load(f)
+            except (OSError, ValueError):
+                legacy = []
+            if not isinstance(legacy, list):
+                legacy = []
+            for entry in legacy:
+                if not (isinstance(entry, dict) and isinstance(entry.get('score'), (int, float))
+                        and 'name' in entry):
+                    continue
+                record = self._make_record(entry['name'], entry['score'], LEGACY_DIFFICULTY)
+                self.pending.put(record)
+                records.append(record)
+
+        seen = set()
+        for record in records:
+            if record['seq'] in seen:
+                continue  # Written both by a compaction and by a later append
+            seen.add(record['seq'])
+            self.next_seq = max(self.next_seq, record['seq'] + 1)
+            self._index(record)
+
+    def _make_record(self, name, score, difficulty):
+        record = {'name': name, 'score': score, 'difficulty': difficulty,
+                  'time': time.time(), 'seq': self.next_seq}
+        self.next_seq += 1
+        return record
+
+    def _index(self, record):
+        """Add record to the overall, difficulty and player leaderboards"""
+        kept = False
+        keys = (None,) if record['difficulty'] is None else (None, record['difficulty'])
+        for key in keys:
+            board = self.boards.setdefault(key, Leaderboard(self.top_k))
+            kept = board.add(record) or kept
+        player_key = (record['difficulty'], record['name'])
+        board = self.player_boards.setdefault(player_key, Leaderboard(self.top_k))
+        kept = board.add(record) or kept
+        return kept
+
+    def record(self, name, score, difficulty=None):
+        """Record a finished game; returns the updated leaderboard for its difficulty"""
+        with self.lock:
+            record = self._make_record(name, score, difficulty)
+            self._index(record)
+            board = self.top(difficulty)
+        self.pending.put(record)
+        return board
+
+    def top(self, difficulty=None):
+        """Best scores for a difficulty (None: all difficulties) as name/score dicts"""
+        board = self.boards.get(difficulty)
+        return [{'name': r['name'], 'score': r['score']} for r in board] if board else []
+
+    def personal_best(self, name, difficulty=None):
+        board = self.player_boards.get((difficulty, name))
+        return board.records[0]['score'] if board and board.records else None
+
+    def _write_loop(self):
+        stop = False
+        while not stop:
+            batch = [self.pending.get()]
+            while True:
+                try:
+                    batch.append(self.pending.get_nowait())
+                except queue.Empty:
+                    break
+            if _STOP in batch:
+                stop = True
+                batch = [r for r in batch if r is not _STOP]
+            if batch:
+                self._append(batch)
+            for _ in range(len(batch) + stop):
+                self.pending.task_done()
+
+    def _append(self, records):
+        with self.file_lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(''.join(json.dumps(r) + '\n' for r in records))
+                f.flush()
+                os.fsync(f.fileno())
+            self.log_lines += len(records)
+            self.written_seq = max(self.written_seq, max(r['seq'] for r in records))
+            live = self._live_records()
+            if self.log_lines > len(live) + COMPACT_SLACK:
+                self._rewrite(live)
+
+    def _live_records(self):
+        """Records on any leaderboard that the writer has already persisted"""
+        with self.lock:
+            live = {}
+            for board in list(self.boards.values()) + list(self.player_boards.values()):
+                for record in board:
+                    if record['seq'] <= self.written_seq:
+                        live[record['seq']] = record
+        return [live[seq] for seq in sorted(live)]
+
+    def compact(self):
+        """Atomically rewrite the log with only the records still on a leaderboard"""
+        self.flush()
+        with self.file_lock:
+            self._rewrite(self._live_records())
+
+    def _rewrite(self, records):
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(''.join(json.dumps(r) + '\n' for r in records))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+        self.log_lines = len(records)
+
+    def flush(self):
+        """Block until every recorded score is on disk"""
+        self.pending.join()
+
+    def close(self):
+        if self.writer.is_alive():
+            self.pending.put(_STOP)
+            self.writer.join()
@@ -1,313 +1,148 @@
 import pygame
-import sys
-import random
-import json
 import os
+import sys
 import math
-from grid import Grid
-from agent import Agent, Strategy
-
-# Initialize Pygame
-pygame.init()
-
-# Screen settings
-WINDOW_SIZE = (800, 600)
-GRID_SIZE = (20, 15)
-CELL_SIZE = 40
-
-# Colors
-WHITE = (255, 255, 255)
-BLACK = (0, 0, 0)
-RED = (255, 0, 0)
-GREEN = (0, 255, 0)
-BLUE = (0, 0, 255)
-YELLOW = (255, 255, 0)
-PURPLE = (128, 0, 128)
-GOLD = (255, 215, 0)
-CYAN = (0, 255, 255)
-
-# Modern color palette
-MODERN_COLORS = {
-    'background': (18, 18, 18),
-    'grid': (40, 40, 40),
-    'accent': (0, 150, 255),
-    'success': (46, 204, 113),
-    'warning': (241, 196, 15),
-    'danger': (231, 76, 60),
-    'text': (236, 240, 241),
-    'button': (52, 152, 219),
-    'button_hover': (41, 128, 185)
-}
-
-# Difficulty settings
-class Difficulty:
-    EASY = 0
-    MEDIUM = 1
-    HARD = 2
-
-DIFFICULTY_SETTINGS = {
-    Difficulty.EASY: {
-        'agent_speed': 3,
-        'agent_count': 3,
-        'score_multiplier': 1,
-        'target_score': 50,
-        'agent_behaviors': {
-            'random': {'move_chance': 0.3, 'detection_range': 3},
-            'defensive': {'move_chance': 0.4, 'detection_range': 4},
-            'patrol': {'move_chance': 0.5, 'detection_range': 3}
-        }
-    },
-    Difficulty.MEDIUM: {
-        'agent_speed': 4,
-        'agent_count': 4,
-        'score_multiplier': 2,
-        'target_score': 100,
-        'agent_behaviors': {
-            'random': {'move_chance': 0.5, 'detection_range': 4},
-            'defensive': {'move_chance': 0.6, 'detection_range': 5},
-            'patrol': {'move_chance': 0.7, 'detection_range': 4}
-        }
-    },
-    Difficulty.HARD: {
-        'agent_speed': 5,
-        'agent_count': 5,
-        'score_multiplier': 3,
-        'target_score': 150,
-        'agent_behaviors': {
-            'random': {'move_chance': 0.7, 'detection_range': 5},
-            'defensive': {'move_chance': 0.8, 'detection_range': 6},
-            'patrol': {'move_chance': 0.9, 'detection_range': 5}
-        }
-    }
-}
+import time
+import numpy as np
+from settings import (WINDOW_SIZE, CELL_SIZE, WHITE, BLACK, RED, GREEN,
+                      BLUE, YELLOW, PURPLE, GOLD, CYAN, MODERN_COLORS, Difficulty,
+                      DIFFICULTY_LABELS, DIFFICULTY_SETTINGS, RENDER_FPS,
+                      DIRTY_RECT_RENDERING, PROFILING, PROFILE_OUTPUT, RECORDINGS_DIR, MAP_FILE,
+                      ASSET_CACHE, SERVER_ADDRESS, THREADED_SIMULATION)
+from world import World, Action, read_map
+from camera import Camera
+from renderer import BoardRenderer
+from text_cache import TextCache
+from particles import ParticleSystem, SHAPES
+from surface_pool import SurfacePool
+from highscores import HighScoreService
+from profiler import Profiler
+from replay import Recorder
+from simulation import Simulation
+from resources import Resources
+from board import (USER_IMAGE, AGENT_IMAGES, FONT_SIZE, set_agent_images, agent_sprites,
+                   build_board_background, draw_modern_score_box)
+
+# Initialize only the display; fonts start with their first use and audio is never needed
+pygame.display.init()
 
 # Create screen
 screen = pygame.display.set_mode(WINDOW_SIZE)
 pygame.display.set_caption("Multi-Agent Game Simulation")
 
-# Load user agent image
-try:
-    user_image = pygame.image.load("me.jpg")
-    user_image = pygame.transform.scale(user_image, (CELL_SIZE, CELL_SIZE))
-except:
-    print("Image could not be loaded, using default circle")
-    user_image = None
-
-# Load defensive agent image
-try:
-    defensive_image = pygame.image.load("raz.jpeg")
-    defensive_image = pygame.transform.scale(defensive_image, (CELL_SIZE, CELL_SIZE))
-except:
-    print("Defensive agent image could not be loaded, using default circle")
-    defensive_image = None
-
-# Create grid
-grid = Grid(GRID_SIZE[0], GRID_SIZE[1], CELL_SIZE)
-
-# High scores file
-HIGH_SCORES_FILE = "high_scores.json"
-
-# Create fonts
-font = pygame.font.Font(None, 36)
-game_over_font = pygame.font.Font(None, 72)
-floating_font = pygame.font.Font(None, 48)
-score_font = pygame.font.Font(None, 72)
-input_font = pygame.font.Font(None, 48)
-title_font = pygame.font.Font(None, 96)
+# Fonts and agent images are loaded on first use; the images are decoded in the
+# background while the player types their name (see resources.py)
+resources = Resources(ASSET_CACHE)
+
+# Font sizes (FONT_SIZE and SCORE_FONT_SIZE are in board.py)
+GAME_OVER_FONT_SIZE = 72
+FLOATING_FONT_SIZE = 48
+INPUT_FONT_SIZE = 48
+TITLE_FONT_SIZE = 96
+HUD_FONT_SIZE = 20
+
+# Floating scores rise one pixel per animation step and fade out over this many steps
+FLOATING_SCORE_LIFETIME = 30
+
+def animation_steps():
+    """Animation steps the last frame spans.
+
+    The effects are tuned per frame of the old loop, which ran at the
+    difficulty's agent_speed; counting steps at that rate keeps their pace
+    independent of RENDER_FPS.
+    """
+    return frame_time * DIFFICULTY_SETTINGS[current_difficulty]['agent_speed']
 
 class FloatingScore:
     def __init__(self, x, y, score):
         self.x = x
         self.y = y
         self.score = score
-        self.lifetime = 30
+        self.lifetime = FLOATING_SCORE_LIFETIME
         self.alpha = 255
         
-    def update(self):
-        self.y -= 1
-        self.lifetime -= 1
-        self.alpha = int((self.lifetime / 30) * 255)
+    def update(self, steps=1.0):
+        self.y -= steps
+        self.lifetime -= steps
+        self.alpha = int(max(self.lifetime, 0) / FLOATING_SCORE_LIFETIME * 255)
         return self.lifetime > 0
     
-    def draw(self, screen):
+    def draw(self, screen, origin=(0, 0)):
         if self.lifetime > 0:
-            text = floating_font.render(f"+{self.score}", True, GREEN)
+            text = resources.font(FLOATING_FONT_SIZE).render(f"+{self.score}", True, GREEN)
             text.set_alpha(self.alpha)
-            screen.blit(text, (self.x, self.y))
+            return screen.blit(text, (self.x - origin[0], int(self.y) - origin[1]))
 
 class WelcomeAnimation:
-    def __init__(self):
-        self.particles = []
-        self.create_particles()
+    def __init__(self, count=50):
+        self.particles = ParticleSystem(count, [GOLD, WHITE, CYAN], max_size=4)
+        self.create_particles(count)
         
-    def create_particles(self):
-        for _ in range(50):
-            x = random.randint(0, WINDOW_SIZE[0])
-            y = random.randint(0, WINDOW_SIZE[1])
-            speed = random.uniform(1, 3)
-            angle = random.uniform(0, 2 * math.pi)
-            size = random.randint(2, 4)
-            self.particles.append({
-                'x': x, 'y': y,
-                'dx': math.cos(angle) * speed,
-                'dy': math.sin(angle) * speed,
-                'size': size,
-                'color': random.choice([GOLD, WHITE, CYAN])
-            })
-    
-    def update(self):
-        for p in self.particles:
-            p['x'] += p['dx']
-            p['y'] += p['dy']
-            
-            if p['x'] < 0 or p['x'] > WINDOW_SIZE[0]:
-                p['dx'] *= -1
-            if p['y'] < 0 or p['y'] > WINDOW_SIZE[1]:
-                p['dy'] *= -1
-    
-    def draw(self, screen):
-        for p in self.particles:
-            pygame.draw.circle(screen, p['color'],
-                             (int(p['x']), int(p['y'])), p['size'])
-
-class Confetti:
-    def __init__(self):
-        self.x = random.randint(0, WINDOW_SIZE[0])
-        self.y = random.randint(-100, 0)
-        self.size = random.randint(5, 15)
-        self.speed = random.uniform(2, 5)
-        self.color = random.choice([RED, GREEN, BLUE, YELLOW, PURPLE, CYAN, GOLD])
-        self.rotation = random.uniform(0, 360)
-        self.rotation_speed = random.uniform(-5, 5)
-        self.shape = random.choice(['circle', 'square', 'triangle'])
-    
-    def update(self):
-        self.y += self.speed
-        self.rotation += self.rotation_speed
-        return self.y < WINDOW_SIZE[1]
+    def create_particles(self, count):
+        rng = self.particles.rng
+        speed = rng.uniform(1, 3, count)
+        angle = rng.uniform(0, 2 * math.pi, count)
+        self.particles.spawn(count,
+                             x=rng.integers(0, WINDOW_SIZE[0], count, endpoint=True),
+                             y=rng.integers(0, WINDOW_SIZE[1], count, endpoint=True),
+                             vx=np.cos(angle) * speed,
+                             vy=np.sin(angle) * speed,
+                             size=rng.integers(2, 4, count, endpoint=True),
+                             color=rng.integers(0, 3, count))
+    
+    def update(self, steps=1.0):
+        self.particles.update(steps)
+        self.particles.bounce(WINDOW_SIZE[0], WINDOW_SIZE[1])
     
     def draw(self, screen):
-        if self.shape == 'circle':
-            pygame.draw.circle(screen, self.color, (int(self.x), int(self.y)), self.size)
-        elif self.shape == 'square':
-            points = [
-                (self.x - self.size, self.y - self.size),
-                (self.x + self.size, self.y - self.size),
-                (self.x + self.size, self.y + self.size),
-                (self.x - self.size, self.y + self.size)
-            ]
-            rotated_points = []
-            for point in points:
-                # Rotate point around center
-                dx = point[0] - self.x
-                dy = point[1] - self.y
-                angle = math.radians(self.rotation)
-                new_x = self.x + dx * math.cos(angle) - dy * math.sin(angle)
-                new_y = self.y + dx * math.sin(angle) + dy * math.cos(angle)
-                rotated_points.append((new_x, new_y))
-            pygame.draw.polygon(screen, self.color, rotated_points)
-        else:  # triangle
-            points = [
-                (self.x, self.y - self.size),
-                (self.x - self.size, self.y + self.size),
-                (self.x + self.size, self.y + self.size)
-            ]
-            rotated_points = []
-            for point in points:
-                dx = point[0] - self.x
-                dy = point[1] - self.y
-                angle = math.radians(self.rotation)
-                new_x = self.x + dx * math.cos(angle) - dy * math.sin(angle)
-                new_y = self.y + dx * math.sin(angle) + dy * math.cos(angle)
-                rotated_points.append((new_x, new_y))
-            pygame.draw.polygon(screen, self.color, rotated_points)
+        self.particles.draw(screen)
 
 class VictoryScreen:
-    def __init__(self):
-        self.confetti = []
-        self.create_confetti()
-    
-    def create_confetti(self):
-        for _ in range(100):  # Create 100 confetti pieces
-            self.confetti.append(Confetti())
-    
-    def update(self):
-        # Update existing confetti
-        self.confetti = [c for c in self.confetti if c.update()]
-        
-        # Add new confetti if needed
-        while len(self.confetti) < 100:
-            self.confetti.append(Confetti())
+    CONFETTI_COLORS = [RED, GREEN, BLUE, YELLOW, PURPLE, CYAN, GOLD]
+    
+    def __init__(self, count=100):
+        self.count = count
+        self.confetti = ParticleSystem(count, self.CONFETTI_COLORS, max_size=15)
+        self.create_confetti(count)
+    
+    def create_confetti(self, count):
+        rng = self.confetti.rng
+        self.confetti.spawn(count,
+                            x=rng.integers(0, WINDOW_SIZE[0], count, endpoint=True),
+                            y=rng.integers(-100, 0, count, endpoint=True),
+                            vy=rng.uniform(2, 5, count),
+                            size=rng.integers(5, 15, count, endpoint=True),
+                            color=rng.integers(0, len(self.CONFETTI_COLORS), count),
+                            shape=rng.integers(0, len(SHAPES), count),
+                            rotation=rng.uniform(0, 360, count),
+                            rotation_speed=rng.uniform(-5, 5, count))
+    
+    def update(self, steps=1.0):
+        # Recycle confetti that fell off the screen as new pieces at the top
+        self.confetti.update(steps)
+        fallen = self.confetti.below(WINDOW_SIZE[1])
+        if len(fallen):
+            self.confetti.kill(fallen)
+            self.create_confetti(len(fallen))
     
     def draw(self, screen):
-        for confetti in self.confetti:
-            confetti.draw(screen)
-
-class TextCache:
-    def __init__(self):
-        self.cache = {}
-        self.last_scale = 1.0
-        self.last_score = 0
-        self.last_target = 0
-    
-    def get_text(self, text, font, color, scale=1.0):
-        key = (text, font, color, scale)
-        if key not in self.cache:
-            text_surface = font.render(text, True, color)
-            if scale != 1.0:
-                text_surface = pygame.transform.scale(text_surface,
-                    (int(text_surface.get_width() * scale),
-                     int(text_surface.get_height() * scale)))
-            self.cache[key] = text_surface
-        return self.cache[key]
-    
-    def clear(self):
-        self.cache.clear()
-        self.last_scale = 1.0
-        self.last_score = 0
-        self.last_target = 0
-
-def load_high_scores():
-    """Load high scores from file"""
-    if os.path.exists(HIGH_SCORES_FILE):
-        try:
-            with open(HIGH_SCORES_FILE, 'r') as f:
-                return json.load(f)
-        except:
-            return []
-    return []
-
-def save_high_score(name, score):
-    """Save new high score"""
-    high_scores = load_high_scores()
-    high_scores.append({"name": name, "score": score})
-    high_scores.sort(key=lambda x: x["score"], reverse=True)
-    high_scores = high_scores[:5]
-    
-    with open(HIGH_SCORES_FILE, 'w') as f:
-        json.dump(high_scores, f)
-    
-    return high_scores
-
-def get_random_position():
-    """Get random position on grid"""
-    return (random.randint(0, GRID_SIZE[0]-1), random.randint(0, GRID_SIZE[1]-1))
+        self.confetti.draw(screen)
 
 def show_difficulty_selection():
     """Show difficulty selection screen"""
     screen.fill(BLACK)
     
     # Draw animated particles
-    welcome_animation.update()
+    welcome_animation.update(animation_steps())
     welcome_animation.draw(screen)
     
     # Title
-    title = title_font.render('Select Difficulty', True, GOLD)
+    title = resources.font(TITLE_FONT_SIZE).render('Select Difficulty', True, GOLD)
     title_rect = title.get_rect(center=(WINDOW_SIZE[0]//2, 150))
     
     # Glow effect
     for i in range(3):
-        glow = title_font.render('Select Difficulty', True, (GOLD[0]//2, GOLD[1]//2, GOLD[2]//2))
+        glow = resources.font(TITLE_FONT_SIZE).render('Select Difficulty', True, (GOLD[0]//2, GOLD[1]//2, GOLD[2]//2))
         glow_rect = glow.get_rect(center=(WINDOW_SIZE[0]//2 + i*2, 150 + i*2))
         screen.blit(glow, glow_rect)
     
@@ -325,12 +160,12 @@ def show_difficulty_selection():
         pygame.draw.rect(screen, color, button)
         pygame.draw.rect(screen, WHITE, button, 2)
         
-        text_surface = font.render(text, True, BLACK)
+        text_surface = resources.font(FONT_SIZE).render(text, True, BLACK)
         text_rect = text_surface.get_rect(center=button.center)
         screen.blit(text_surface, text_rect)
     
     # Instructions
-    instruction = font.render('Click to select difficulty', True, WHITE)
+    instruction = resources.font(FONT_SIZE).render('Click to select difficulty', True, WHITE)
     instruction_rect = instruction.get_rect(center=(WINDOW_SIZE[0]//2, 550))
     screen.blit(instruction, instruction_rect)
 
@@ -338,14 +173,14 @@ def show_welcome_screen():
     """Show welcome screen with animations"""
     screen.fill(BLACK)
     
-    welcome_animation.update()
+    welcome_animation.update(animation_steps())
     welcome_animation.draw(screen)
     
-    title = title_font.render('Multi-Agent Game', True, GOLD)
+    title = resources.font(TITLE_FONT_SIZE).render('Multi-Agent Game', True, GOLD)
     title_rect = title.get_rect(center=(WINDOW_SIZE[0]//2, 150))
     
     for i in range(3):
-        glow = title_font.render('Multi-Agent Game', True, (GOLD[0]//2, GOLD[1]//2, GOLD[2]//2))
+        glow = resources.font(TITLE_FONT_SIZE).render('Multi-Agent Game', True, (GOLD[0]//2, GOLD[1]//2, GOLD[2]//2))
         glow_rect = glow.get_rect(center=(WINDOW_SIZE[0]//2 + i*2, 150 + i*2))
         screen.blit(glow, glow_rect)
     
@@ -356,39 +191,43 @@ def show_welcome_screen():
         pygame.draw.rect(screen, (GOLD[0]//(i+1), GOLD[1]//(i+1), GOLD[2]//(i+1)),
                         input_box.inflate(i*2, i*2), 1)
     
-    name_text = input_font.render(player_name, True, WHITE)
+    name_text = resources.font(INPUT_FONT_SIZE).render(player_name, True, WHITE)
     name_rect = name_text.get_rect(center=input_box.center)
     screen.blit(name_text, name_rect)
     
     alpha = int(128 + 127 * math.sin(pygame.time.get_ticks() * 0.003))
-    instruction1 = font.render('Enter your name and press ENTER', True, WHITE)
+    instruction1 = resources.font(FONT_SIZE).render('Enter your name and press ENTER', True, WHITE)
     instruction1.set_alpha(alpha)
     instruction1_rect = instruction1.get_rect(center=(WINDOW_SIZE[0]//2, 400))
     screen.blit(instruction1, instruction1_rect)
     
-    instruction2 = font.render('Press ESC to exit', True, WHITE)
+    instruction2 = resources.font(FONT_SIZE).render('Press ESC to exit', True, WHITE)
     instruction2_rect = instruction2.get_rect(center=(WINDOW_SIZE[0]//2, 450))
     screen.blit(instruction2, instruction2_rect)
 
 def show_high_scores():
-    """Show high scores"""
-    high_scores = load_high_scores()
+    """Show the high scores of the current difficulty"""
+    scores = high_scores.top(current_difficulty)
     
-    overlay = pygame.Surface(WINDOW_SIZE)
-    overlay.set_alpha(180)
-    overlay.fill(BLACK)
+    overlay = surface_pool.get(screen.get_size(), BLACK, 180)
     screen.blit(overlay, (0, 0))
     
-    title = game_over_font.render('High Scores', True, GOLD)
+    title = text_cache.get_text(f'High Scores - {DIFFICULTY_LABELS[current_difficulty]}', resources.font(GAME_OVER_FONT_SIZE), GOLD)
     title_rect = title.get_rect(center=(WINDOW_SIZE[0]//2, 100))
     screen.blit(title, title_rect)
     
-    for i, score_data in enumerate(high_scores):
-        score_text = font.render(f"{i+1}. {score_data['name']}: {score_data['score']}", True, WHITE)
+    for i, score_data in enumerate(scores):
+        score_text = text_cache.get_text(f"{i+1}. {score_data['name']}: {score_data['score']}", resources.font(FONT_SIZE), WHITE)
         score_rect = score_text.get_rect(center=(WINDOW_SIZE[0]//2, 200 + i*50))
         screen.blit(score_text, score_rect)
     
-    continue_text = font.render('Press SPACE to continue', True, WHITE)
+    best = high_scores.personal_best(player_name, current_difficulty)
+    if best is not None:
+        best_text = text_cache.get_text(f"Your best: {best}", resources.font(FONT_SIZE), GOLD)
+        best_rect = best_text.get_rect(center=(WINDOW_SIZE[0]//2, 200 + len(scores)*50 + 20))
+        screen.blit(best_text, best_rect)
+    
+    continue_text = text_cache.get_text('Press SPACE to continue', resources.font(FONT_SIZE), WHITE)
     continue_rect = continue_text.get_rect(center=(WINDOW_SIZE[0]//2, WINDOW_SIZE[1] - 100))
     screen.blit(continue_text, continue_rect)
 
@@ -402,82 +241,34 @@ def draw_modern_button(screen, text, x, y, width, height, color=MODERN_COLORS['b
     pygame.draw.rect(screen, button_color, (x, y, width, height), border_radius=10)
     
     # Button shadow
-    shadow_surface = pygame.Surface((width, height), pygame.SRCALPHA)
-    shadow_surface.fill((0, 0, 0, 50))
+    shadow_surface = surface_pool.get((width, height), (0, 0, 0, 50))
     screen.blit(shadow_surface, (x + 2, y + 2))
     
     # Button text
-    text_surface = text_cache.get_text(text, font, MODERN_COLORS['text'])
+    text_surface = text_cache.get_text(text, resources.font(FONT_SIZE), MODERN_COLORS['text'])
     text_rect = text_surface.get_rect(center=(x + width//2, y + height//2))
     screen.blit(text_surface, text_rect)
     
     return is_hovered
 
-def draw_modern_grid():
-    """Draw a modern grid with gradient lines"""
-    for x in range(GRID_SIZE[0] + 1):
-        alpha = int(100 * (1 - x/GRID_SIZE[0]))
-        pygame.draw.line(screen, (*MODERN_COLORS['grid'], alpha),
-                        (x * CELL_SIZE, 0),
-                        (x * CELL_SIZE, GRID_SIZE[1] * CELL_SIZE))
-    for y in range(GRID_SIZE[1] + 1):
-        alpha = int(100 * (1 - y/GRID_SIZE[1]))
-        pygame.draw.line(screen, (*MODERN_COLORS['grid'], alpha),
-                        (0, y * CELL_SIZE),
-                        (GRID_SIZE[0] * CELL_SIZE, y * CELL_SIZE))
-
-def draw_modern_score_box():
-    """Draw a modern score box with glass effect"""
-    box_width = 200
-    box_height = 100
-    box_x = 20
-    box_y = 20
-    
-    # Glass effect background
-    glass_surface = pygame.Surface((box_width, box_height), pygame.SRCALPHA)
-    glass_surface.fill((255, 255, 255, 30))
-    screen.blit(glass_surface, (box_x, box_y))
-    
-    # Border
-    pygame.draw.rect(screen, MODERN_COLORS['accent'], 
-                    (box_x, box_y, box_width, box_height), 
-                    2, border_radius=10)
-    
-    # Score text
-    score_text = text_cache.get_text(str(user_score), score_font, MODERN_COLORS['accent'])
-    score_rect = score_text.get_rect(center=(box_x + box_width//2, box_y + box_height//2))
-    screen.blit(score_text, score_rect)
-    
-    # Target score
-    target_score = DIFFICULTY_SETTINGS[current_difficulty]['target_score']
-    target_text = text_cache.get_text(f"Target: {target_score}", font, MODERN_COLORS['text'])
-    target_rect = target_text.get_rect(center=(box_x + box_width//2, box_y + box_height + 20))
-    screen.blit(target_text, target_rect)
-
 def show_modern_victory_screen():
     """Show a modern victory screen"""
     # Dark overlay with blur effect
-    overlay = pygame.Surface(WINDOW_SIZE)
-    overlay.set_alpha(200)
-    overlay.fill(MODERN_COLORS['background'])
+    overlay = surface_pool.get(screen.get_size(), MODERN_COLORS['background'], 200)
     screen.blit(overlay, (0, 0))
     
     # Update and draw confetti
-    victory_screen.update()
+    victory_screen.update(animation_steps())
     victory_screen.draw(screen)
     
     # Victory text with glow effect
     scale = 1 + 0.1 * math.sin(pygame.time.get_ticks() * 0.005)
-    if scale != text_cache.last_scale:
-        text_cache.clear()
-        text_cache.last_scale = scale
-    
-    victory_text = text_cache.get_text('VICTORY!', game_over_font, MODERN_COLORS['success'], scale)
+    victory_text = text_cache.get_text('VICTORY!', resources.font(GAME_OVER_FONT_SIZE), MODERN_COLORS['success'], scale)
     text_rect = victory_text.get_rect(center=(WINDOW_SIZE[0]//2, WINDOW_SIZE[1]//2 - 50))
     
     # Glow effect
     for i in range(3):
-        glow = text_cache.get_text('VICTORY!', game_over_font, 
+        glow = text_cache.get_text('VICTORY!', resources.font(GAME_OVER_FONT_SIZE), 
                                  (*MODERN_COLORS['success'], 100 - i*30), scale)
         glow_rect = glow.get_rect(center=(WINDOW_SIZE[0]//2 + i*2, WINDOW_SIZE[1]//2 - 50 + i*2))
         screen.blit(glow, glow_rect)
@@ -485,7 +276,7 @@ def show_modern_victory_screen():
     screen.blit(victory_text, text_rect)
     
     # Score display
-    score_text = text_cache.get_text(f'Final Score: {user_score}', font, MODERN_COLORS['text'])
+    score_text = text_cache.get_text(f'Final Score: {simulation.frames[1].score}', resources.font(FONT_SIZE), MODERN_COLORS['text'])
     score_rect = score_text.get_rect(center=(WINDOW_SIZE[0]//2, WINDOW_SIZE[1]//2 + 50))
     screen.blit(score_text, score_rect)
     
@@ -510,25 +301,21 @@ def show_modern_victory_screen():
     return play_again_rect, exit_game_rect
 
 def show_modern_game_over():
-    """Show a modern game over screen"""
+    """Show a modern game over screen (or, once the game server is lost, a disconnected one)"""
+    frame = simulation.frames[1]
+    title = 'GAME OVER' if frame.connected else 'DISCONNECTED'
     # Dark overlay with blur effect
-    overlay = pygame.Surface(WINDOW_SIZE)
-    overlay.set_alpha(200)
-    overlay.fill(MODERN_COLORS['background'])
+    overlay = surface_pool.get(screen.get_size(), MODERN_COLORS['background'], 200)
     screen.blit(overlay, (0, 0))
     
     # Game over text with glow effect
     scale = 1 + 0.1 * math.sin(pygame.time.get_ticks() * 0.005)
-    if scale != text_cache.last_scale:
-        text_cache.clear()
-        text_cache.last_scale = scale
-    
-    game_over_text = text_cache.get_text('GAME OVER', game_over_font, MODERN_COLORS['danger'], scale)
+    game_over_text = text_cache.get_text(title, resources.font(GAME_OVER_FONT_SIZE), MODERN_COLORS['danger'], scale)
     text_rect = game_over_text.get_rect(center=(WINDOW_SIZE[0]//2, WINDOW_SIZE[1]//2 - 50))
     
     # Glow effect
     for i in range(3):
-        glow = text_cache.get_text('GAME OVER', game_over_font,
+        glow = text_cache.get_text(title, resources.font(GAME_OVER_FONT_SIZE),
                                  (*MODERN_COLORS['danger'], 100 - i*30), scale)
         glow_rect = glow.get_rect(center=(WINDOW_SIZE[0]//2 + i*2, WINDOW_SIZE[1]//2 - 50 + i*2))
         screen.blit(glow, glow_rect)
@@ -536,7 +323,7 @@ def show_modern_game_over():
     screen.blit(game_over_text, text_rect)
     
     # Score display
-    score_text = text_cache.get_text(f'Score: {user_score}', font, MODERN_COLORS['text'])
+    score_text = text_cache.get_text(f'Score: {frame.score}', resources.font(FONT_SIZE), MODERN_COLORS['text'])
     score_rect = score_text.get_rect(center=(WINDOW_SIZE[0]//2, WINDOW_SIZE[1]//2 + 50))
     screen.blit(score_text, score_rect)
     
@@ -562,56 +349,70 @@ def show_modern_game_over():
 
 def reset_game():
     """Reset game state"""
-    global user_agent, user_score, game_over, agents, floating_scores
-    user_agent = Agent(10, 7, None, PURPLE, grid)
-    user_score = 0
-    game_over = False
-    game_won = False
+    global world, camera, simulation, background_key, recorder
+    simulation.stop()  # Hand the world back before resetting or replacing it
+    if SERVER_ADDRESS:
+        world.reset()  # Rejoin the shared game; on failure it stays finished and disconnected
+    else:
+        world = World(current_difficulty, terrain=world.terrain, profiler=profiler, live=not RECORDINGS_DIR)
+    camera = board_renderer.camera = Camera(WINDOW_SIZE, (world.grid.width, world.grid.height), CELL_SIZE)
+    background_key = None  # New grid: rebuild the board background
+    if RECORDINGS_DIR and not SERVER_ADDRESS:
+        recorder = Recorder(world, metadata={'player': player_name})
     floating_scores.clear()
-    
-    # Create agents based on difficulty
-    settings = DIFFICULTY_SETTINGS[current_difficulty]
-    behaviors = settings['agent_behaviors']
-    
-    agents = [
-        Agent(5, 5, Strategy.RANDOM, RED, grid),
-        Agent(15, 5, Strategy.GREEDY, GREEN, grid)
-    ]
-    
-    if settings['agent_count'] >= 3:
-        defensive_agent = Agent(5, 10, Strategy.DEFENSIVE, BLUE, grid)
-        defensive_agent.move_chance = behaviors['defensive']['move_chance']
-        defensive_agent.detection_range = behaviors['defensive']['detection_range']
-        defensive_agent.image = defensive_image  # Set the defensive agent image
-        agents.append(defensive_agent)
-    
-    if settings['agent_count'] >= 4:
-        patrol_agent = Agent(15, 10, Strategy.PATROL, YELLOW, grid)
-        patrol_agent.move_chance = behaviors['patrol']['move_chance']
-        patrol_agent.detection_range = behaviors['patrol']['detection_range']
-        patrol_agent.image = defensive_image  # Set the defensive agent image for patrol agent
-        agents.append(patrol_agent)
-    
-    if settings['agent_count'] >= 5:
-        random_agent = Agent(10, 12, Strategy.RANDOM, CYAN, grid)
-        random_agent.move_chance = behaviors['random']['move_chance']
-        random_agent.detection_range = behaviors['random']['detection_range']
-        random_agent.image = defensive_image  # Set the defensive agent image for random agent
-        agents.append(random_agent)
-
-def respawn_target():
-    """Respawn target agent (green) to new position"""
-    new_x, new_y = get_random_position()
-    while any(abs(new_x - a.x) < 3 and abs(new_y - a.y) < 3 for a in agents + [user_agent]):
-        new_x, new_y = get_random_position()
-    agents[1].x = new_x
-    agents[1].y = new_y
+    set_agent_images(world, resources)
+    simulation = Simulation(world, THREADED_SIMULATION, profiler).start()
+
+def save_recording():
+    """Write the finished game's replay file, once per game"""
+    global recorder
+    os.makedirs(RECORDINGS_DIR, exist_ok=True)
+    name = ''.join(c for c in player_name if c.isalnum()) or 'player'
+    recorder.header['metadata']['score'] = simulation.frames[1].score
+    recorder.save(os.path.join(RECORDINGS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{name}-{world.seed}.rec"))
+    recorder = None
+
+def draw_world(previous, current, alpha=1.0):
+    """Draw the current Frame of the simulation: grid, agents, player and HUD.
+
+    alpha in [0, 1] is how far the simulation is from the previous frame's tick to the next one.
+    """
+    global background_key
+    # The camera scrolls in whole cells, so the background is only rebuilt when it moves
+    camera.follow(current.user_agent.x, current.user_agent.y)
+    key = (current.terrain_version, camera.x, camera.y)
+    if background_key != key:
+        with profiler.scope('draw.build_background'):
+            board_renderer.set_background(build_board_background(WINDOW_SIZE, current.terrain, camera,
+                                                                       text_cache, resources))
+        background_key = key
+    with profiler.scope('draw.background'):
+        board_renderer.begin_frame()
+
+    with profiler.scope('draw.agents'):
+        previous_positions = [(agent.x, agent.y) for agent in previous.agents]
+        board_renderer.draw_agents(agent_sprites(current, previous_positions, alpha,
+                                                 resources.image(USER_IMAGE, (CELL_SIZE, CELL_SIZE))))
+
+    with profiler.scope('draw.scores'):
+        for score in floating_scores:
+            board_renderer.mark_dirty(score.draw(screen, camera.origin))
+
+    with profiler.scope('draw.score_box'):
+        board_renderer.mark_dirty(draw_modern_score_box(screen, current.score, current.target_score,
+                                                         text_cache, resources, surface_pool))
+
+# Arrow keys mapped to player actions
+KEY_ACTIONS = {
+    pygame.K_UP: Action.UP,
+    pygame.K_DOWN: Action.DOWN,
+    pygame.K_LEFT: Action.LEFT,
+    pygame.K_RIGHT: Action.RIGHT
+}
 
 # Game state
 clock = pygame.time.Clock()
 running = True
-game_over = False
-game_won = False
 showing_high_scores = False
 showing_welcome = True
 showing_difficulty = False
@@ -627,57 +428,97 @@ victory_screen = VictoryScreen()
 # Create text cache
 text_cache = TextCache()
 
-# Create initial agents
-agents = [
-    Agent(5, 5, Strategy.RANDOM, RED, grid),
-    Agent(15, 5, Strategy.GREEDY, GREEN, grid)
-]
+# Load high scores once; writes happen on a background thread
+high_scores = HighScoreService()
+
+# Create pool for translucent overlays and panels
+surface_pool = SurfacePool()
+
+# Create frame profiler
+profiler = Profiler(PROFILING)
+show_profiler_hud = False
+
+# Create simulation world, on the GAME_MAP map if one is given, or join the GAME_SERVER game
+if SERVER_ADDRESS:
+    from client import RemoteWorld
+    try:
+        world = RemoteWorld(SERVER_ADDRESS)
+    except OSError as error:
+        sys.exit(f"Could not join the game at {SERVER_ADDRESS}: {error}")
+else:
+    world = World(current_difficulty, terrain=read_map(MAP_FILE) if MAP_FILE else None, profiler=profiler,
+                  live=not RECORDINGS_DIR)
+recorder = None
+
+# Fixed-timestep simulation of the current game (see simulation.py), started by reset_game.
+# While it runs the world is its own: the front end reads game state from simulation.frames only
+simulation = Simulation(world, THREADED_SIMULATION, profiler)
+
+# Create camera following the player over boards larger than the window
+camera = Camera(WINDOW_SIZE, (world.grid.width, world.grid.height), CELL_SIZE)
+camera.follow(world.user_agent.x, world.user_agent.y)
+
+# Create board renderer; its background is built with the first game frame
+board_renderer = BoardRenderer(screen, None, DIRTY_RECT_RENDERING, camera=camera)
+background_key = None
+
+profiler.watch('text cache hit rate', lambda: text_cache.stats()['hit_rate'])
+profiler.watch('text cache entries', lambda: len(text_cache))
+profiler.watch('pool surfaces allocated', lambda: surface_pool.allocations)
+profiler.watch('sprites baked', lambda: len(board_renderer.sprites))
+profiler.watch('terrain chunks', lambda: simulation.frames[1].terrain.chunk_count)
 
-# Create user agent
-user_agent = Agent(10, 7, None, PURPLE, grid)
-user_score = 0
+# Decode the agent images while the welcome screen waits for the player's name
+resources.preload(AGENT_IMAGES)
+
+# Frames render at RENDER_FPS while the simulation ticks at agent_speed
+frame_time = 0.0
 
 # Floating scores list
 floating_scores = []
 
 while running:
-    for event in pygame.event.get():
+    frame_start = time.perf_counter()
+    with profiler.scope('events'):
+        events = pygame.event.get()
+    for event in events:
+        frame = simulation.frames[1]  # Re-read per event: reset_game starts a new simulation
         if event.type == pygame.QUIT:
             running = False
+        elif event.type == pygame.VIDEORESIZE:
+            surface_pool.invalidate()
+            board_renderer.invalidate()
         elif event.type == pygame.KEYDOWN:
             if event.key == pygame.K_ESCAPE:
                 running = False
+            elif event.key == pygame.K_F3:
+                show_profiler_hud = not show_profiler_hud
             elif event.key == pygame.K_SPACE:
-                if game_over or game_won:
+                if frame.finished:
                     reset_game()
                 elif showing_high_scores:
                     showing_high_scores = False
             elif event.key == pygame.K_RETURN:
                 if showing_welcome and player_name.strip():
                     showing_welcome = False
-                    showing_difficulty = True
-                elif game_over or game_won:
-                    save_high_score(player_name, user_score)
+                    if SERVER_ADDRESS:
+                        # The server picks the difficulty
+                        current_difficulty = world.difficulty
+                        reset_game()
+                    else:
+                        showing_difficulty = True
+                elif frame.finished:
+                    high_scores.record(player_name, frame.score, current_difficulty)
                     showing_high_scores = True
-            elif showing_welcome or (game_over and not showing_high_scores):
+            elif showing_welcome or (frame.game_over and not showing_high_scores):
                 if event.key == pygame.K_BACKSPACE:
                     player_name = player_name[:-1]
                 elif len(player_name) < 10:
                     if event.unicode.isalnum():
                         player_name += event.unicode
-            elif not game_over and not showing_high_scores:
-                if event.key == pygame.K_UP:
-                    if grid.is_valid_position(user_agent.x, user_agent.y - 1):
-                        user_agent.y -= 1
-                elif event.key == pygame.K_DOWN:
-                    if grid.is_valid_position(user_agent.x, user_agent.y + 1):
-                        user_agent.y += 1
-                elif event.key == pygame.K_LEFT:
-                    if grid.is_valid_position(user_agent.x - 1, user_agent.y):
-                        user_agent.x -= 1
-                elif event.key == pygame.K_RIGHT:
-                    if grid.is_valid_position(user_agent.x + 1, user_agent.y):
-                        user_agent.x += 1
+            elif not frame.game_over and not showing_high_scores:
+                if event.key in KEY_ACTIONS:
+                    simulation.move_player(KEY_ACTIONS[event.key])
         elif event.type == pygame.MOUSEBUTTONDOWN:
             mouse_pos = pygame.mouse.get_pos()
             if showing_difficulty:
@@ -693,126 +534,75 @@ while running:
                     current_difficulty = Difficulty.HARD
                     showing_difficulty = False
                     reset_game()
-            elif game_won:
+            elif frame.game_won:
                 play_again_rect, exit_game_rect = show_modern_victory_screen()
                 if play_again_rect.collidepoint(mouse_pos):
                     reset_game()
                 elif exit_game_rect.collidepoint(mouse_pos):
                     running = False
-            elif game_over:
+            elif frame.game_over:
                 try_again_rect, exit_game_rect = show_modern_game_over()
                 if try_again_rect.collidepoint(mouse_pos):
                     reset_game()
                 elif exit_game_rect.collidepoint(mouse_pos):
                     running = False
     
-    screen.fill(MODERN_COLORS['background'])
+    frame = simulation.frames[1]
+    if recorder and frame.finished:
+        save_recording()
+
+    # The game board keeps its own background; every other screen is repainted in full
+    board_frame = not (showing_welcome or showing_difficulty or showing_high_scores or frame.finished)
+    if not board_frame:
+        screen.fill(MODERN_COLORS['background'])
+        board_renderer.invalidate()
     
     if showing_welcome:
-        show_welcome_screen()
+        with profiler.scope('draw.screen'):
+            show_welcome_screen()
     elif showing_difficulty:
-        show_difficulty_selection()
+        with profiler.scope('draw.screen'):
+            show_difficulty_selection()
     elif showing_high_scores:
-        show_high_scores()
-    else:
-        draw_modern_grid()
-        
-        if not game_over and not game_won:
-            for i, agent in enumerate(agents):
-                if i != 1:  # Skip the green target agent
-                    other_agents = [a for a in agents if a != agent] + [user_agent]
-                    agent.move(other_agents)
-                
-                # Draw agent with image if available
-                if agent.image:  # Check if agent has an image
-                    for j in range(3):
-                        glow = pygame.transform.scale(agent.image,
-                            (CELL_SIZE + j*2, CELL_SIZE + j*2))
-                        glow.set_alpha(100 - j*30)
-                        screen.blit(glow,
-                            (agent.x * CELL_SIZE - j,
-                             agent.y * CELL_SIZE - j))
-                    screen.blit(agent.image,
-                        (agent.x * CELL_SIZE,
-                         agent.y * CELL_SIZE))
-                else:
-                    for j in range(3):
-                        glow_size = CELL_SIZE // 3 + j
-                        pygame.draw.circle(screen, agent.color,
-                                         (agent.x * CELL_SIZE + CELL_SIZE // 2,
-                                          agent.y * CELL_SIZE + CELL_SIZE // 2),
-                                         glow_size, 1)
-                    
-                    pygame.draw.circle(screen, agent.color,
-                                     (agent.x * CELL_SIZE + CELL_SIZE // 2,
-                                      agent.y * CELL_SIZE + CELL_SIZE // 2),
-                                     CELL_SIZE // 3)
-                
-                if agent.x == user_agent.x and agent.y == user_agent.y:
-                    if i == 1:
-                        score_increase = 10 * DIFFICULTY_SETTINGS[current_difficulty]['score_multiplier']
-                        user_score += score_increase
-                        floating_scores.append(FloatingScore(
-                            agent.x * CELL_SIZE,
-                            agent.y * CELL_SIZE,
-                            score_increase
-                        ))
-                        respawn_target()
-                        
-                        # Check for win condition
-                        if user_score >= DIFFICULTY_SETTINGS[current_difficulty]['target_score']:
-                            game_won = True
-                    elif agent.strategy == Strategy.DEFENSIVE:
-                        user_score -= 5
-                        floating_scores.append(FloatingScore(
-                            agent.x * CELL_SIZE,
-                            agent.y * CELL_SIZE,
-                            -5
-                        ))
-                    else:
-                        game_over = True
-            
-            if user_image:
-                for j in range(3):
-                    glow = pygame.transform.scale(user_image,
-                        (CELL_SIZE + j*2, CELL_SIZE + j*2))
-                    glow.set_alpha(100 - j*30)
-                    screen.blit(glow,
-                        (user_agent.x * CELL_SIZE - j,
-                         user_agent.y * CELL_SIZE - j))
-                screen.blit(user_image,
-                    (user_agent.x * CELL_SIZE,
-                     user_agent.y * CELL_SIZE))
-            else:
-                for j in range(3):
-                    pygame.draw.circle(screen, user_agent.color,
-                                     (user_agent.x * CELL_SIZE + CELL_SIZE // 2,
-                                      user_agent.y * CELL_SIZE + CELL_SIZE // 2),
-                                     CELL_SIZE // 3 + j, 1)
-                pygame.draw.circle(screen, user_agent.color,
-                                 (user_agent.x * CELL_SIZE + CELL_SIZE // 2,
-                                  user_agent.y * CELL_SIZE + CELL_SIZE // 2),
-                                 CELL_SIZE // 3)
-            
-            floating_scores = [score for score in floating_scores if score.update()]
-            for score in floating_scores:
-                score.draw(screen)
-            
-            draw_modern_score_box()
-            
-            # Draw modern controls info
-            controls_text = text_cache.get_text('Controls: Arrow Keys', font, MODERN_COLORS['text'])
-            screen.blit(controls_text, (WINDOW_SIZE[0] - 300, GRID_SIZE[1] * CELL_SIZE + 10))
-            
-            target_text = text_cache.get_text('Target: Green Dot (+10 points)', font, MODERN_COLORS['success'])
-            screen.blit(target_text, (WINDOW_SIZE[0]//2 - 150, GRID_SIZE[1] * CELL_SIZE + 10))
-        elif game_won:
+        with profiler.scope('draw.screen'):
+            show_high_scores()
+    elif not frame.finished:
+        simulation.update(frame_time)
+        previous, current = simulation.frames
+        for event in simulation.drain_events():
+            if event.kind in ('score', 'penalty'):
+                floating_scores.append(FloatingScore(
+                    event.x * CELL_SIZE,
+                    event.y * CELL_SIZE,
+                    event.value
+                ))
+        steps = animation_steps()
+        floating_scores = [score for score in floating_scores if score.update(steps)]
+        draw_world(previous, current, simulation.alpha())
+    elif frame.game_won:
+        with profiler.scope('draw.screen'):
             show_modern_victory_screen()
-        else:
+    else:
+        with profiler.scope('draw.screen'):
             show_modern_game_over()
     
-    pygame.display.flip()
-    clock.tick(DIFFICULTY_SETTINGS[current_difficulty]['agent_speed'])
-
+    if show_profiler_hud:
+        hud_rect = profiler.draw_hud(screen, resources.font(HUD_FONT_SIZE), (WINDOW_SIZE[0] - 10, 10))
+        if board_frame:
+            board_renderer.mark_dirty(hud_rect)
+    
+    with profiler.scope('present'):
+        if board_frame:
+            board_renderer.present()
+        else:
+            pygame.display.flip()
+    profiler.add_time('frame', time.perf_counter() - frame_start)
+    profiler.count('frames')
+    frame_time = clock.tick(RENDER_FPS) / 1000.0
+
+simulation.stop()
+if PROFILE_OUTPUT:
+    profiler.dump(PROFILE_OUTPUT)
+high_scores.close()
 pygame.quit()
-sys.exit() 
\ No newline at end of file
+sys.exit()
@@ -0,0 +1,342 @@
+"""Render headless or replayed games offscreen to PNG frames, raw video and contact sheets.
+
+Example:
+    python offscreen.py --seed 7 --difficulty hard --frames frames/ --sheet sheet.png
+    python offscreen.py --replay recordings/game.rec --video game.mp4 --frames-per-tick 4
+    python offscreen.py --seed 7 --raw - | ffmpeg -f rawvideo -pix_fmt rgb24 -s 800x600 -i - out.mkv
+"""
+import argparse
+import os
+import queue
+import random
+import shutil
+import struct
+import subprocess
+import sys
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')  # Keep stdout clean for --raw -
+
+import numpy as np
+import pygame
+
+from board import (USER_IMAGE, set_agent_images, agent_sprites, build_board_background,
+                   draw_modern_score_box)
+from camera import Camera
+from renderer import BoardRenderer
+from replay import Recording, Replayer
+from resources import Resources
+from settings import WINDOW_SIZE, CELL_SIZE, DIFFICULTY_NAMES, DIFFICULTY_SETTINGS, ASSET_CACHE
+from surface_pool import SurfacePool
+from text_cache import TextCache
+from tournament import POLICIES
+from world import World
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# Frames handed to the encoders but not written yet, per worker; the render
+# loop only waits when the encoders are this far behind
+PENDING_PER_WORKER = 4
+
+# Width in pixels of a contact sheet thumbnail
+THUMBNAIL_WIDTH = 160
+
+def _png_chunk(tag, data):
+    return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data))
+
+def encode_png(pixels, width, height, level=6):
+    """PNG file of width x height packed RGB bytes.
+
+    Every row uses the 'Up' filter, which NumPy computes in one subtraction;
+    both it and zlib run without the GIL, so encoders scale across threads.
+    """
+    rows = np.frombuffer(pixels, dtype=np.uint8).reshape(height, width * 3)
+    filtered = np.empty((height, width * 3 + 1), dtype=np.uint8)
+    filtered[:, 0] = 2  # Up: each byte minus the one above it
+    filtered[0, 1:] = rows[0]
+    np.subtract(rows[1:], rows[:-1], out=filtered[1:, 1:])
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)  # 8-bit RGB
+    return b''.join([PNG_SIGNATURE, _png_chunk(b'IHDR', header),
+                     _png_chunk(b'IDAT', zlib.compress(filtered.tobytes(), level)),
+                     _png_chunk(b'IEND', b'')])
+
+def surface_pixels(surface):
+    """Packed RGB bytes of surface, a copy the encoders can own"""
+    return pygame.image.tobytes(surface, 'RGB')
+
+class OffscreenRenderer:
+    """Draws world with the window's board code onto an off-display surface.
+
+    Call tick_started() before every world.step() so agents can be drawn
+    between their previous and current cells, then draw(alpha) for each
+    frame. The returned surface is reused by the next draw.
+    """
+
+    def __init__(self, world, size=WINDOW_SIZE, resources=None):
+        self.size = size
+        self.surface = pygame.Surface(size)
+        self.resources = resources or Resources()
+        self.text_cache = TextCache()
+        self.surface_pool = SurfacePool()
+        self.board_renderer = BoardRenderer(self.surface, dirty_rects=False)
+        self.set_world(world)
+
+    def set_world(self, world):
+        """Start drawing world (a new game or a restored replay)"""
+        self.world = world
+        self.camera = self.board_renderer.camera = Camera(self.size, (world.grid.width, world.grid.height),
+                                                          CELL_SIZE)
+        self.background_key = None
+        set_agent_images(world, self.resources)
+        self.tick_started()
+
+    def tick_started(self):
+        self.previous_positions = [(agent.x, agent.y) for agent in self.world.agents]
+
+    def draw(self, alpha=1.0):
+        world = self.world
+        camera = self.camera
+        camera.follow(world.user_agent.x, world.user_agent.y)
+        key = (world.grid.terrain_version, camera.x, camera.y)
+        if self.background_key != key:
+            self.board_renderer.set_background(build_board_background(self.size, world.grid.grid, camera,
+                                                                      self.text_cache, self.resources))
+            self.background_key = key
+        self.board_renderer.begin_frame()
+        self.board_renderer.draw_agents(agent_sprites(world, self.previous_positions, alpha,
+                                                      self.resources.image(USER_IMAGE, (CELL_SIZE, CELL_SIZE))))
+        draw_modern_score_box(self.surface, world.score, world.target_score,
+                              self.text_cache, self.resources, self.surface_pool)
+        return self.surface
+
+class PNGWriter:
+    """Encodes frames to numbered PNG files on a thread pool"""
+
+    def __init__(self, directory, size, workers=None, level=6):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.size = size
+        self.level = level
+        workers = workers or os.cpu_count() or 1
+        self.executor = ThreadPoolExecutor(workers)
+        self.pending = threading.BoundedSemaphore(workers * PENDING_PER_WORKER)
+        self.errors = []
+        self.count = 0
+
+    def write(self, pixels):
+        self.pending.acquire()
+        path = os.path.join(self.directory, f"frame_{self.count:06d}.png")
+        self.count += 1
+        self.executor.submit(self._encode, path, pixels).add_done_callback(self._done)
+
+    def _encode(self, path, pixels):
+        data = encode_png(pixels, self.size[0], self.size[1], self.level)
+        with open(path, 'wb') as f:
+            f.write(data)
+
+    def _done(self, future):
+        if future.exception() is not None:
+            self.errors.append(future.exception())
+        self.pending.release()
+
+    def close(self):
+        self.executor.shutdown()
+        if self.errors:
+            raise self.errors[0]
+
+class RawWriter:
+    """Streams packed RGB frames to a binary file object from a writer thread"""
+
+    def __init__(self, stream, workers=None):
+        self.stream = stream
+        self.frames = queue.Queue((workers or os.cpu_count() or 1) * PENDING_PER_WORKER)
+        self.error = None
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def write(self, pixels):
+        if self.error is not None:
+            raise self.error
+        self.frames.put(pixels)
+
+    def _run(self):
+        while True:
+            pixels = self.frames.get()
+            if pixels is None:
+                break
+            if self.error is None:
+                try:
+                    self.stream.write(pixels)
+                except OSError as error:
+                    self.error = error  # Keep draining so write() never blocks forever
+
+    def close(self):
+        self.frames.put(None)
+        self.thread.join()
+        self.stream.flush()
+        if self.error is not None:
+            raise self.error
+
+class VideoWriter(RawWriter):
+    """Pipes raw frames into an ffmpeg process that encodes path"""
+
+    def __init__(self, path, size, fps, workers=None):
+        ffmpeg = shutil.which('ffmpeg')
+        if ffmpeg is None:
+            raise FileNotFoundError("ffmpeg was not found on PATH")
+        self.process = subprocess.Popen(
+            [ffmpeg, '-y', '-loglevel', 'error', '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+             '-s', f"{size[0]}x{size[1]}", '-r', str(fps), '-i', '-', '-pix_fmt', 'yuv420p', path],
+            stdin=subprocess.PIPE)
+        super().__init__(self.process.stdin, workers)
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self.process.stdin.close()
+            if self.process.wait() != 0:
+                raise RuntimeError(f"ffmpeg exited with status {self.process.returncode}")
+
+class ContactSheet:
+    """Thumbnails of every every-th frame, tiled columns wide into one image"""
+
+    def __init__(self, size, every=30, columns=6, thumbnail_width=THUMBNAIL_WIDTH):
+        self.every = every
+        self.columns = columns
+        self.thumbnail_size = (thumbnail_width, round(size[1] * thumbnail_width / size[0]))
+        self.thumbnails = []
+        self.frame = 0
+
+    def add(self, surface):
+        if self.frame % self.every == 0:
+            self.thumbnails.append(pygame.transform.smoothscale(surface, self.thumbnail_size))
+        self.frame += 1
+
+    def render(self, last=None):
+        """The sheet as a surface; last, if given, ends it unless it was just taken"""
+        thumbnails = list(self.thumbnails)
+        if last is not None and (self.frame - 1) % self.every != 0:
+            thumbnails.append(pygame.transform.smoothscale(last, self.thumbnail_size))
+        width, height = self.thumbnail_size
+        columns = min(self.columns, len(thumbnails)) or 1
+        rows = (len(thumbnails) + columns - 1) // columns or 1
+        sheet = pygame.Surface((columns * width, rows * height))
+        sheet.blits([(thumbnail, ((i % columns) * width, (i // columns) * height))
+                     for i, thumbnail in enumerate(thumbnails)])
+        return sheet
+
+    def save(self, path, last=None):
+        sheet = self.render(last)
+        with open(path, 'wb') as f:
+            f.write(encode_png(surface_pixels(sheet), sheet.get_width(), sheet.get_height(), 9))
+
+def live_game(world, policy, seed, max_ticks):
+    """Tick function stepping world with a tournament policy until it ends or reaches max_ticks"""
+    rng = random.Random(seed ^ 0x5EED)
+    def advance():
+        if world.finished or world.tick >= max_ticks:
+            return False
+        world.step(policy(world, rng))
+        return True
+    return advance
+
+def replayed_game(replayer, max_ticks):
+    """Tick function replaying one recorded tick at a time up to max_ticks"""
+    def advance():
+        tick = replayer.world.tick
+        return tick < max_ticks and replayer.run(tick + 1).tick > tick
+    return advance
+
+def render(renderer, advance, frames_per_tick, sinks, sheet=None):
+    """Draw the current state, then frames_per_tick frames after every tick advance() makes.
+
+    Every frame's pixels go to each sink and the frame to the contact sheet;
+    returns the number of frames.
+    """
+    count = 0
+    alphas = [frame / frames_per_tick for frame in range(1, frames_per_tick + 1)]
+    while True:
+        for alpha in alphas if count else [1.0]:
+            surface = renderer.draw(alpha)
+            if sinks:
+                pixels = surface_pixels(surface)
+                for sink in sinks:
+                    sink.write(pixels)
+            if sheet is not None:
+                sheet.add(surface)
+            count += 1
+        renderer.tick_started()
+        if not advance():
+            return count
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--replay', help='render this recording instead of a live game')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the live game')
+    parser.add_argument('--difficulty', choices=sorted(DIFFICULTY_NAMES), default='medium')
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='cautious', help='player of the live game')
+    parser.add_argument('--start', type=int, default=0, help='first tick (replays start from the nearest keyframe)')
+    parser.add_argument('--ticks', type=int, default=500, help='ticks to render at most')
+    parser.add_argument('--frames-per-tick', type=int, default=1, help='interpolated frames per tick')
+    parser.add_argument('--frames', metavar='DIR', help='write numbered PNG frames to DIR')
+    parser.add_argument('--video', metavar='PATH', help='encode a video with ffmpeg')
+    parser.add_argument('--raw', metavar='PATH', help="write raw RGB24 frames to PATH ('-' for stdout)")
+    parser.add_argument('--fps', type=float, default=None, help="video frame rate (default: real time)")
+    parser.add_argument('--sheet', metavar='PATH', help='write a contact sheet PNG')
+    parser.add_argument('--sheet-every', type=int, default=30, help='frames between contact sheet thumbnails')
+    parser.add_argument('--sheet-columns', type=int, default=6)
+    parser.add_argument('--workers', type=int, default=None, help='PNG encoder threads (default: all cores)')
+    parser.add_argument('--level', type=int, default=6, choices=range(10), metavar='0-9',
+                        help='PNG compression level')
+    args = parser.parse_args(argv)
+    if args.video and shutil.which('ffmpeg') is None:
+        parser.error("--video needs ffmpeg on PATH (or pipe --raw - into an encoder)")
+    out = sys.stderr if args.raw == '-' else sys.stdout
+
+    resources = Resources(ASSET_CACHE)
+    if args.replay:
+        recording = Recording.load(args.replay)
+        replayer = Replayer(recording, verify=False)
+        world = replayer.seek(args.start)
+        advance = replayed_game(replayer, world.tick + args.ticks)
+        difficulty = recording.header['difficulty']
+    else:
+        difficulty = DIFFICULTY_NAMES[args.difficulty]
+        world = World(difficulty, seed=args.seed)
+        advance = live_game(world, POLICIES[args.policy], args.seed, args.start + args.ticks)
+        while world.tick < args.start and advance():
+            pass
+    renderer = OffscreenRenderer(world, WINDOW_SIZE, resources)
+    fps = args.fps or DIFFICULTY_SETTINGS[difficulty]['agent_speed'] * args.frames_per_tick
+
+    sinks = []
+    if args.frames:
+        sinks.append(PNGWriter(args.frames, WINDOW_SIZE, args.workers, args.level))
+    if args.video:
+        sinks.append(VideoWriter(args.video, WINDOW_SIZE, fps, args.workers))
+    if args.raw:
+        sinks.append(RawWriter(sys.stdout.buffer if args.raw == '-' else open(args.raw, 'wb'), args.workers))
+    sheet = ContactSheet(WINDOW_SIZE, args.sheet_every, args.sheet_columns) if args.sheet else None
+
+    start = time.perf_counter()
+    frames = render(renderer, advance, args.frames_per_tick, sinks, sheet)
+    drawn = time.perf_counter() - start
+    for sink in sinks:
+        sink.close()
+    if sheet is not None:
+        sheet.save(args.sheet, renderer.surface)
+    elapsed = time.perf_counter() - start
+
+    print(f"tick {world.tick}  score {world.score}  won {world.game_won}  game over {world.game_over}", file=out)
+    print(f"{frames} frames of {WINDOW_SIZE[0]}x{WINDOW_SIZE[1]} in {elapsed:.2f}s "
+          f"({frames / elapsed:,.0f} frames/s; drawing alone {frames / drawn:,.0f} frames/s)", file=out)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
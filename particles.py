@@ -0,0 +1,139 @@
+"""Pooled particle system backed by preallocated NumPy arrays."""
+import math
+
+import numpy as np
+import pygame
+
+CIRCLE = 0
+SQUARE = 1
+TRIANGLE = 2
+SHAPES = (CIRCLE, SQUARE, TRIANGLE)
+
+# Rotations are drawn from pre-rendered stamps in this many angle steps
+ROTATION_STEPS = 32
+
+class ParticleSystem:
+    """Up to capacity particles stored field-by-field in NumPy arrays.
+
+    Free slots are kept on a stack so spawning and killing never allocate.
+    Every particle is drawn by blitting a cached stamp for its
+    (shape, colour, size, rotation step), all in one Surface.blits() call.
+    """
+
+    def __init__(self, capacity, palette, max_size, seed=None):
+        self.capacity = capacity
+        self.palette = [tuple(color) for color in palette]
+        self.max_size = max_size
+        self.rng = np.random.default_rng(seed)
+
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.vx = np.zeros(capacity)
+        self.vy = np.zeros(capacity)
+        self.rotation = np.zeros(capacity)
+        self.rotation_speed = np.zeros(capacity)
+        self.size = np.zeros(capacity, dtype=np.int32)
+        self.color = np.zeros(capacity, dtype=np.int32)
+        self.shape = np.zeros(capacity, dtype=np.int32)
+        self.alive = np.zeros(capacity, dtype=bool)
+
+        # Stack of free slot indices; the top free_count entries are available
+        self.free = np.arange(capacity - 1, -1, -1, dtype=np.intp)
+        self.free_count = capacity
+
+        self.stamps = np.empty(len(SHAPES) * len(self.palette) * (max_size + 1) * ROTATION_STEPS,
+                               dtype=object)
+        self.stamp_offsets = np.zeros(len(self.stamps), dtype=np.int32)
+        self.baked = np.zeros(len(self.stamps), dtype=bool)
+
+    def __len__(self):
+        return self.capacity - self.free_count
+
+    def spawn(self, count, x, y, vx=0.0, vy=0.0, size=1, color=0, shape=CIRCLE,
+              rotation=0.0, rotation_speed=0.0):
+        """Activate up to count particles; fields are scalars or length-count arrays.
+
+        Returns the slot indices that were used.
+        """
+        count = min(count, self.free_count)
+        slots = self.free[self.free_count - count:self.free_count].copy()
+        self.free_count -= count
+        for field, value in ((self.x, x), (self.y, y), (self.vx, vx), (self.vy, vy),
+                             (self.size, size), (self.color, color), (self.shape, shape),
+                             (self.rotation, rotation), (self.rotation_speed, rotation_speed)):
+            field[slots] = value[:count] if np.ndim(value) else value
+        self.size[slots] = np.clip(self.size[slots], 0, self.max_size)
+        self.alive[slots] = True
+        return slots
+
+    def kill(self, slots):
+        """Return particles to the pool"""
+        slots = slots[self.alive[slots]]
+        self.alive[slots] = False
+        self.free[self.free_count:self.free_count + len(slots)] = slots
+        self.free_count += len(slots)
+
+    def update(self, steps=1.0):
+        """Advance every live particle by steps times its velocity and spin"""
+        alive = self.alive
+        self.x[alive] += self.vx[alive] * steps
+        self.y[alive] += self.vy[alive] * steps
+        self.rotation[alive] += self.rotation_speed[alive] * steps
+
+    def bounce(self, width, height):
+        """Reverse the velocity of particles outside the (0, 0, width, height) box"""
+        outside_x = self.alive & ((self.x < 0) | (self.x > width))
+        outside_y = self.alive & ((self.y < 0) | (self.y > height))
+        self.vx[outside_x] *= -1
+        self.vy[outside_y] *= -1
+
+    def below(self, height):
+        """Slots of live particles that fell to or below height"""
+        return np.flatnonzero(self.alive & (self.y >= height))
+
+    def draw(self, surface):
+        slots = np.flatnonzero(self.alive)
+        if not len(slots):
+            return
+        steps = (np.floor(self.rotation[slots] / 360.0 * ROTATION_STEPS).astype(np.int64)
+                 % ROTATION_STEPS)
+        steps[self.shape[slots] == CIRCLE] = 0
+        ids = (((self.shape[slots] * len(self.palette) + self.color[slots])
+                * (self.max_size + 1) + self.size[slots]) * ROTATION_STEPS + steps)
+
+        for stamp_id in np.unique(ids[~self.baked[ids]]).tolist():
+            self._bake_stamp(stamp_id)
+
+        offsets = self.stamp_offsets[ids]
+        xs = (self.x[slots].astype(np.int64) - offsets).tolist()
+        ys = (self.y[slots].astype(np.int64) - offsets).tolist()
+        surface.blits(zip(self.stamps[ids].tolist(), zip(xs, ys)), doreturn=False)
+
+    def _bake_stamp(self, stamp_id):
+        """Render one (shape, colour, size, rotation step) stamp"""
+        rest, step = divmod(stamp_id, ROTATION_STEPS)
+        rest, size = divmod(rest, self.max_size + 1)
+        shape, color = divmod(rest, len(self.palette))
+        color = self.palette[color]
+
+        # Rotated corners reach size * sqrt(2) from the centre
+        half = size + 1 if shape == CIRCLE else int(math.ceil(size * math.sqrt(2))) + 1
+        stamp = pygame.Surface((2 * half + 1, 2 * half + 1), pygame.SRCALPHA)
+        if shape == CIRCLE:
+            pygame.draw.circle(stamp, color, (half, half), size)
+        else:
+            if shape == SQUARE:
+                corners = [(-size, -size), (size, -size), (size, size), (-size, size)]
+            else:
+                corners = [(0, -size), (-size, size), (size, size)]
+            angle = 2 * math.pi * step / ROTATION_STEPS
+            cos_a = math.cos(angle)
+            sin_a = math.sin(angle)
+            pygame.draw.polygon(stamp, color, [(half + dx * cos_a - dy * sin_a,
+                                                half + dx * sin_a + dy * cos_a)
+                                               for dx, dy in corners])
+        if pygame.display.get_surface() is not None:
+            stamp = stamp.convert_alpha()
+        self.stamps[stamp_id] = stamp
+        self.stamp_offsets[stamp_id] = half
+        self.baked[stamp_id] = True
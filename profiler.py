@@ -0,0 +1,158 @@
+"""Named timing scopes, counters and rolling percentiles, with an on-screen HUD and JSON dump."""
+import json
+import time
+
+import numpy as np
+import pygame
+
+# Samples kept per scope for the rolling percentiles
+PROFILE_WINDOW = 600
+
+# Percentiles reported for every scope
+PERCENTILES = (50, 95, 99)
+
+# Seconds between HUD text refreshes, so the overlay does not re-render every frame
+HUD_REFRESH = 0.5
+
+class _Scope:
+    """Context manager that records its elapsed time under one name"""
+
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.add_time(self.name, time.perf_counter() - self.start)
+        return False
+
+class _NullScope:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NULL_SCOPE = _NullScope()
+
+class Profiler:
+    """Rolling timings of named scopes plus counters and watched gauges.
+
+    Each scope keeps its last `window` samples in a ring buffer, so p50/p95/p99
+    follow recent frames. Gauges are callables polled only when a report or
+    the HUD is built. A disabled profiler hands out a shared no-op scope.
+    Threads may record at the same time as long as each uses its own names.
+    """
+
+    def __init__(self, enabled=True, window=PROFILE_WINDOW):
+        self.enabled = enabled
+        self.window = window
+        self.samples = {}
+        self.sample_counts = {}
+        self.totals = {}
+        self.scopes = {}
+        self.counters = {}
+        self.gauges = {}
+        self.started = time.perf_counter()
+        self.hud_surface = None
+        self.hud_updated = 0.0
+
+    def scope(self, name):
+        """Context manager timing the enclosed block under name"""
+        if not self.enabled:
+            return _NULL_SCOPE
+        scope = self.scopes.get(name)
+        if scope is None:
+            scope = self.scopes[name] = _Scope(self, name)
+        return scope
+
+    def add_time(self, name, seconds):
+        """Record one sample of name taking seconds"""
+        if not self.enabled:
+            return
+        samples = self.samples.get(name)
+        if samples is None:
+            # Registered last, so a report on another thread never sees a half-made scope
+            self.sample_counts[name] = 0
+            self.totals[name] = 0.0
+            samples = self.samples[name] = np.zeros(self.window)
+        count = self.sample_counts[name]
+        samples[count % self.window] = seconds
+        self.sample_counts[name] = count + 1
+        self.totals[name] += seconds
+
+    def count(self, name, amount=1):
+        """Add amount to a counter"""
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def watch(self, name, gauge):
+        """Report gauge() under name (e.g. cache sizes owned by other objects)"""
+        self.gauges[name] = gauge
+
+    def scope_stats(self, name):
+        """Calls, total time and rolling mean/percentiles of a scope, in milliseconds"""
+        count = self.sample_counts[name]
+        recent = self.samples[name][:min(count, self.window)] * 1000.0
+        stats = {'calls': count, 'total_ms': self.totals[name] * 1000.0, 'mean_ms': float(recent.mean())}
+        for percentile, value in zip(PERCENTILES, np.percentile(recent, PERCENTILES)):
+            stats[f'p{percentile}_ms'] = float(value)
+        return stats
+
+    def report(self):
+        """Everything collected so far as a JSON-serializable dict"""
+        return {
+            'elapsed_s': time.perf_counter() - self.started,
+            'window': self.window,
+            'scopes': {name: self.scope_stats(name) for name in list(self.samples)},
+            'counters': dict(self.counters),
+            'gauges': {name: gauge() for name, gauge in self.gauges.items()}
+        }
+
+    def dump(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+
+    def draw_hud(self, surface, font, topright, color=(255, 255, 255), background=(0, 0, 0, 180)):
+        """Blit the overlay and return its rect; the text is re-rendered every HUD_REFRESH"""
+        now = time.perf_counter()
+        if self.hud_surface is None or now - self.hud_updated >= HUD_REFRESH:
+            self.hud_surface = self._render_hud(font, color, background)
+            self.hud_updated = now
+        return surface.blit(self.hud_surface, self.hud_surface.get_rect(topright=topright))
+
+    def _render_hud(self, font, color, background):
+        rows = [('scope', 'p50', 'p95', 'p99 ms')]
+        for name in list(self.samples):
+            stats = self.scope_stats(name)
+            rows.append((name, *(f"{stats[f'p{p}_ms']:.2f}" for p in PERCENTILES)))
+        values = dict(self.counters)
+        values.update((name, gauge()) for name, gauge in self.gauges.items())
+        for name, value in values.items():
+            rows.append((name, '', '', f"{value:.3g}" if isinstance(value, float) else str(value)))
+
+        # Lay the cells out as a table: names left-aligned, numbers right-aligned
+        cells = [[font.render(cell, True, color) for cell in row] for row in rows]
+        columns = [max(row[i].get_width() for row in cells) for i in range(len(rows[0]))]
+        line_height = font.get_linesize()
+        padding = 4
+        gap = 10
+        hud = pygame.Surface((sum(columns) + gap * (len(columns) - 1) + 2 * padding,
+                              line_height * len(rows) + 2 * padding), pygame.SRCALPHA)
+        hud.fill(background)
+        for row_index, row in enumerate(cells):
+            y = padding + row_index * line_height
+            hud.blit(row[0], (padding, y))
+            right = padding + columns[0]
+            for cell, width in zip(row[1:], columns[1:]):
+                right += gap + width
+                hud.blit(cell, (right - cell.get_width(), y))
+        return hud
@@ -0,0 +1,73 @@
+"""Game board rendering over a cached background, with optional dirty-rect updates."""
+import pygame
+
+from settings import CELL_SIZE
+from sprites import SpriteCache, GLOW_PADDING
+
+class BoardRenderer:
+    """Draws the board onto surface and pushes it to the display.
+
+    The grid and static labels live in a pre-baked background surface. With
+    dirty_rects enabled only the areas drawn in this frame or the previous
+    one are restored and sent to pygame.display.update; otherwise the whole
+    background is blitted and the display flipped. With a Camera, agents are
+    drawn relative to it and those outside its view are skipped.
+    """
+
+    def __init__(self, surface, background=None, dirty_rects=True, sprites=None, camera=None):
+        self.surface = surface
+        self.camera = camera
+        self.sprites = sprites if sprites is not None else SpriteCache()
+        self.background = background
+        self.dirty_rects = dirty_rects
+        self.previous_rects = []
+        self.current_rects = []
+        self.full_redraw = True
+
+    def set_background(self, background):
+        self.background = background
+        self.invalidate()
+
+    def invalidate(self):
+        """Repaint and present the whole board on the next frame"""
+        self.full_redraw = True
+        self.previous_rects = []
+
+    def begin_frame(self):
+        """Restore the background under everything drawn in the previous frame"""
+        if self.full_redraw or not self.dirty_rects:
+            self.surface.blit(self.background, (0, 0))
+        else:
+            for rect in self.previous_rects:
+                self.surface.blit(self.background, rect, rect)
+        self.current_rects = []
+
+    def mark_dirty(self, rect):
+        """Record an area drawn this frame"""
+        if rect:
+            self.current_rects.append(pygame.Rect(rect))
+
+    def draw_agents(self, agents):
+        """Draw (x, y, color, image) agents at cell positions with a single batched blit"""
+        padding = GLOW_PADDING
+        camera = self.camera
+        blits = []
+        for x, y, color, image in agents:
+            if camera is None:
+                left, top = int(x * CELL_SIZE), int(y * CELL_SIZE)
+            elif camera.is_visible(x, y):
+                left, top = camera.to_screen(x, y)
+            else:
+                continue
+            sprite = self.sprites.get(image, CELL_SIZE, color)
+            blits.append((sprite, (left - padding, top - padding)))
+        self.current_rects.extend(self.surface.blits(blits))
+
+    def present(self):
+        """Push this frame to the display"""
+        if self.full_redraw or not self.dirty_rects:
+            pygame.display.flip()
+            self.full_redraw = False
+        else:
+            pygame.display.update(self.previous_rects + self.current_rects)
+        self.previous_rects = self.current_rects
@@ -0,0 +1,248 @@
+"""Record a game as its seed plus per-tick player inputs, and replay it headless with verification.
+
+A recording file holds, after a short JSON header, three zlib-compressed
+sections:
+
+* actions: one byte per player action (Action values 1-4) with 0 closing
+  each tick, so an idle tick costs a single byte before compression
+* hashes: World.state_hash() after every tick, as little-endian uint32
+* keyframes: World.snapshot() every keyframe_interval ticks, each stored
+  as its packed state and terrain edit lengths (uint32) followed by the
+  bytes; the terrain edits since reset are (x, y, old, new) records,
+  oldest first
+
+Example:
+    python replay.py recordings/game.rec --seek 500
+"""
+import argparse
+import json
+import struct
+import sys
+import time
+import zlib
+from array import array
+
+from grid import TerrainEdit
+from world import World, Action, Snapshot
+
+MAGIC = b'MAGREC'
+FORMAT_VERSION = 5
+
+# Ticks between keyframe snapshots; seeking simulates at most this many ticks
+KEYFRAME_INTERVAL = 100
+
+END_OF_TICK = 0
+
+# Lengths of a keyframe's packed state and terrain edits
+_KEYFRAME = struct.Struct('<II')
+
+# One terrain edit of a keyframe: x, y, old and new terrain
+_EDIT = struct.Struct('<iibb')
+
+class ReplayMismatch(Exception):
+    """The replayed game diverged from the recorded state hashes"""
+
+    def __init__(self, tick, expected, actual):
+        super().__init__(f"state hash mismatch after tick {tick}: "
+                         f"recorded {expected:08x}, replayed {actual:08x}")
+        self.tick = tick
+
+class Recorder:
+    """Collects the inputs, state hashes and keyframes of one game as it is played.
+
+    Attach it to a freshly created or reset World; the world then reports
+    every player action and finished tick to it.
+    """
+
+    def __init__(self, world, keyframe_interval=KEYFRAME_INTERVAL, metadata=None):
+        if world.tick != 0:
+            raise ValueError("recording must start at tick 0")
+        self.header = {
+            'seed': world.seed,
+            'difficulty': world.difficulty,
+            'size': [world.grid.width, world.grid.height],
+            'terrain': world.terrain if world.terrain is None else [
+                row if isinstance(row, str) else list(map(int, row)) for row in world.terrain],
+            'keyframe_interval': keyframe_interval,
+            'metadata': metadata or {}
+        }
+        self.actions = bytearray()
+        self.hashes = array('I')
+        self.keyframes = []
+        world.recorder = self
+
+    def record_action(self, action):
+        self.actions.append(int(action))
+
+    def end_tick(self, world):
+        self.actions.append(END_OF_TICK)
+        self.hashes.append(world.state_hash())
+        if world.tick % self.header['keyframe_interval'] == 0:
+            self.keyframes.append(world.snapshot())
+
+    def recording(self):
+        """The recording so far"""
+        return Recording(dict(self.header, ticks=len(self.hashes)), bytes(self.actions),
+                         array('I', self.hashes), list(self.keyframes))
+
+    def save(self, path):
+        self.recording().save(path)
+
+class Recording:
+    """A loaded recording: header, per-tick action groups, hashes and keyframes"""
+
+    def __init__(self, header, actions, hashes, keyframes):
+        self.header = header
+        self.actions = actions
+        self.hashes = hashes
+        self.keyframes = keyframes
+        self._ticks = None
+
+    @property
+    def ticks(self):
+        """Player actions applied before each tick, as a list of byte strings"""
+        if self._ticks is None:
+            groups = self.actions.split(bytes([END_OF_TICK]))
+            # The last group holds moves made after the final tick
+            self._ticks = groups[:len(self.hashes)]
+        return self._ticks
+
+    def save(self, path):
+        header = json.dumps(self.header).encode('utf-8')
+        hashes = array('I', self.hashes)
+        if sys.byteorder != 'little':
+            hashes.byteswap()
+        keyframes = []
+        for keyframe in self.keyframes:
+            edits = _pack_edits(keyframe.terrain)
+            keyframes.append(_KEYFRAME.pack(len(keyframe.data), len(edits)) + keyframe.data + edits)
+        keyframes = b''.join(keyframes)
+        sections = [header, zlib.compress(self.actions, 9), zlib.compress(hashes.tobytes(), 9),
+                    zlib.compress(keyframes, 9)]
+        with open(path, 'wb') as f:
+            f.write(MAGIC + bytes([FORMAT_VERSION]))
+            for section in sections:
+                f.write(struct.pack('<I', len(section)))
+                f.write(section)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a game recording")
+        if data[len(MAGIC)] != FORMAT_VERSION:
+            raise ValueError(f"{path} has unsupported recording version {data[len(MAGIC)]}")
+        offset = len(MAGIC) + 1
+        sections = []
+        for _ in range(4):
+            (length,) = struct.unpack_from('<I', data, offset)
+            offset += 4
+            sections.append(data[offset:offset + length])
+            offset += length
+        header = json.loads(sections[0])
+        hashes = array('I')
+        hashes.frombytes(zlib.decompress(sections[2]))
+        if sys.byteorder != 'little':
+            hashes.byteswap()
+        return cls(header, zlib.decompress(sections[1]), hashes,
+                   _unpack_keyframes(zlib.decompress(sections[3])))
+
+    def new_world(self):
+        """Fresh world at tick 0 with the recorded seed, difficulty, size and terrain"""
+        header = self.header
+        return World(header['difficulty'], seed=header['seed'], terrain=header['terrain'],
+                     size=header.get('size'))
+
+def _unpack_keyframes(data):
+    keyframes = []
+    offset = 0
+    while offset < len(data):
+        data_length, terrain_length = _KEYFRAME.unpack_from(data, offset)
+        offset += _KEYFRAME.size
+        state = data[offset:offset + data_length]
+        offset += data_length
+        terrain = None
+        for x, y, old, new in _EDIT.iter_unpack(data[offset:offset + terrain_length]):
+            terrain = TerrainEdit.after(terrain, x, y, old, new)
+        offset += terrain_length
+        keyframes.append(Snapshot(state, terrain))
+    return keyframes
+
+def _pack_edits(edits):
+    packed = []
+    while edits is not None:
+        packed.append(_EDIT.pack(edits.x, edits.y, edits.old, edits.new))
+        edits = edits.previous
+    return b''.join(reversed(packed))
+
+class Replayer:
+    """Re-runs a Recording headless, checking every tick against its hash"""
+
+    def __init__(self, recording, verify=True):
+        self.recording = recording
+        self.verify = verify
+        self.world = recording.new_world()
+
+    def seek(self, tick):
+        """Jump to the state after tick, starting from the nearest earlier keyframe"""
+        tick = max(0, min(tick, len(self.recording.hashes)))
+        if not self.world.tick <= tick:
+            self.world = self.recording.new_world()
+        for keyframe in reversed(self.recording.keyframes):
+            if self.world.tick < keyframe.tick <= tick:
+                self.world.restore(keyframe)
+                break
+        self.run(tick)
+        return self.world
+
+    def run(self, until=None):
+        """Simulate recorded ticks up to tick until (default: the end)"""
+        world = self.world
+        ticks = self.recording.ticks
+        hashes = self.recording.hashes
+        until = len(ticks) if until is None else min(until, len(ticks))
+        while world.tick < until:
+            index = world.tick
+            for action in ticks[index]:
+                world.move_player(Action(action))
+            world.step()
+            if world.tick != index + 1:
+                raise ReplayMismatch(index + 1, hashes[index], world.state_hash())
+            if self.verify:
+                actual = world.state_hash()
+                if actual != hashes[index]:
+                    raise ReplayMismatch(index + 1, hashes[index], actual)
+        return world
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('recording')
+    parser.add_argument('--seek', type=int, help='stop at this tick, starting from the nearest keyframe')
+    parser.add_argument('--no-verify', action='store_true', help='skip the per-tick hash check')
+    args = parser.parse_args(argv)
+
+    recording = Recording.load(args.recording)
+    replayer = Replayer(recording, verify=not args.no_verify)
+    start = time.perf_counter()
+    try:
+        world = replayer.seek(args.seek) if args.seek is not None else replayer.run()
+    except ReplayMismatch as error:
+        print(f"MISMATCH: {error}", file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - start
+
+    print(f"seed {recording.header['seed']}  difficulty {recording.header['difficulty']}  "
+          f"{len(recording.hashes)} ticks recorded")
+    for key, value in recording.header['metadata'].items():
+        print(f"{key}: {value}")
+    print(f"tick {world.tick}  score {world.score}  won {world.game_won}  "
+          f"game over {world.game_over}" + (f" ({world.cause_of_death})" if world.cause_of_death else ''))
+    print(f"replayed in {elapsed * 1000:.1f} ms"
+          + (f" ({world.tick / elapsed:,.0f} ticks/s)" if elapsed > 0 and world.tick else ''))
+    if replayer.verify:
+        print("verified: every replayed tick matches the recorded state hash")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""Fonts and images created on first use, with scaled images cached on disk between runs."""
+import json
+import os
+import struct
+import threading
+
+import pygame
+
+CACHE_MAGIC = b'MAGASSET'
+CACHE_VERSION = 1
+
+# Length prefix of the cache file's JSON index
+_INDEX_LENGTH = struct.Struct('<I')
+
+class Resources:
+    """Lazily created fonts and scaled images.
+
+    font(size) builds pygame's default font at that size on first request and
+    initializes pygame.font only then. image(path, size) returns the image
+    decoded and scaled to size, or None if it cannot be loaded. Scaled pixels
+    are stored in cache_path keyed by the source's path, size and modification
+    time, so later runs skip the decode. preload() decodes on a background
+    thread; conversion to the display format stays on the main thread, at
+    first use.
+    """
+
+    def __init__(self, cache_path=None):
+        self.cache_path = cache_path
+        self.fonts = {}
+        self.images = {}
+        self.pixels = {}  # (path, size) -> (cache key, RGB bytes), filled by _decode
+        self.disk_cache = None
+        self.thread = None
+
+    def font(self, size):
+        """pygame's default font at size"""
+        font = self.fonts.get(size)
+        if font is None:
+            if not pygame.font.get_init():
+                pygame.font.init()
+            font = self.fonts[size] = pygame.font.Font(None, size)
+        return font
+
+    def image(self, path, size):
+        """path scaled to size as a display-format surface, or None if it cannot be loaded"""
+        key = (path, tuple(size))
+        if key in self.images:
+            return self.images[key]
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        decoded = self.pixels.get(key)
+        if decoded is None:
+            self._decode([key])
+            decoded = self.pixels.get(key)
+        image = None
+        if decoded is not None:
+            image = pygame.image.frombytes(decoded[1], key[1], 'RGB')
+            if pygame.display.get_surface() is not None:
+                image = image.convert()
+        else:
+            print(f"{path} could not be loaded, using default circle")
+        self.images[key] = image
+        return image
+
+    def preload(self, images):
+        """Decode (path, size) images on a background thread"""
+        keys = [(path, tuple(size)) for path, size in images]
+        self.thread = threading.Thread(target=self._decode, args=(keys,), daemon=True)
+        self.thread.start()
+
+    def _decode(self, keys):
+        """Fill self.pixels for keys from the disk cache or by decoding the files"""
+        if self.disk_cache is None:
+            self.disk_cache = _read_cache(self.cache_path)
+        missed = False
+        for key in keys:
+            path, size = key
+            try:
+                stat = os.stat(path)
+                cache_key = f"{os.path.abspath(path)}|{size[0]}x{size[1]}|{stat.st_size}|{stat.st_mtime_ns}"
+                pixels = self.disk_cache.get(cache_key)
+                if pixels is None:
+                    image = pygame.transform.scale(pygame.image.load(path), size)
+                    pixels = pygame.image.tobytes(image, 'RGB')
+                    self.disk_cache[cache_key] = pixels
+                    missed = True
+            except (OSError, pygame.error):
+                continue
+            self.pixels[key] = (cache_key, pixels)
+        if missed:
+            self._write_cache()
+
+    def _write_cache(self):
+        """Rewrite the cache file with the entries used in this run"""
+        if not self.cache_path:
+            return
+        used = dict(self.pixels.values())
+        index = {}
+        offset = 0
+        for cache_key, pixels in used.items():
+            index[cache_key] = [offset, len(pixels)]
+            offset += len(pixels)
+        header = json.dumps(index).encode('utf-8')
+        temporary = self.cache_path + '.tmp'
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.cache_path)), exist_ok=True)
+            with open(temporary, 'wb') as f:
+                f.write(CACHE_MAGIC + bytes([CACHE_VERSION]))
+                f.write(_INDEX_LENGTH.pack(len(header)))
+                f.write(header)
+                for pixels in used.values():
+                    f.write(pixels)
+            os.replace(temporary, self.cache_path)
+        except OSError:
+            pass  # A read-only install simply decodes every run
+
+def _read_cache(path):
+    """cache key -> RGB bytes from a cache file; empty if it is missing or unreadable"""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except (OSError, TypeError):
+        return {}
+    start = len(CACHE_MAGIC) + 1
+    if data[:len(CACHE_MAGIC)] != CACHE_MAGIC or data[len(CACHE_MAGIC):start] != bytes([CACHE_VERSION]):
+        return {}
+    try:
+        (length,) = _INDEX_LENGTH.unpack_from(data, start)
+        start += _INDEX_LENGTH.size
+        index = json.loads(data[start:start + length])
+    except (struct.error, ValueError):
+        return {}
+    blobs = start + length
+    return {key: data[blobs + offset:blobs + offset + size] for key, (offset, size) in index.items()}
@@ -0,0 +1,218 @@
+"""Anytime lookahead for chasing agents: iterative-deepening alpha-beta over a transposition table."""
+import time
+
+from flowfield import UNREACHABLE
+
+# Value of catching the player; the remaining search depth is added, so earlier catches score higher
+CAPTURE = 1_000_000
+
+# Stand-in distance for a player the chaser cannot reach
+FAR = 100_000
+
+# Entries kept in the transposition table before it is emptied
+TABLE_SIZE = 1 << 16
+
+# Kinds of transposition table values
+EXACT, LOWER, UPPER = range(3)
+
+# Moves tried from every cell, in this order: stay, then the four neighbours
+MOVES = ((0, 0), (0, -1), (0, 1), (-1, 0), (1, 0))
+
+_MASK = (1 << 64) - 1
+_SEED = 0x6A09E667F3BCC909
+
+def zobrist_key(index):
+    """Random-looking 64-bit key of a (role, cell) index: SplitMix64, so it never depends on lookup order"""
+    z = (index * 0x9E3779B97F4A7C15 + _SEED) & _MASK
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK
+    return z ^ (z >> 31)
+
+class _OutOfBudget(Exception):
+    pass
+
+class Planner:
+    """Picks a chaser's next cell by a two-player search against the player it hunts.
+
+    The chaser maximizes and the player minimizes the negated walking
+    distance between them, with a catch worth CAPTURE; other agents are left
+    out of the lookahead and only rule out the chaser's first step. Positions
+    are hashed by Zobrist keys (one per role and cell, XOR-ed together, plus a
+    side-to-move key) into a transposition table that keeps value bounds and
+    best moves between calls, so the next tick's shallow iterations are
+    mostly table hits and its deeper ones are searched best move first.
+
+    On terrain, leaves are scored with a single flow field per call, the one
+    rooted at the player's cell (shared with the greedy chasers of the same
+    tick): the chaser's walking distance to where the player stood, plus how
+    much farther (in Manhattan steps) the player has moved from the chaser's
+    starting cell. Building a field per leaf would cost a full Dijkstra fill
+    for every cell the player might reach. Values kept from earlier calls
+    were scored from their own starting cells; they estimate the same
+    distances and are reused as they are.
+
+    best_move() deepens one ply at a time up to max_depth and stops once
+    max_nodes nodes are used up, returning the move of the deepest finished
+    iteration. The optional deadline is a hard cap: past it the search stops
+    at once, even within the first iteration (the chaser then stays put).
+    Table values are only used at exactly the depth they were searched to
+    and root moves are compared in a fixed order. The answer depends on the
+    table's contents, which follow from the earlier calls: a planner fed the
+    same calls gives the same moves, and clear() starts it afresh (see
+    World's SEARCH_EPOCH).
+    """
+
+    def __init__(self, grid, max_depth=8, max_nodes=2000):
+        self.grid = grid
+        self.max_depth = max_depth
+        self.max_nodes = max_nodes
+        self.table = {}
+        self.keys = {}
+        self.moves = {}  # (x, y) -> its (move index, x, y) moves, for the current terrain
+        self.side_key = zobrist_key(-1)
+        self.terrain_version = grid.terrain_version
+        self.nodes = 0
+        self.depth = 0  # Deepest finished iteration of the last call
+        self.deadline = None
+        self.field = None  # Flow field to the player's cell for this call, None on an open board
+        self.origin = (0, 0)  # Chaser's cell for this call
+        self.origin_distance = 0  # Manhattan distance from the chaser's cell to the player's
+
+    def copy(self, grid):
+        """Planner for grid starting with this one's table (see World.fork)"""
+        planner = Planner(grid, self.max_depth, self.max_nodes)
+        planner.table = dict(self.table)
+        planner.terrain_version = self.terrain_version
+        return planner
+
+    def clear(self):
+        self.table.clear()
+
+    def _moves(self, x, y):
+        moves = self.moves.get((x, y))
+        if moves is None:
+            valid = self.grid.is_valid_position
+            moves = self.moves[(x, y)] = tuple((i, x + dx, y + dy) for i, (dx, dy) in enumerate(MOVES)
+                                              if (dx, dy) == (0, 0) or valid(x + dx, y + dy))
+        return moves
+
+    def _key(self, index):
+        key = self.keys.get(index)
+        if key is None:
+            key = self.keys[index] = zobrist_key(index)
+        return key
+
+    def best_move(self, chaser_x, chaser_y, player_x, player_y, first_steps, deadline=None):
+        """Cell the chaser at (chaser_x, chaser_y) should step to, chosen from first_steps.
+
+        first_steps are the neighbouring cells it may enter this tick; staying
+        put is always allowed. deadline is a time.perf_counter() value.
+        """
+        if self.grid.terrain_version != self.terrain_version:
+            self.table.clear()  # Distances changed: every stored value is stale
+            self.moves.clear()
+            self.terrain_version = self.grid.terrain_version
+        if len(self.table) > TABLE_SIZE:
+            self.table.clear()
+        self.nodes = 0
+        self.depth = 0
+        self.deadline = deadline
+        allowed = set(first_steps)
+        roots = [(chaser_x + dx, chaser_y + dy) for dx, dy in MOVES
+                 if (dx, dy) == (0, 0) or (chaser_x + dx, chaser_y + dy) in allowed]
+        best = roots[0]
+        if deadline is not None and time.perf_counter() > deadline:
+            return best
+        self.field = self.grid.flow_field(player_x, player_y) if self.grid.terrain_cells else None
+        self.origin = (chaser_x, chaser_y)
+        self.origin_distance = abs(chaser_x - player_x) + abs(chaser_y - player_y)
+        for depth in range(1, self.max_depth + 1):
+            try:
+                value, cell = self._search_root(roots, player_x, player_y, depth)
+            except _OutOfBudget:
+                break
+            best = cell
+            self.depth = depth
+            if value >= CAPTURE:
+                break  # A forced catch: searching deeper cannot do better
+        return best
+
+    def _search_root(self, roots, player_x, player_y, depth):
+        best_value = None
+        best_cell = roots[0]
+        for cell in roots:
+            value = self._search(cell[0], cell[1], player_x, player_y, False, depth - 1,
+                                 -CAPTURE * 2 if best_value is None else best_value, CAPTURE * 2)
+            # Strictly better only: of equal moves the first in MOVES order wins
+            if best_value is None or value > best_value:
+                best_value = value
+                best_cell = cell
+        return best_value, best_cell
+
+    def _search(self, cx, cy, px, py, chaser_turn, depth, alpha, beta):
+        """Alpha-beta value of the position for the chaser, depth plies deep"""
+        self.nodes += 1
+        if self.depth and self.nodes > self.max_nodes:
+            raise _OutOfBudget()  # Only after the first iteration, so there is always a move
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise _OutOfBudget()
+        if cx == px and cy == py:
+            return CAPTURE + depth
+        if depth == 0:
+            return -self._distance(cx, cy, px, py)
+
+        width, height = self.grid.width, self.grid.height
+        cells = width * height
+        key = self._key(cy * width + cx) ^ self._key(cells + py * width + px)
+        if chaser_turn:
+            key ^= self.side_key
+        entry = self.table.get(key)
+        first = 0
+        if entry is not None:
+            entry_depth, kind, value, first = entry
+            if entry_depth == depth:
+                if kind == EXACT:
+                    return value
+                if kind == LOWER and value >= beta:
+                    return value
+                if kind == UPPER and value <= alpha:
+                    return value
+
+        moves = self._moves(cx, cy) if chaser_turn else self._moves(px, py)
+        if first:
+            # The table's best move first, the rest in MOVES order
+            moves = [move for move in moves if move[0] == first] + [move for move in moves if move[0] != first]
+        original_alpha, original_beta = alpha, beta
+        best_value = None
+        best_index = first
+        for i, new_x, new_y in moves:
+            if chaser_turn:
+                value = self._search(new_x, new_y, px, py, False, depth - 1, alpha, beta)
+                if best_value is None or value > best_value:
+                    best_value, best_index = value, i
+                alpha = max(alpha, value)
+            else:
+                value = self._search(cx, cy, new_x, new_y, True, depth - 1, alpha, beta)
+                if best_value is None or value < best_value:
+                    best_value, best_index = value, i
+                beta = min(beta, value)
+            if alpha >= beta:
+                break
+
+        if best_value <= original_alpha:
+            kind = UPPER
+        elif best_value >= original_beta:
+            kind = LOWER
+        else:
+            kind = EXACT
+        self.table[key] = (depth, kind, best_value, best_index)
+        return best_value
+
+    def _distance(self, cx, cy, px, py):
+        if self.field is None:
+            return abs(cx - px) + abs(cy - py)  # Exact on an open board
+        distance = self.field.distance_at(cx, cy)
+        if distance == UNREACHABLE:
+            return FAR
+        ox, oy = self.origin
+        return distance + abs(px - ox) + abs(py - oy) - self.origin_distance
@@ -0,0 +1,344 @@
+"""Authoritative game server: one shared World ticked on an asyncio loop, played by TCP clients.
+
+Messages are JSON objects, one per line, in both directions. Clients send
+
+* {"type": "join"}: enter the game (again, after being caught)
+* {"type": "action", "action": 1-4}: an arrow key press, applied on the next tick
+
+and the server sends
+
+* welcome: difficulty, tick rate and board size, once after connecting
+* keyframe: the full state (tick, round, score, game state and every agent
+  as [id, x, y, strategy or null for players, color]), plus the terrain
+  rows when the client does not have them yet; sent on connect, at every
+  new round, every keyframe_interval ticks and to clients that fell behind
+* delta: per tick, only the agents that moved ([id, x, y]), were added or
+  removed, plus the score, game state and events when they changed
+* joined: the id of the client's player after a join or a new round
+
+Example:
+    python server.py --port 8765 --difficulty hard
+    GAME_SERVER=localhost:8765 python main.py
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+from collections import deque
+
+import numpy as np
+
+from grid import TERRAIN_SYMBOLS
+from settings import DIFFICULTY_NAMES, PURPLE, GOLD, WHITE, MODERN_COLORS
+from world import World, Action, read_map
+
+DEFAULT_PORT = 8765
+
+# Ticks between keyframes broadcast to every client
+KEYFRAME_INTERVAL = 100
+
+# Seconds between the end of a round and the start of the next one
+ROUND_PAUSE = 3.0
+
+# Arrow key presses a client may queue between two ticks; older ones are dropped
+MAX_QUEUED_ACTIONS = 4
+
+# Longest protocol line; keyframes of large maps carry the whole terrain
+MAX_LINE = 1 << 24
+
+# Bytes a client may have waiting in its socket buffer before it stops receiving
+# deltas; once drained it catches up with a keyframe
+MAX_WRITE_BUFFER = 1 << 18
+
+# Colors given to joining players in turn
+PLAYER_COLORS = [PURPLE, GOLD, WHITE, MODERN_COLORS['accent'], MODERN_COLORS['danger']]
+
+# Terrain code -> map symbol, for sending terrain rows
+_SYMBOLS = np.zeros(max(TERRAIN_SYMBOLS.values()) + 1, dtype=np.uint8)
+for _symbol, _terrain in TERRAIN_SYMBOLS.items():
+    _SYMBOLS[_terrain] = ord(_symbol)
+
+def encode(message):
+    """One protocol line"""
+    return (json.dumps(message, separators=(',', ':')) + '\n').encode('utf-8')
+
+def terrain_rows(grid):
+    """The grid's terrain as map rows (see Grid.load_terrain), or None for an open board"""
+    if not grid.terrain_cells:
+        return None
+    text = _SYMBOLS[grid.grid.to_array()].tobytes().decode('ascii')
+    return [text[y * grid.width:(y + 1) * grid.width] for y in range(grid.height)]
+
+def game_state(world):
+    """'playing', 'won' or 'over'"""
+    return 'won' if world.game_won else 'over' if world.game_over else 'playing'
+
+class Client:
+    """One connection: its writer, player (None until it joins or after it is caught) and queued actions"""
+    __slots__ = ('writer', 'player', 'joined', 'actions', 'stale', 'terrain_key')
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.player = None
+        self.joined = False  # Whether to bring the client back at the next round
+        self.actions = deque(maxlen=MAX_QUEUED_ACTIONS)
+        self.stale = False  # Deltas were skipped; it needs a keyframe
+        self.terrain_key = None  # (round, terrain version) of the terrain it has
+
+class GameServer:
+    """Runs world at tick_rate ticks per second and keeps every client's copy in sync.
+
+    Agents are identified by their insertion id in the grid's spatial index,
+    which is stable within a round. Each tick's delta is encoded once and
+    written to every client, so the per-client cost is one socket write.
+    A shared world (World(solo=False)) is expected.
+    """
+
+    def __init__(self, world, tick_rate=None, keyframe_interval=KEYFRAME_INTERVAL, seed=None):
+        self.world = world
+        self.tick_rate = tick_rate or world.settings['agent_speed']
+        self.keyframe_interval = keyframe_interval
+        self.rng = random.Random(seed)
+        self.clients = {}  # Client -> None, in connection order
+        self.round = 0
+        self.round_end = None  # Loop time at which the current round finished
+        self.positions = {}  # Agent id -> (x, y) as last broadcast
+        self.score = world.score
+        self.state = game_state(world)
+        self.player_count = 0
+        self.terrain = (None, None)  # (round, terrain version) and the rows sent for it
+        self.server = None
+        self.handlers = set()  # Connection tasks, awaited on close
+        self._snapshot()
+
+    async def start(self, host='127.0.0.1', port=DEFAULT_PORT):
+        """Listen for clients and start ticking"""
+        self.server = await asyncio.start_server(self._handle, host, port, backlog=1024)
+        self.ticker = asyncio.create_task(self._run())
+        return self.server
+
+    async def close(self):
+        self.ticker.cancel()
+        self.server.close()
+        for client in list(self.clients):
+            client.writer.close()
+        # Closed connections end their handlers; wait for them rather than leave them to be cancelled
+        await asyncio.gather(*self.handlers, return_exceptions=True)
+        await self.server.wait_closed()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        interval = 1.0 / self.tick_rate
+        next_tick = loop.time() + interval
+        while True:
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+            self.tick()
+            next_tick += interval
+            if next_tick < loop.time() - interval:
+                next_tick = loop.time()  # Too far behind: drop the backlog instead of spiralling
+
+    def tick(self):
+        """Apply the queued actions, step the world and broadcast the delta"""
+        world = self.world
+        if world.finished:
+            loop = asyncio.get_running_loop()
+            if self.round_end is None:
+                self.round_end = loop.time()
+            elif loop.time() - self.round_end >= ROUND_PAUSE:
+                self.new_round()
+            return
+
+        for client in self.clients:
+            while client.actions and client.player is not None:
+                world.move_player(client.actions.popleft(), client.player)
+        events = world.step()
+        for client in self.clients:
+            if client.player is not None and client.player not in world.grid.agent_index:
+                client.player = None  # Caught: it may join again
+                client.actions.clear()
+
+        message = {'type': 'delta', 'tick': world.tick}
+        message.update(self._changes())
+        if world.score != self.score:
+            message['score'] = self.score = world.score
+        if game_state(world) != self.state:
+            message['state'] = self.state = game_state(world)
+        if events:
+            message['events'] = [list(event) for event in events]
+        self._broadcast(encode(message))
+        if world.tick % self.keyframe_interval == 0:
+            self._broadcast_keyframe()
+
+    def new_round(self):
+        """Reset the world with a fresh seed and bring back every client that joined"""
+        world = self.world
+        world.seed = self.rng.getrandbits(64)
+        world.reset()
+        self.round += 1
+        self.round_end = None
+        for client in self.clients:
+            client.player = None
+            client.actions.clear()
+            if client.joined:
+                self._add_player(client)
+        self._snapshot()
+        self._broadcast_keyframe()
+        for client in self.clients:
+            if client.player is not None:
+                self._send(client, encode(self._joined(client)))
+
+    def _add_player(self, client):
+        client.player = self.world.add_player(PLAYER_COLORS[self.player_count % len(PLAYER_COLORS)])
+        client.joined = True
+        self.player_count += 1
+
+    def _joined(self, client):
+        return {'type': 'joined', 'player': self.world.grid.agent_index.ids[client.player]}
+
+    def _snapshot(self):
+        """Treat the current state as broadcast (after a keyframe)"""
+        ids = self.world.grid.agent_index.ids
+        self.positions = {ids[agent]: (agent.x, agent.y) for agent in self._agents()}
+        self.score = self.world.score
+        self.state = game_state(self.world)
+
+    def _agents(self):
+        return self.world.agents + self.world.players
+
+    def _describe(self, agent):
+        kind = agent.strategy.value if agent.strategy is not None else None
+        return [self.world.grid.agent_index.ids[agent], agent.x, agent.y, kind, list(agent.color)]
+
+    def _changes(self):
+        """Agents added, moved and removed since the last broadcast"""
+        ids = self.world.grid.agent_index.ids
+        old_positions = self.positions
+        positions = {}
+        added, moved = [], []
+        for agent in self._agents():
+            agent_id = ids[agent]
+            position = positions[agent_id] = (agent.x, agent.y)
+            old = old_positions.get(agent_id)
+            if old is None:
+                added.append(self._describe(agent))
+            elif old != position:
+                moved.append([agent_id, agent.x, agent.y])
+        self.positions = positions
+        changes = {'moved': moved}
+        if added:
+            changes['added'] = added
+        if len(positions) - len(added) != len(old_positions):
+            changes['removed'] = [agent_id for agent_id in old_positions if agent_id not in positions]
+        return changes
+
+    def _keyframe(self, with_terrain):
+        world = self.world
+        message = {'type': 'keyframe', 'tick': world.tick, 'round': self.round, 'score': world.score,
+                   'target_score': world.target_score, 'state': game_state(world),
+                   'agents': [self._describe(agent) for agent in self._agents()]}
+        if with_terrain:
+            key = (self.round, world.grid.terrain_version)
+            if self.terrain[0] != key:
+                self.terrain = (key, terrain_rows(world.grid))
+            message['terrain'] = self.terrain[1]
+        return encode(message)
+
+    def _broadcast_keyframe(self):
+        for client in self.clients:
+            client.stale = True
+        self._broadcast(b'')
+
+    def _broadcast(self, data):
+        """Write data to every client, or a keyframe to those that need one and have drained"""
+        keyframes = {}
+        terrain_key = (self.round, self.world.grid.terrain_version)
+        for client in self.clients:
+            transport = client.writer.transport
+            if transport.is_closing():
+                continue
+            if transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+                client.stale = True
+                continue
+            if client.stale:
+                with_terrain = client.terrain_key != terrain_key
+                keyframe = keyframes.get(with_terrain)
+                if keyframe is None:
+                    keyframe = keyframes[with_terrain] = self._keyframe(with_terrain)
+                client.writer.write(keyframe)
+                client.stale = False
+                client.terrain_key = terrain_key
+            elif data:
+                client.writer.write(data)
+
+    def _send(self, client, data):
+        if not client.writer.transport.is_closing():
+            client.writer.write(data)
+
+    def receive(self, client, message):
+        """Handle one message from client"""
+        kind = message.get('type')
+        if kind == 'join':
+            if client.player is None and not self.world.finished:
+                self._add_player(client)
+                self._send(client, encode(self._joined(client)))
+        elif kind == 'action':
+            if client.player is not None:  # Presses made while out of the game are dropped
+                client.actions.append(Action(message['action']))
+
+    async def _handle(self, reader, writer):
+        client = Client(writer)
+        world = self.world
+        task = asyncio.current_task()
+        self.handlers.add(task)
+        writer.write(encode({'type': 'welcome', 'difficulty': world.difficulty, 'tick_rate': self.tick_rate,
+                             'width': world.grid.width, 'height': world.grid.height}))
+        client.stale = True
+        self.clients[client] = None
+        self._broadcast(b'')  # Only the new client is stale
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    self.receive(client, json.loads(line))
+                except (ValueError, KeyError, TypeError, AttributeError):
+                    pass  # Ignore malformed messages
+        except (ConnectionError, ValueError):
+            pass  # Reset or an over-long line
+        except asyncio.CancelledError:
+            pass  # Shut down with the loop: end quietly instead of erroring in asyncio's done callback
+        finally:
+            self.handlers.discard(task)
+            self.clients.pop(client, None)
+            if client.player is not None and client.player in world.players:
+                world.remove_player(client.player)
+            writer.close()
+
+async def serve(args):
+    terrain = read_map(args.map) if args.map else None
+    world = World(DIFFICULTY_NAMES[args.difficulty], seed=args.seed, terrain=terrain, solo=False, live=True)
+    game_server = GameServer(world, tick_rate=args.tick_rate, seed=args.seed)
+    server = await game_server.start(args.host, args.port)
+    print(f"serving {args.difficulty} on {args.host}:{args.port} at {game_server.tick_rate} ticks/s")
+    async with server:
+        await server.serve_forever()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--difficulty', choices=sorted(DIFFICULTY_NAMES), default='easy')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--map', help='map text file (see Grid.load_terrain)')
+    parser.add_argument('--tick-rate', type=float, default=None, help="default: the difficulty's agent_speed")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""Game-wide constants shared by the simulation core and the pygame front end."""
+import os
+
+# Screen settings
+WINDOW_SIZE = (800, 600)
+GRID_SIZE = (20, 15)
+CELL_SIZE = 40
+
+# Frame pacing: rendering runs at RENDER_FPS, the simulation at 'agent_speed' ticks per second
+RENDER_FPS = 60
+MAX_FRAME_TIME = 0.25  # Longer frames (e.g. window drag) are clamped to this many seconds
+MAX_TICKS_PER_FRAME = 5  # Simulation ticks allowed to catch up in a single frame
+
+# Redraw and push only the changed parts of the game board each frame
+DIRTY_RECT_RENDERING = True
+
+# Step the simulation on its own thread, handing finished ticks to the renderer;
+# GAME_THREADED_SIMULATION=0 steps it between frames on the main thread instead
+THREADED_SIMULATION = os.environ.get('GAME_THREADED_SIMULATION', '1') != '0'
+
+# Frame profiler: scopes are always timed, F3 toggles the overlay and
+# GAME_PROFILE_OUTPUT names a JSON file the results are written to at exit
+PROFILING = True
+PROFILE_OUTPUT = os.environ.get('GAME_PROFILE_OUTPUT')
+
+# File caching the decoded and scaled agent images between runs, in the user's
+# cache directory rather than the working directory; empty disables it
+CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+                         'multi-agent-game')
+ASSET_CACHE = os.environ.get('GAME_ASSET_CACHE', os.path.join(CACHE_DIR, 'assets'))
+
+# Map file of '.', '#' and '~' rows the game is played on (see world.read_map);
+# maps larger than the window scroll with the player
+MAP_FILE = os.environ.get('GAME_MAP')
+
+# When set, every game is recorded to a replay file in this directory (see replay.py)
+RECORDINGS_DIR = os.environ.get('GAME_RECORD_DIR')
+
+# host:port of a game server (see server.py) to play on instead of a local game
+SERVER_ADDRESS = os.environ.get('GAME_SERVER')
+
+# Colors
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+RED = (255, 0, 0)
+GREEN = (0, 255, 0)
+BLUE = (0, 0, 255)
+YELLOW = (255, 255, 0)
+PURPLE = (128, 0, 128)
+GOLD = (255, 215, 0)
+CYAN = (0, 255, 255)
+
+# Modern color palette
+MODERN_COLORS = {
+    'background': (18, 18, 18),
+    'grid': (40, 40, 40),
+    'accent': (0, 150, 255),
+    'success': (46, 204, 113),
+    'warning': (241, 196, 15),
+    'danger': (231, 76, 60),
+    'text': (236, 240, 241),
+    'button': (52, 152, 219),
+    'button_hover': (41, 128, 185),
+    'wall': (70, 70, 80),
+    'slow': (30, 50, 70)
+}
+
+# Difficulty settings
+class Difficulty:
+    EASY = 0
+    MEDIUM = 1
+    HARD = 2
+
+# Command-line names of the difficulties
+DIFFICULTY_NAMES = {
+    'easy': Difficulty.EASY,
+    'medium': Difficulty.MEDIUM,
+    'hard': Difficulty.HARD
+}
+
+DIFFICULTY_LABELS = {
+    Difficulty.EASY: 'Easy',
+    Difficulty.MEDIUM: 'Medium',
+    Difficulty.HARD: 'Hard'
+}
+
+DIFFICULTY_SETTINGS = {
+    Difficulty.EASY: {
+        'agent_speed': 3,
+        'agent_count': 3,
+        'score_multiplier': 1,
+        'target_score': 50,
+        'agent_behaviors': {
+            'random': {'move_chance': 0.3, 'detection_range': 3},
+            'defensive': {'move_chance': 0.4, 'detection_range': 4},
+            'patrol': {'move_chance': 0.5, 'detection_range': 3}
+        }
+    },
+    Difficulty.MEDIUM: {
+        'agent_speed': 4,
+        'agent_count': 4,
+        'score_multiplier': 2,
+        'target_score': 100,
+        'agent_behaviors': {
+            'random': {'move_chance': 0.5, 'detection_range': 4},
+            'defensive': {'move_chance': 0.6, 'detection_range': 5},
+            'patrol': {'move_chance': 0.7, 'detection_range': 4}
+        }
+    },
+    Difficulty.HARD: {
+        'agent_speed': 5,
+        'agent_count': 5,
+        'score_multiplier': 3,
+        'target_score': 150,
+        'agent_behaviors': {
+            'random': {'move_chance': 0.7, 'detection_range': 5},
+            'defensive': {'move_chance': 0.8, 'detection_range': 6},
+            'patrol': {'move_chance': 0.9, 'detection_range': 5},
+            # Replaces the last random agent; search_nodes bounds its lookahead per tick,
+            # and in live play (see World) so does search_ms, in milliseconds
+            'search': {'detection_range': 8, 'search_depth': 10, 'search_nodes': 1000, 'search_ms': 4}
+        }
+    }
+}
@@ -0,0 +1,160 @@
+"""Fixed-timestep simulation, on a worker thread or inline, publishing immutable frames to the renderer."""
+import threading
+import time
+from collections import deque, namedtuple
+
+from settings import MAX_FRAME_TIME, MAX_TICKS_PER_FRAME
+
+# What the renderer needs of one agent; Frame.agents quack like World.agents for board.agent_sprites
+AgentView = namedtuple('AgentView', ['x', 'y', 'color', 'image'])
+
+class Frame(namedtuple('Frame', ['tick', 'time', 'agents', 'players', 'user_agent', 'score',
+                                 'target_score', 'game_won', 'game_over', 'terrain_version', 'terrain',
+                                 'connected'])):
+    """Immutable copy of the drawable world state after a tick (or a player move).
+
+    time is the perf_counter() at which the tick was stepped, so the renderer
+    can tell how far the simulation is towards the next one. terrain is a
+    copy of the grid's terrain layer, taken once per terrain_version: copies
+    share storage until the world next writes its own (see ChunkedArray.copy).
+    connected is False once a client.RemoteWorld lost its server.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def capture(cls, world, tick_time, previous=None):
+        """Frame of world now, reusing previous's terrain copy while the terrain is unchanged"""
+        grid = world.grid
+        if previous is not None and previous.terrain_version == grid.terrain_version:
+            terrain = previous.terrain
+        else:
+            terrain = grid.grid.copy()
+        agents = tuple(AgentView(agent.x, agent.y, agent.color, agent.image) for agent in world.agents)
+        user = world.user_agent
+        players = tuple(AgentView(player.x, player.y, player.color, None)
+                        for player in world.players if player is not user)
+        return cls(world.tick, tick_time, agents, players, AgentView(user.x, user.y, user.color, None),
+                   world.score, world.target_score, world.game_won, world.game_over,
+                   grid.terrain_version, terrain, getattr(world, 'connected', True))
+
+    @property
+    def finished(self):
+        return self.game_over or self.game_won
+
+class Simulation:
+    """Steps world at its agent_speed and publishes each result as a Frame.
+
+    Only the simulation touches the world once started. The renderer reads
+    frames, a (previous tick, current) pair that is replaced as a whole by a
+    single reference assignment, so neither side ever waits on a lock: a slow
+    tick leaves the renderer interpolating the last pair and a slow frame
+    does not delay the next tick. Player actions and tick Events cross over
+    in deques, whose append and popleft are atomic.
+
+    With threaded=True the ticks run on a daemon thread between start() and
+    stop(); otherwise update(frame_time) steps them on the caller's thread
+    with the same fixed timestep.
+    """
+
+    def __init__(self, world, threaded=True, profiler=None):
+        self.world = world
+        self.threaded = threaded
+        self.profiler = profiler
+        self.tick_duration = 1.0 / world.settings['agent_speed']
+        self.actions = deque()
+        self.events = deque()
+        self.accumulator = 0.0
+        self.wake = threading.Event()
+        self.stopping = False
+        self.thread = None
+        frame = Frame.capture(world, time.perf_counter())
+        self.frames = (frame, frame)
+
+    def start(self):
+        if self.threaded:
+            self.thread = threading.Thread(target=self._run, name='simulation', daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self):
+        """End the simulation thread; the world is the caller's again"""
+        self.stopping = True
+        self.wake.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def move_player(self, action):
+        """Queue an arrow key press; it is applied before the next tick"""
+        if self.threaded:
+            self.actions.append(action)
+            self.wake.set()
+        elif self.world.move_player(action):
+            self._publish_move()
+
+    def drain_events(self):
+        """Events of the ticks stepped since the last call"""
+        events = []
+        while self.events:
+            events.append(self.events.popleft())
+        return events
+
+    def alpha(self, now=None):
+        """How far, in [0, 1], the simulation is from the current frame towards the next tick"""
+        if self.threaded:
+            elapsed = (now if now is not None else time.perf_counter()) - self.frames[1].time
+        else:
+            elapsed = self.accumulator
+        return min(max(elapsed / self.tick_duration, 0.0), 1.0)
+
+    def update(self, frame_time):
+        """Inline mode: step the ticks that frame_time seconds of play are due"""
+        if self.threaded or self.world.finished:
+            return
+        self.accumulator += min(frame_time, MAX_FRAME_TIME)
+        steps = 0
+        while self.accumulator >= self.tick_duration and not self.world.finished:
+            if steps == MAX_TICKS_PER_FRAME:
+                # Too far behind: drop the backlog instead of spiralling
+                self.accumulator = 0.0
+                break
+            self._step(time.perf_counter())
+            self.accumulator -= self.tick_duration
+            steps += 1
+
+    def _run(self):
+        world = self.world
+        next_tick = time.perf_counter() + self.tick_duration
+        while not self.stopping:
+            timeout = None if world.finished else max(0.0, next_tick - time.perf_counter())
+            self.wake.wait(timeout)
+            self.wake.clear()
+            if self.stopping:
+                break
+            moved = False
+            while self.actions:
+                moved |= bool(world.move_player(self.actions.popleft()))
+            now = time.perf_counter()
+            if now >= next_tick and not world.finished:
+                self._step(now)
+                next_tick += self.tick_duration
+                if next_tick < now - MAX_FRAME_TIME:
+                    next_tick = now  # Too far behind: drop the backlog instead of spiralling
+            elif moved:
+                self._publish_move()
+
+    def _step(self, now):
+        profiler = self.profiler
+        if profiler is None:
+            events = self.world.step()
+        else:
+            with profiler.scope('tick'):
+                events = self.world.step()
+            profiler.count('ticks')
+        self.events.extend(events)
+        self.frames = (self.frames[1], Frame.capture(self.world, now, self.frames[1]))
+
+    def _publish_move(self):
+        # Players move on key press: redraw them at once, keeping the tick's timing
+        previous, current = self.frames
+        self.frames = (previous, Frame.capture(self.world, current.time, current))
@@ -0,0 +1,168 @@
+"""Bucketed spatial hash for nearest-agent, radius and per-cell occupancy queries on the grid."""
+
+class SpatialHash:
+    """Agents bucketed into square blocks of cells, updated as they move.
+
+    Distances are Manhattan. Ties are broken by insertion order, which
+    matches min() over a list of agents built in the same order. A side
+    table of occupied cells answers "who is on (x, y)" in O(1).
+    """
+
+    def __init__(self, bucket_size=4):
+        self.bucket_size = bucket_size
+        self.buckets = {}
+        self.cells = {}  # (x, y) -> agents on that cell, in insertion order
+        self.ids = {}
+        self.next_id = 0
+        self.bounds = None  # Bucket-space bounding box of every insert so far
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, agent):
+        return agent in self.ids
+
+    def _key(self, x, y):
+        return (x // self.bucket_size, y // self.bucket_size)
+
+    def insert(self, agent):
+        """Start tracking agent at its current position"""
+        self.ids[agent] = self.next_id
+        self.next_id += 1
+        key = self._key(agent.x, agent.y)
+        self.buckets.setdefault(key, {})[agent] = None
+        self._grow_bounds(key)
+        self._enter_cell(agent, agent.x, agent.y)
+
+    def remove(self, agent):
+        """Stop tracking agent"""
+        if self.ids.pop(agent, None) is None:
+            return
+        self._leave_cell(agent, agent.x, agent.y)
+        key = self._key(agent.x, agent.y)
+        bucket = self.buckets[key]
+        del bucket[agent]
+        if not bucket:
+            del self.buckets[key]
+
+    def moved(self, agent, old_x, old_y):
+        """Update the bucket of agent after it moved from (old_x, old_y)"""
+        if agent not in self.ids or (old_x, old_y) == (agent.x, agent.y):
+            return
+        self._leave_cell(agent, old_x, old_y)
+        self._enter_cell(agent, agent.x, agent.y)
+        old_key = self._key(old_x, old_y)
+        new_key = self._key(agent.x, agent.y)
+        if old_key == new_key:
+            return
+        bucket = self.buckets[old_key]
+        del bucket[agent]
+        if not bucket:
+            del self.buckets[old_key]
+        self.buckets.setdefault(new_key, {})[agent] = None
+        self._grow_bounds(new_key)
+
+    def _enter_cell(self, agent, x, y):
+        occupants = self.cells.get((x, y))
+        if occupants is None:
+            self.cells[(x, y)] = [agent]
+        else:
+            occupants.append(agent)
+            occupants.sort(key=self.ids.__getitem__)
+
+    def _leave_cell(self, agent, x, y):
+        occupants = self.cells[(x, y)]
+        occupants.remove(agent)
+        if not occupants:
+            del self.cells[(x, y)]
+
+    def at(self, x, y):
+        """Agents on cell (x, y) in insertion order; empty if it is free (do not modify)"""
+        return self.cells.get((x, y), ())
+
+    def clear(self):
+        self.buckets.clear()
+        self.cells.clear()
+        self.ids.clear()
+        self.next_id = 0
+        self.bounds = None
+
+    def _grow_bounds(self, key):
+        if self.bounds is None:
+            self.bounds = [key[0], key[1], key[0], key[1]]
+            return
+        bounds = self.bounds
+        bounds[0] = min(bounds[0], key[0])
+        bounds[1] = min(bounds[1], key[1])
+        bounds[2] = max(bounds[2], key[0])
+        bounds[3] = max(bounds[3], key[1])
+
+    def _ring(self, bx, by, r):
+        """Bucket keys at Chebyshev distance r from (bx, by)"""
+        if r == 0:
+            yield (bx, by)
+            return
+        for i in range(-r, r + 1):
+            yield (bx + i, by - r)
+            yield (bx + i, by + r)
+        for j in range(-r + 1, r):
+            yield (bx - r, by + j)
+            yield (bx + r, by + j)
+
+    def nearest(self, x, y, exclude=None, max_distance=None):
+        """Closest tracked agent to (x, y) other than exclude, or None.
+
+        Agents farther than max_distance are ignored when it is given.
+        """
+        if not self.buckets:
+            return None
+        bx, by = self._key(x, y)
+        bounds = self.bounds
+        max_ring = max(bx - bounds[0], by - bounds[1], bounds[2] - bx, bounds[3] - by)
+        limit = max_distance
+        best = None
+        best_key = None
+        ring = 0
+        while ring <= max_ring:
+            if ring:
+                # Cells of a bucket in ring r are at least (r - 1) * size + 1 away
+                lower_bound = (ring - 1) * self.bucket_size + 1
+                if best_key is not None and lower_bound > best_key[0]:
+                    break
+                if limit is not None and lower_bound > limit:
+                    break
+            for key in self._ring(bx, by, ring):
+                bucket = self.buckets.get(key)
+                if not bucket:
+                    continue
+                for agent in bucket:
+                    if agent is exclude:
+                        continue
+                    distance = abs(agent.x - x) + abs(agent.y - y)
+                    if limit is not None and distance > limit:
+                        continue
+                    candidate = (distance, self.ids[agent])
+                    if best_key is None or candidate < best_key:
+                        best_key = candidate
+                        best = agent
+            ring += 1
+        return best
+
+    def within(self, x, y, radius, exclude=None):
+        """Tracked agents within Manhattan radius of (x, y), nearest first"""
+        found = []
+        min_bx, min_by = self._key(x - radius, y - radius)
+        max_bx, max_by = self._key(x + radius, y + radius)
+        for bx in range(min_bx, max_bx + 1):
+            for by in range(min_by, max_by + 1):
+                bucket = self.buckets.get((bx, by))
+                if not bucket:
+                    continue
+                for agent in bucket:
+                    if agent is exclude:
+                        continue
+                    distance = abs(agent.x - x) + abs(agent.y - y)
+                    if distance <= radius:
+                        found.append((distance, self.ids[agent], agent))
+        found.sort(key=lambda item: item[:2])
+        return [agent for _, _, agent in found]
@@ -0,0 +1,77 @@
+"""Pre-baked agent sprites: the glow halo and the sprite merged into one display-format surface."""
+import numpy as np
+import pygame
+
+# (extra size in pixels, alpha) of each glow layer, drawn smallest first
+GLOW_LAYERS = [(j * 2, 100 - j * 30) for j in range(3)]
+
+# Pixels the baked sprite extends past the cell on each side
+GLOW_PADDING = GLOW_LAYERS[-1][0] // 2
+
+def _composite_over(rgb, alpha, layer_rgb, layer_alpha):
+    """Porter-Duff 'over' of a straight-alpha layer onto straight-alpha float arrays"""
+    out_alpha = layer_alpha + alpha * (1 - layer_alpha)
+    safe = np.where(out_alpha > 0, out_alpha, 1)[..., None]
+    rgb[...] = (layer_rgb * layer_alpha[..., None]
+                + rgb * (alpha * (1 - layer_alpha))[..., None]) / safe
+    alpha[...] = out_alpha
+
+def bake_image_sprite(image, cell_size):
+    """Glow stack of scaled, translucent copies of image plus the opaque image on top"""
+    size = cell_size + 2 * GLOW_PADDING
+    rgb = np.zeros((size, size, 3))
+    alpha = np.zeros((size, size))
+    layers = [(pygame.transform.scale(image, (cell_size + grow, cell_size + grow)), opacity / 255.0)
+              for grow, opacity in GLOW_LAYERS]
+    layers.append((pygame.transform.scale(image, (cell_size, cell_size)), 1.0))
+    for layer, opacity in layers:
+        offset = (size - layer.get_width()) // 2
+        region = (slice(offset, offset + layer.get_width()), slice(offset, offset + layer.get_height()))
+        layer_alpha = np.full(layer.get_size(), opacity)
+        if layer.get_flags() & pygame.SRCALPHA:
+            layer_alpha *= pygame.surfarray.array_alpha(layer) / 255.0
+        _composite_over(rgb[region], alpha[region],
+                        pygame.surfarray.array3d(layer).astype(float), layer_alpha)
+
+    sprite = pygame.Surface((size, size), pygame.SRCALPHA)
+    pygame.surfarray.blit_array(sprite, np.round(rgb).astype(np.uint8))
+    pixels = pygame.surfarray.pixels_alpha(sprite)
+    pixels[...] = np.round(alpha * 255).astype(np.uint8)
+    del pixels  # Unlock the surface
+    return sprite
+
+def bake_circle_sprite(color, cell_size):
+    """Filled circle in color with three one-pixel glow rings"""
+    size = cell_size + 2 * GLOW_PADDING
+    sprite = pygame.Surface((size, size), pygame.SRCALPHA)
+    center = (size // 2, size // 2)
+    for j in range(3):
+        pygame.draw.circle(sprite, color, center, cell_size // 3 + j, 1)
+    pygame.draw.circle(sprite, color, center, cell_size // 3)
+    return sprite
+
+class SpriteCache:
+    """Baked agent sprites keyed by (image, cell size, tint)"""
+
+    def __init__(self):
+        self.sprites = {}
+
+    def __len__(self):
+        return len(self.sprites)
+
+    def get(self, image, cell_size, tint):
+        """Sprite for an agent drawn with image, or a tint-coloured circle when image is None"""
+        key = (image, cell_size, None if image else tuple(tint))
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            if image:
+                sprite = bake_image_sprite(image, cell_size)
+            else:
+                sprite = bake_circle_sprite(tint, cell_size)
+            if pygame.display.get_surface() is not None:
+                sprite = sprite.convert_alpha()
+            self.sprites[key] = sprite
+        return sprite
+
+    def clear(self):
+        self.sprites.clear()
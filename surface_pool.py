@@ -0,0 +1,40 @@
+"""Reusable pre-filled surfaces for fixed-size translucent layers."""
+import pygame
+
+class SurfacePool:
+    """Filled surfaces keyed by (size, colour, alpha), created once and reused every frame.
+
+    Callers must only blit the surfaces they get, never draw on them.
+    Call invalidate() when the window is resized.
+    """
+
+    def __init__(self):
+        self.surfaces = {}
+        self.allocations = 0
+
+    def __len__(self):
+        return len(self.surfaces)
+
+    def get(self, size, color, alpha=None):
+        """Surface of size filled with color.
+
+        An RGBA color gives a per-pixel alpha surface; otherwise alpha, if
+        set, is applied as the surface-wide alpha.
+        """
+        key = (tuple(size), tuple(color), alpha)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            per_pixel = len(color) == 4
+            surface = pygame.Surface(size, pygame.SRCALPHA if per_pixel else 0)
+            if pygame.display.get_surface() is not None:
+                surface = surface.convert_alpha() if per_pixel else surface.convert()
+            surface.fill(color)
+            if alpha is not None:
+                surface.set_alpha(alpha)
+            self.surfaces[key] = surface
+            self.allocations += 1
+        return surface
+
+    def invalidate(self):
+        """Drop every pooled surface (e.g. after a window resize)"""
+        self.surfaces.clear()
@@ -0,0 +1,298 @@
+"""Struct-of-arrays agent engine that moves thousands of agents per tick with NumPy."""
+import numpy as np
+
+from agent import Agent, Strategy
+
+# Integer codes stored in Swarm.strategies
+STRATEGY_CODES = {
+    Strategy.RANDOM: 0,
+    Strategy.GREEDY: 1,
+    Strategy.DEFENSIVE: 2,
+    Strategy.PATROL: 3,
+    Strategy.SEARCH: 4
+}
+CODE_STRATEGIES = {code: strategy for strategy, code in STRATEGY_CODES.items()}
+
+# Strategies Swarm.random draws from by default
+RANDOM_STRATEGIES = (Strategy.RANDOM, Strategy.GREEDY, Strategy.DEFENSIVE, Strategy.PATROL)
+
+# Same order as Grid.get_neighbors
+NEIGHBOR_OFFSETS = np.array([(0, 1), (1, 0), (0, -1), (-1, 0)], dtype=np.int32)
+
+# Upper bound on the size of one block of the pairwise distance matrix
+DISTANCE_BLOCK_ELEMENTS = 1 << 22
+
+# Rough per-call overhead of a NumPy operation, in element operations
+NUMPY_CALL_COST = 1000
+
+# Larger than any (distance, index) key used by the distance transform
+KEY_INF = np.iinfo(np.int64).max // 4
+
+class Swarm:
+    """Positions, strategy codes, patrol indices and scores of many agents as arrays.
+
+    Applies the movement rules of the Agent strategies to every agent at once.
+    Unlike a loop over Agent.move, all agents see the positions from the start
+    of the tick (synchronous update). Move conflicts are resolved like
+    Agent.can_enter: no agent enters a cell another agent keeps, and of
+    several agents entering the same cell the lowest index wins.
+
+    GREEDY agents take the axis-greedy step towards their nearest agent and
+    stay put when it is blocked; unlike Agent._move_greedy they do not path
+    around walls, since every chaser may have a different target and one
+    flow field each would cost more than the whole vectorized tick. On a
+    board without terrain both take the same step. SEARCH agents have no
+    lookahead here and chase like GREEDY ones.
+    """
+
+    def __init__(self, grid, positions, strategies, seed=None):
+        self.grid = grid
+        self.positions = np.array(positions, dtype=np.int32).reshape(-1, 2)
+        self.strategies = np.array([STRATEGY_CODES[s] for s in strategies], dtype=np.int8)
+        if len(self.strategies) != len(self.positions):
+            raise ValueError("positions and strategies must have the same length")
+        self.patrol_indices = np.zeros(len(self.positions), dtype=np.int32)
+        self.scores = np.zeros(len(self.positions), dtype=np.int32)
+        # Ticks each agent still has to wait on a slow tile (see Agent.move_delay)
+        self.move_delays = np.zeros(len(self.positions), dtype=np.int32)
+        self.patrol_points = np.array([
+            (0, 0),
+            (grid.width - 1, 0),
+            (grid.width - 1, grid.height - 1),
+            (0, grid.height - 1)
+        ], dtype=np.int32)
+        self.rng = np.random.default_rng(seed)
+        self._update_groups()
+
+    @classmethod
+    def from_agents(cls, agents, seed=None):
+        """Build a swarm from Agent objects sharing the same grid"""
+        swarm = cls(agents[0].grid,
+                    [(a.x, a.y) for a in agents],
+                    [a.strategy for a in agents],
+                    seed)
+        swarm.patrol_indices[:] = [a.current_patrol_index for a in agents]
+        swarm.scores[:] = [a.score for a in agents]
+        swarm.move_delays[:] = [a.move_delay for a in agents]
+        return swarm
+
+    @classmethod
+    def random(cls, grid, count, seed=None, strategies=None):
+        """Spawn count agents at random cells with strategies drawn uniformly"""
+        rng = np.random.default_rng(seed)
+        strategies = list(strategies or RANDOM_STRATEGIES)
+        positions = np.column_stack([rng.integers(0, grid.width, count),
+                                     rng.integers(0, grid.height, count)])
+        chosen = [strategies[i] for i in rng.integers(0, len(strategies), count)]
+        return cls(grid, positions, chosen, rng.integers(1 << 63))
+
+    def __len__(self):
+        return len(self.positions)
+
+    def to_agents(self, color=(255, 255, 255)):
+        """Materialize the swarm as Agent objects (for drawing or debugging)"""
+        agents = []
+        for i, ((x, y), code) in enumerate(zip(self.positions.tolist(), self.strategies.tolist())):
+            agent = Agent(x, y, CODE_STRATEGIES[code], color, self.grid)
+            agent.current_patrol_index = int(self.patrol_indices[i])
+            agent.score = int(self.scores[i])
+            agent.move_delay = int(self.move_delays[i])
+            agents.append(agent)
+        return agents
+
+    def set_strategies(self, strategies):
+        """Replace the strategy of every agent"""
+        self.strategies[:] = [STRATEGY_CODES[s] for s in strategies]
+        self._update_groups()
+
+    def _update_groups(self):
+        """Cache the agent indices of each strategy"""
+        self.groups = {code: np.flatnonzero(self.strategies == code)
+                       for code in CODE_STRATEGIES}
+
+    def step(self, extra_targets=None):
+        """Move every agent once.
+
+        extra_targets is an optional (M, 2) array of positions (e.g. the
+        player) that GREEDY and DEFENSIVE agents consider after the other
+        agents, like the user agent appended to other_agents in World.step.
+        """
+        start = self.positions
+        new_positions = start.copy()
+
+        random_idx = self.groups[STRATEGY_CODES[Strategy.RANDOM]]
+        chase_idx = np.concatenate([self.groups[STRATEGY_CODES[Strategy.GREEDY]],
+                                    self.groups[STRATEGY_CODES[Strategy.SEARCH]]])
+        flee_idx = self.groups[STRATEGY_CODES[Strategy.DEFENSIVE]]
+        patrol_idx = self.groups[STRATEGY_CODES[Strategy.PATROL]]
+
+        candidates = start
+        if extra_targets is not None and len(extra_targets):
+            candidates = np.concatenate([start, np.asarray(extra_targets, dtype=np.int32).reshape(-1, 2)])
+
+        if len(candidates) < 2:
+            # No one to chase or flee from: fall back to random movement
+            random_idx = np.concatenate([random_idx, chase_idx, flee_idx])
+            chase_idx = flee_idx = random_idx[:0]
+
+        if len(random_idx):
+            new_positions[random_idx] = self._random_moves(start[random_idx])
+
+        if len(chase_idx):
+            nearest = self._nearest(chase_idx, candidates)
+            new_positions[chase_idx] = self._step_towards(start[chase_idx], candidates[nearest])
+
+        if len(flee_idx):
+            nearest = self._nearest(flee_idx, candidates)
+            # Stepping towards the mirrored point moves directly away from the nearest agent
+            new_positions[flee_idx] = self._step_towards(start[flee_idx],
+                                                         2 * start[flee_idx] - candidates[nearest])
+
+        if len(patrol_idx):
+            new_positions[patrol_idx] = self._patrol_moves(patrol_idx, start[patrol_idx])
+
+        waiting = self.move_delays > 0
+        new_positions[waiting] = start[waiting]
+        self.move_delays[waiting] -= 1
+        new_positions = self._resolve_conflicts(start, new_positions)
+        moved = np.flatnonzero(np.any(new_positions != start, axis=1))
+        self.move_delays[moved] = self.grid.costs[new_positions[moved, 1], new_positions[moved, 0]] - 1
+
+        self.positions = new_positions
+        return new_positions
+
+    def _resolve_conflicts(self, start, proposed):
+        """Keep the agents blocked by a move conflict at their start cell.
+
+        Of several agents entering the same cell the lowest index moves. A
+        move is blocked when its cell is kept by an agent that does not move;
+        the blocked agent keeps its own cell in turn, so blocking spreads back
+        along chains of movers. Agents swapping cells are allowed.
+        """
+        width = self.grid.width
+        current = start[:, 1] * width + start[:, 0]
+        target = proposed[:, 1] * width + proposed[:, 0]
+        moving = target != current
+        movers = np.flatnonzero(moving)
+        # np.unique sorts by cell and reports the first, i.e. lowest-indexed, mover of each
+        cells, winners = np.unique(target[movers], return_index=True)
+        moving[movers] = False
+        movers = movers[winners]
+        moving[movers] = True
+        kept = current[~moving]
+        while len(kept):
+            found = np.minimum(np.searchsorted(cells, kept), len(cells) - 1)
+            blocked = movers[found[cells[found] == kept]] if len(cells) else movers[:0]
+            blocked = blocked[moving[blocked]]
+            moving[blocked] = False
+            kept = current[blocked]
+        return np.where(moving[:, None], proposed, start)
+
+    def _random_moves(self, positions):
+        """Pick a uniformly random valid neighbour for every row"""
+        neighbors = positions[:, None, :] + NEIGHBOR_OFFSETS[None, :, :]
+        valid = self.grid.are_valid_positions(neighbors[..., 0], neighbors[..., 1])
+        counts = valid.sum(axis=1)
+        picks = (self.rng.random(len(positions)) * counts).astype(np.int32)
+        choice = np.argmax(np.cumsum(valid, axis=1) > picks[:, None], axis=1)
+        moved = neighbors[np.arange(len(positions)), choice]
+        return np.where((counts > 0)[:, None], moved, positions)
+
+    def _nearest(self, indices, candidates):
+        """Index into candidates of the nearest other agent (Manhattan, first on ties)"""
+        cells = self.grid.width * self.grid.height
+        brute_force_cost = 4 * len(indices) * len(candidates)
+        transform_cost = 16 * cells + 20 * NUMPY_CALL_COST * (self.grid.width + self.grid.height)
+        if transform_cost < brute_force_cost:
+            return self._nearest_by_transform(indices, candidates)
+        return self._nearest_by_scan(indices, candidates)
+
+    def _nearest_by_scan(self, indices, candidates):
+        """Blocked pairwise distance scan, O(len(indices) * len(candidates))"""
+        result = np.empty(len(indices), dtype=np.intp)
+        block = max(1, DISTANCE_BLOCK_ELEMENTS // len(candidates))
+        cx = candidates[:, 0]
+        cy = candidates[:, 1]
+        for start in range(0, len(indices), block):
+            rows = indices[start:start + block]
+            x = self.positions[rows, 0]
+            y = self.positions[rows, 1]
+            distances = np.abs(x[:, None] - cx[None, :])
+            distances += np.abs(y[:, None] - cy[None, :])
+            distances[np.arange(len(rows)), rows] = np.iinfo(np.int32).max  # Exclude self
+            result[start:start + block] = np.argmin(distances, axis=1)
+        return result
+
+    def _nearest_by_transform(self, indices, candidates):
+        """Two-nearest L1 distance transform over the grid, O(cells) per call.
+
+        Every cell stores the two smallest keys distance * len(candidates) + index,
+        so ties resolve to the lower index exactly like the scan. An agent reads
+        the best key of its own cell, or the second one when the best is itself.
+        """
+        width, height = self.grid.width, self.grid.height
+        count = len(candidates)
+        cells = candidates[:, 1] * width + candidates[:, 0]
+        order = np.lexsort((np.arange(count), cells))
+        sorted_cells = cells[order]
+        first = np.ones(count, dtype=bool)
+        first[1:] = sorted_cells[1:] != sorted_cells[:-1]
+        second = np.zeros(count, dtype=bool)
+        second[1:] = first[:-1] & ~first[1:]
+
+        best = np.full(width * height, KEY_INF, dtype=np.int64)
+        runner_up = np.full(width * height, KEY_INF, dtype=np.int64)
+        best[sorted_cells[first]] = order[first]
+        runner_up[sorted_cells[second]] = order[second]
+
+        best, runner_up = _sweep_rows(best.reshape(height, width), runner_up.reshape(height, width), count)
+        best, runner_up = _sweep_rows(best.T.copy(), runner_up.T.copy(), count)
+
+        x = self.positions[indices, 0]
+        y = self.positions[indices, 1]
+        keys = best[x, y]
+        keys = np.where(keys % count == indices, runner_up[x, y], keys)
+        return keys % count
+
+    def _step_towards(self, positions, targets):
+        """One axis-greedy step towards targets, staying put if the cell is invalid"""
+        delta = targets - positions
+        horizontal = np.abs(delta[:, 0]) > np.abs(delta[:, 1])
+        axis = np.where(horizontal, 0, 1)
+        direction = np.where(delta[np.arange(len(delta)), axis] > 0, 1, -1)
+        moved = positions.copy()
+        moved[np.arange(len(moved)), axis] += direction
+        valid = self.grid.are_valid_positions(moved[:, 0], moved[:, 1])
+        return np.where(valid[:, None], moved, positions)
+
+    def _patrol_moves(self, indices, positions):
+        """Advance patrol indices at reached corners and step towards the current one"""
+        targets = self.patrol_points[self.patrol_indices[indices]]
+        reached = np.all(positions == targets, axis=1)
+        self.patrol_indices[indices[reached]] = (self.patrol_indices[indices[reached]] + 1) % len(self.patrol_points)
+        targets = self.patrol_points[self.patrol_indices[indices]]
+        return self._step_towards(positions, targets)
+
+def _merge_nearest(a1, a2, b1, b2):
+    """Two smallest distinct keys of two sorted key pairs"""
+    first = np.minimum(a1, b1)
+    second = np.minimum(np.minimum(a2, b2),
+                        np.where(a1 != b1, np.maximum(a1, b1), KEY_INF))
+    return first, second
+
+def _sweep_rows(best, runner_up, step):
+    """Propagate two-nearest keys along each row in both directions"""
+    forward = (best.copy(), runner_up.copy())
+    backward = (best.copy(), runner_up.copy())
+    columns = best.shape[1]
+    for x in range(1, columns):
+        forward[0][:, x], forward[1][:, x] = _merge_nearest(
+            forward[0][:, x], forward[1][:, x],
+            np.minimum(forward[0][:, x - 1] + step, KEY_INF),
+            np.minimum(forward[1][:, x - 1] + step, KEY_INF))
+    for x in range(columns - 2, -1, -1):
+        backward[0][:, x], backward[1][:, x] = _merge_nearest(
+            backward[0][:, x], backward[1][:, x],
+            np.minimum(backward[0][:, x + 1] + step, KEY_INF),
+            np.minimum(backward[1][:, x + 1] + step, KEY_INF))
+    return _merge_nearest(forward[0], forward[1], backward[0], backward[1])
@@ -0,0 +1,37 @@
+import random
+
+import numpy as np
+
+from flowfield import UNREACHABLE, FlowField
+from grid import FLOOR, SLOW, WALL, Grid
+
+def assert_matches_fresh_fill(grid, targets):
+    for target in targets:
+        repaired = grid.flow_field(*target).distance
+        assert np.array_equal(repaired, FlowField(grid, *target).distance), target
+
+def test_repair_matches_fill_after_random_edits():
+    rng = random.Random(5)
+    grid = Grid(40, 30, 40)
+    grid.load_terrain([[rng.choice((FLOOR, FLOOR, FLOOR, WALL, SLOW)) for _ in range(40)]
+                       for _ in range(30)])
+    targets = [(3, 4), (20, 15), (39, 29)]
+    for target in targets:
+        grid.set_cell(*target, FLOOR)
+        grid.flow_field(*target)
+    for _ in range(300):
+        x, y = rng.randrange(40), rng.randrange(30)
+        grid.set_cell(x, y, rng.choice((FLOOR, WALL, SLOW)))
+        assert_matches_fresh_fill(grid, targets)
+
+def test_repair_handles_walling_off_and_reopening_the_target():
+    grid = Grid(12, 10, 40)
+    field = grid.flow_field(6, 5)
+    ring = [(x, y) for x in range(5, 8) for y in range(4, 7) if (x, y) != (6, 5)]
+    for cell in ring:
+        grid.set_cell(*cell, WALL)
+        assert_matches_fresh_fill(grid, [(6, 5)])
+    assert field.distance_at(0, 0) == UNREACHABLE
+    grid.set_cell(6, 4, SLOW)
+    assert_matches_fresh_fill(grid, [(6, 5)])
+    assert field.distance_at(6, 3) == 3  # Into the slow tile, then into the target
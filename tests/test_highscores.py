@@ -0,0 +1,30 @@
+import json
+
+from highscores import LEGACY_DIFFICULTY, HighScoreService
+from settings import Difficulty
+
+def test_legacy_scores_show_on_their_difficulty_board(tmp_path):
+    legacy = tmp_path / 'high_scores.json'
+    legacy.write_text(json.dumps([{'name': 'ada', 'score': 40}, {'name': 'bob', 'score': 70}]))
+    service = HighScoreService(str(tmp_path / 'high_scores.log'), legacy_path=str(legacy))
+    service.record('cy', 55, Difficulty.EASY)
+    service.close()
+    expected = [{'name': 'bob', 'score': 70}, {'name': 'cy', 'score': 55}, {'name': 'ada', 'score': 40}]
+    assert service.top(LEGACY_DIFFICULTY) == expected
+    assert service.personal_best('ada', LEGACY_DIFFICULTY) == 40
+
+    reloaded = HighScoreService(str(tmp_path / 'high_scores.log'), legacy_path=str(legacy))
+    reloaded.close()
+    assert reloaded.top(LEGACY_DIFFICULTY) == expected
+
+def test_log_lines_that_are_not_records_are_skipped(tmp_path):
+    log = tmp_path / 'high_scores.log'
+    good = {'name': 'ada', 'score': 30, 'difficulty': Difficulty.HARD, 'time': 0, 'seq': 4}
+    lines = [json.dumps(good), '{"name": "bob", "score": 90}', '[1, 2]', '7', 'not json',
+             json.dumps(dict(good, seq='5')), json.dumps(dict(good, score=None, seq=6))]
+    log.write_text(''.join(line + '\n' for line in lines))
+    service = HighScoreService(str(log), legacy_path=None)
+    service.record('cy', 10, Difficulty.HARD)
+    service.close()
+    assert service.top(Difficulty.HARD) == [{'name': 'ada', 'score': 30}, {'name': 'cy', 'score': 10}]
+    assert service.next_seq == 6
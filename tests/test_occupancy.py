@@ -0,0 +1,49 @@
+import numpy as np
+
+from agent import Agent, Strategy
+from grid import Grid
+from swarm import Swarm
+from world import DEFENSIVE_PENALTY, Action, Event, World
+
+WHITE = (255, 255, 255)
+
+def test_first_agent_into_a_cell_keeps_it():
+    grid = Grid(10, 3, 40)
+    first = Agent(1, 1, Strategy.GREEDY, WHITE, grid)
+    second = Agent(3, 1, Strategy.GREEDY, WHITE, grid)
+    assert first.move() and (first.x, first.y) == (2, 1)
+    # second chases first into the cell it now holds, and stays put
+    assert not second.move() and (second.x, second.y) == (3, 1)
+    assert list(grid.agents_at(2, 1)) == [first]
+
+def test_players_do_not_block_cells():
+    grid = Grid(10, 3, 40)
+    agent = Agent(1, 1, Strategy.GREEDY, WHITE, grid)
+    Agent(2, 1, None, WHITE, grid)
+    assert agent.can_enter(2, 1)
+    Agent(1, 2, Strategy.RANDOM, WHITE, grid)
+    assert not agent.can_enter(1, 2)
+
+def test_swarm_allows_swaps_and_blocks_chains():
+    swarm = Swarm(Grid(10, 3, 40), [(0, 0)], [Strategy.RANDOM])
+    start = np.array([(1, 1), (2, 1), (5, 1), (6, 1), (8, 0), (8, 2)])
+    proposed = np.array([(2, 1), (1, 1), (6, 1), (6, 1), (8, 1), (8, 1)])
+    resolved = swarm._resolve_conflicts(start, proposed)
+    assert resolved.tolist() == [[2, 1], [1, 1],  # Swap
+                                 [5, 1], [6, 1],  # Into a cell whose agent stays
+                                 [8, 1], [8, 2]]  # Same cell: the lower index wins
+
+def test_agent_resting_on_the_player_collides_once():
+    world = World(seed=1)
+    defensive = world.agents[2]
+    assert defensive.strategy == Strategy.DEFENSIVE
+    defensive.x, defensive.y = 1, 0
+    defensive.move_delay = 10  # Keeps it on its cell
+    player = world.user_agent
+    player.x, player.y = 0, 0
+
+    events = world.step(Action.RIGHT)
+    assert Event('penalty', 1, 0, -DEFENSIVE_PENALTY) in events
+    assert world.score == -DEFENSIVE_PENALTY
+    assert not [event for event in world.step() if event.kind == 'penalty']
+    assert world.score == -DEFENSIVE_PENALTY
@@ -0,0 +1,29 @@
+import random
+
+from replay import Recorder, Recording, Replayer
+from settings import Difficulty
+from tournament import cautious_policy
+from world import World
+
+MAP = ['.' * 20] * 4 + ['....######..~~~.....'] + ['.' * 20] * 10
+
+def test_saved_recording_replays_and_seeks_to_the_recorded_states(tmp_path):
+    world = World(Difficulty.HARD, seed=11, terrain=MAP)
+    recorder = Recorder(world, keyframe_interval=25, metadata={'player': 'test'})
+    rng = random.Random(11)
+    hashes = []
+    while not world.finished and world.tick < 120:
+        world.step(cautious_policy(world, rng))
+        hashes.append(world.state_hash())
+    assert len(hashes) > 60
+
+    path = tmp_path / 'game.rec'
+    recorder.save(path)
+    recording = Recording.load(path)
+    assert recording.header['metadata'] == {'player': 'test'}
+    assert list(recording.hashes) == hashes
+
+    replayer = Replayer(recording, verify=True)
+    assert replayer.run().state_hash() == hashes[-1]
+    for tick in (49, 50, 51, 10, len(hashes)):
+        assert replayer.seek(tick).state_hash() == hashes[tick - 1]
@@ -0,0 +1,41 @@
+from agent import Strategy
+from grid import WALL
+from search import Planner
+from settings import DIFFICULTY_SETTINGS, Difficulty
+from world import World
+
+def walled_world():
+    world = World(seed=5, terrain=['.' * 20] * 15)
+    for y in range(2, 12):
+        world.grid.set_cell(8, y, WALL)
+    return world
+
+def test_one_flow_field_per_move_on_terrain():
+    grid = walled_world().grid
+    grid.flow_fields.clear()
+    planner = Planner(grid, max_depth=8, max_nodes=5000)
+    assert planner.best_move(5, 6, 12, 6, [(4, 6), (6, 6), (5, 5), (5, 7)]) != (5, 6)
+    assert planner.depth > 2
+    assert list(grid.flow_fields) == [(12, 6)]
+
+def test_a_passed_deadline_stops_even_the_first_iteration():
+    planner = Planner(walled_world().grid)
+    assert planner.best_move(5, 6, 12, 6, [(4, 6), (6, 6)], deadline=0.0) == (5, 6)
+    assert planner.depth == 0
+
+def test_table_values_carry_over_to_the_next_tick():
+    grid = walled_world().grid
+    warm = Planner(grid, max_depth=6, max_nodes=10**6)
+    cell = warm.best_move(5, 6, 12, 6, [(4, 6), (6, 6), (5, 5), (5, 7)])
+    steps = [c for c in grid.get_neighbors(*cell) if grid.is_valid_position(*c)]
+    warm.best_move(cell[0], cell[1], 12, 7, steps)
+    cold = Planner(grid, max_depth=6, max_nodes=10**6)
+    cold.best_move(cell[0], cell[1], 12, 7, steps)
+    assert warm.nodes < cold.nodes
+
+def test_only_live_worlds_give_the_search_a_time_budget():
+    searchers = [[agent for agent in World(Difficulty.HARD, seed=1, live=live).fork().agents
+                  if agent.strategy == Strategy.SEARCH] for live in (False, True)]
+    assert [agent.search_ms for agent in searchers[0]] == [None]
+    assert [agent.search_ms for agent in searchers[1]] == \
+        [DIFFICULTY_SETTINGS[Difficulty.HARD]['agent_behaviors']['search']['search_ms']]
@@ -0,0 +1,121 @@
+import asyncio
+import json
+import queue
+import random
+import socket
+
+from client import Mirror, RemoteWorld
+from server import Client, GameServer
+from settings import Difficulty
+from world import World
+
+class FakeTransport:
+    def is_closing(self):
+        return False
+
+    def get_write_buffer_size(self):
+        return 0
+
+class FakeWriter:
+    """Collects the lines a client would receive"""
+
+    def __init__(self):
+        self.transport = FakeTransport()
+        self.data = b''
+
+    def write(self, data):
+        self.data += data
+
+    def lines(self):
+        data, self.data = self.data, b''
+        return [json.loads(line) for line in data.splitlines()]
+
+def connect(server, mirror):
+    world = server.world
+    mirror.apply({'type': 'welcome', 'difficulty': world.difficulty, 'tick_rate': server.tick_rate,
+                  'width': world.grid.width, 'height': world.grid.height})
+    client = Client(FakeWriter())
+    client.stale = True
+    server.clients[client] = None
+    server._broadcast(b'')
+    return client
+
+def receive(client, mirror):
+    for message in client.writer.lines():
+        mirror.apply(message)
+
+def test_mirror_fed_deltas_matches_keyframes():
+    async def play():
+        rng = random.Random(7)
+        world = World(Difficulty.HARD, seed=7, solo=False)
+        server = GameServer(world, keyframe_interval=10_000, seed=7)
+        mirror = Mirror()
+        client = connect(server, mirror)
+        server.receive(client, {'type': 'join'})
+        receive(client, mirror)
+        assert mirror.player is not None
+
+        rounds = 0
+        for _ in range(80):
+            if world.finished:
+                server.new_round()  # Without waiting out the pause
+                rounds += 1
+            elif client.player is None:
+                server.receive(client, {'type': 'join'})
+            server.receive(client, {'type': 'action', 'action': rng.randint(1, 4)})
+            server.tick()
+            receive(client, mirror)
+            keyframe = json.loads(server._keyframe(False))
+            assert mirror.tick == keyframe['tick'] == world.tick
+            assert mirror.positions() == {agent[0]: tuple(agent[1:3]) for agent in keyframe['agents']}
+            assert (mirror.score, mirror.state) == (keyframe['score'], keyframe['state'])
+        assert rounds and world.tick > 10
+
+    asyncio.run(play())
+
+def test_actions_without_a_player_are_dropped():
+    world = World(Difficulty.EASY, seed=1, solo=False)
+    server = GameServer(world, seed=1)
+    client = connect(server, Mirror())
+    server.receive(client, {'type': 'action', 'action': 1})
+    assert not client.actions
+    server.receive(client, {'type': 'join'})
+    server.receive(client, {'type': 'action', 'action': 1})
+    assert len(client.actions) == 1
+
+def test_mirror_waits_for_a_keyframe_after_a_gap():
+    world = World(Difficulty.EASY, seed=3, solo=False)
+    server = GameServer(world, keyframe_interval=10_000, seed=3)
+    mirror = Mirror()
+    client = connect(server, mirror)
+    server.receive(client, {'type': 'join'})
+    receive(client, mirror)
+    server.tick()
+    client.writer.lines()  # Lost
+    server.tick()
+    server.tick()
+    receive(client, mirror)
+    assert (mirror.synced, mirror.gaps, mirror.tick) == (False, 1, 0)
+
+    client.stale = True
+    server._broadcast(b'')
+    server.tick()
+    receive(client, mirror)
+    assert mirror.synced and mirror.tick == world.tick
+    assert mirror.positions() == {agent[0]: tuple(agent[1:3]) for agent in json.loads(server._keyframe(False))['agents']}
+
+def test_failed_reconnect_leaves_the_world_disconnected():
+    with socket.socket() as listener:
+        listener.bind(('127.0.0.1', 0))
+        address = listener.getsockname()
+    world = RemoteWorld.__new__(RemoteWorld)  # As left by a lost connection
+    world.address = address
+    world.timeout = 0.5
+    world.connected = False
+    world.socket = socket.socket()
+    world.mirror = mirror = Mirror()
+    world.messages = messages = queue.Queue()
+    world.user_agent = user = object()
+    world.reset()
+    assert not world.connected and world.game_over
+    assert (world.mirror, world.messages, world.user_agent) == (mirror, messages, user)
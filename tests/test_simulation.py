@@ -0,0 +1,18 @@
+from grid import SLOW, WALL
+from simulation import Simulation
+from world import World
+
+def test_frames_keep_the_terrain_they_were_captured_with():
+    world = World(seed=2, terrain=['.' * 20] * 15)
+    world.grid.set_cell(3, 3, WALL)
+    simulation = Simulation(world, threaded=False)
+    first = simulation.frames[1]
+
+    simulation._step(0.0)
+    assert simulation.frames[1].terrain is first.terrain  # Unchanged terrain: the copy is reused
+
+    world.grid.set_cell(3, 3, SLOW)
+    simulation._step(1.0)
+    assert first.terrain.get(3, 3) == WALL
+    assert simulation.frames[1].terrain.get(3, 3) == SLOW
+    assert simulation.frames[1].terrain_version == world.grid.terrain_version
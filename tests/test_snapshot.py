@@ -0,0 +1,22 @@
+import numpy as np
+
+from grid import SLOW, WALL
+from world import World
+
+def test_restore_rewinds_terrain_edits_and_forks_keep_their_own():
+    world = World(seed=4, terrain=['.' * 20] * 15)
+    world.grid.set_cell(3, 3, WALL)
+    snapshot = world.snapshot()
+    terrain = world.grid.grid.to_array()
+    fork = world.fork()
+
+    world.step()
+    world.grid.set_cell(3, 3, SLOW)
+    world.grid.set_cell(8, 2, WALL)
+    fork.grid.set_cell(9, 9, WALL)
+    world.restore(snapshot)
+
+    assert np.array_equal(world.grid.grid.to_array(), terrain)
+    assert world.snapshot() == snapshot
+    assert fork.grid.get_cell(3, 3) == WALL and fork.grid.get_cell(9, 9) == WALL
+    assert world.grid.get_cell(9, 9) != WALL
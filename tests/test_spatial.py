@@ -0,0 +1,51 @@
+import random
+
+from spatial import SpatialHash
+
+class Point:
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+def linear_nearest(points, x, y, exclude=None, max_distance=None):
+    candidates = [p for p in points if p is not exclude
+                  and (max_distance is None or abs(p.x - x) + abs(p.y - y) <= max_distance)]
+    return min(candidates, key=lambda p: abs(p.x - x) + abs(p.y - y), default=None)
+
+def linear_within(points, x, y, radius, exclude=None):
+    found = [p for p in points if p is not exclude and abs(p.x - x) + abs(p.y - y) <= radius]
+    return sorted(found, key=lambda p: abs(p.x - x) + abs(p.y - y))
+
+def test_queries_match_a_linear_scan_through_moves_and_removals():
+    rng = random.Random(3)
+    index = SpatialHash(bucket_size=4)
+    points = []  # Insertion order, which breaks ties in both
+    for _ in range(2000):
+        roll = rng.random()
+        if roll < 0.3 or not points:
+            point = Point(rng.randrange(60), rng.randrange(40))
+            index.insert(point)
+            points.append(point)
+        elif roll < 0.8:
+            point = rng.choice(points)
+            old = (point.x, point.y)
+            if rng.random() < 0.7:  # A step, or a jump across buckets
+                point.x = min(max(point.x + rng.choice((-1, 0, 1)), 0), 59)
+                point.y = min(max(point.y + rng.choice((-1, 0, 1)), 0), 39)
+            else:
+                point.x, point.y = rng.randrange(60), rng.randrange(40)
+            index.moved(point, *old)
+        elif roll < 0.9:
+            point = points.pop(rng.randrange(len(points)))
+            index.remove(point)
+
+        x, y = rng.randrange(-5, 65), rng.randrange(-5, 45)
+        exclude = rng.choice(points) if points and rng.random() < 0.5 else None
+        max_distance = rng.choice((None, 3, 10))
+        radius = rng.randrange(12)
+        assert index.nearest(x, y, exclude, max_distance) is linear_nearest(points, x, y, exclude, max_distance)
+        assert index.within(x, y, radius, exclude) == linear_within(points, x, y, radius, exclude)
+        assert len(index) == len(points)
+
+    for point in points:
+        assert list(index.at(point.x, point.y)) == [p for p in points if (p.x, p.y) == (point.x, point.y)]
@@ -0,0 +1,25 @@
+import numpy as np
+
+from agent import Strategy
+from grid import Grid
+from settings import Difficulty
+from swarm import STRATEGY_CODES, Swarm
+from world import World
+
+def test_from_agents_accepts_search_agents():
+    world = World(Difficulty.HARD, seed=3)
+    swarm = Swarm.from_agents(world.agents)
+    strategies = [agent.strategy for agent in world.agents]
+    assert Strategy.SEARCH in strategies
+    assert swarm.strategies[strategies.index(Strategy.SEARCH)] == STRATEGY_CODES[Strategy.SEARCH]
+    assert [agent.strategy for agent in swarm.to_agents()] == strategies
+    swarm.step()
+
+def test_search_agents_chase_like_greedy():
+    positions = [(2, 2), (9, 5), (15, 12), (4, 13)]
+    moves = []
+    for strategy in (Strategy.GREEDY, Strategy.SEARCH):
+        swarm = Swarm(Grid(20, 15, 40), positions, [strategy] * len(positions), seed=1)
+        moves.append(swarm.step(extra_targets=[(10, 7)]).copy())
+    assert np.array_equal(moves[0], moves[1])
+    assert not np.array_equal(moves[0], np.array(positions))
@@ -0,0 +1,9 @@
+from settings import Difficulty
+from tournament import run_tournament
+
+def test_results_do_not_depend_on_the_worker_count():
+    args = (3, [Difficulty.EASY, Difficulty.HARD], 5)
+    serial = run_tournament(*args, max_ticks=300, workers=1)
+    pooled = run_tournament(*args, max_ticks=300, workers=2)
+    assert len(serial) == 6
+    assert serial == pooled
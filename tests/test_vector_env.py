@@ -0,0 +1,46 @@
+import numpy as np
+
+from agent import Strategy
+from grid import SLOW, WALL
+from settings import Difficulty
+from vector_env import (CHANNELS, DEFENSIVE_CHANNEL, HOSTILE_CHANNEL, PLAYER_CHANNEL, SLOW_CHANNEL,
+                        TARGET_CHANNEL, WALL_CHANNEL, VectorEnv)
+from world import TARGET_INDEX
+
+MAP = ['.' * 20] * 4 + ['..####......~~~~....'] + ['.' * 20] * 10
+
+def observe(world):
+    """Observation built from scratch, as VectorEnv documents it"""
+    observation = np.zeros((len(CHANNELS), world.grid.height, world.grid.width), dtype=np.uint8)
+    for i, agent in enumerate(world.agents):
+        channel = (TARGET_CHANNEL if i == TARGET_INDEX
+                   else DEFENSIVE_CHANNEL if agent.strategy == Strategy.DEFENSIVE else HOSTILE_CHANNEL)
+        observation[channel, agent.y, agent.x] += 1
+    observation[PLAYER_CHANNEL, world.user_agent.y, world.user_agent.x] += 1
+    terrain = world.grid.grid.to_array()
+    observation[WALL_CHANNEL] = terrain == WALL
+    observation[SLOW_CHANNEL] = terrain == SLOW
+    return observation
+
+def test_in_place_observations_match_fresh_ones_across_auto_resets():
+    env = VectorEnv(4, Difficulty.HARD, seed=9, max_ticks=25, terrain=MAP)
+    observations, _ = env.reset()
+    for i, world in enumerate(env.worlds):
+        assert np.array_equal(observations[i], observe(world))
+    rng = np.random.default_rng(9)
+    resets = 0
+    for _ in range(60):
+        # Forks follow each game to its end, past the auto-reset of its environment
+        forks = [world.fork() for world in env.worlds]
+        actions = rng.integers(0, env.num_actions, env.num_envs)
+        observations, _, terminated, truncated, infos = env.step(actions)
+        for i, (world, fork) in enumerate(zip(env.worlds, forks)):
+            fork.step(int(actions[i]))
+            assert np.array_equal(observations[i], observe(world))
+            if infos['final'][i]:
+                resets += 1
+                assert np.array_equal(infos['final_observations'][i], observe(fork))
+                assert (infos['score'][i], infos['tick'][i]) == (fork.score, fork.tick)
+                assert terminated[i] == fork.finished and truncated[i] == (not fork.finished)
+    assert resets > 4
+    assert terminated.dtype == bool and observations is env.observations
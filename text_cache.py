@@ -0,0 +1,72 @@
+"""Size- and memory-bounded LRU cache of rendered text surfaces."""
+from collections import OrderedDict
+
+import pygame
+
+class TextCache:
+    """Rendered text keyed by (text, font, color, scale), least recently used evicted first.
+
+    Scales are quantized to 1/scale_steps so a sine-driven animation maps to a
+    fixed set of surfaces that stay cached for the whole cycle.
+    """
+
+    def __init__(self, max_entries=512, max_bytes=32 * 1024 * 1024, scale_steps=100):
+        self.cache = OrderedDict()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.scale_steps = scale_steps
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.cache)
+
+    def quantize(self, scale):
+        return round(scale * self.scale_steps) / self.scale_steps
+
+    def get_text(self, text, font, color, scale=1.0):
+        scale = self.quantize(scale)
+        key = (text, font, color, scale)
+        text_surface = self.cache.get(key)
+        if text_surface is not None:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return text_surface
+
+        self.misses += 1
+        text_surface = font.render(text, True, color)
+        if scale != 1.0:
+            text_surface = pygame.transform.scale(text_surface,
+                (int(text_surface.get_width() * scale),
+                 int(text_surface.get_height() * scale)))
+        self.cache[key] = text_surface
+        self.bytes += _surface_bytes(text_surface)
+        self._evict()
+        return text_surface
+
+    def _evict(self):
+        """Drop least recently used surfaces until both bounds hold again"""
+        while len(self.cache) > 1 and (len(self.cache) > self.max_entries or self.bytes > self.max_bytes):
+            _, surface = self.cache.popitem(last=False)
+            self.bytes -= _surface_bytes(surface)
+            self.evictions += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.cache),
+            'bytes': self.bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
+    def clear(self):
+        self.cache.clear()
+        self.bytes = 0
+
+def _surface_bytes(surface):
+    return surface.get_pitch() * surface.get_height()
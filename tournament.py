@@ -0,0 +1,210 @@
+"""Run many seeded headless games across a process pool and report per-difficulty stats.
+
+Example:
+    python tournament.py --games 2000 --seed 42 --policy cautious
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import time
+
+from agent import Strategy
+from settings import DIFFICULTY_NAMES
+from world import World, Action, ACTION_DELTAS, TARGET_INDEX
+
+# Hostile agents reachable in one step make a cell dangerous for this many points
+DANGER_PENALTY = 1000
+
+def random_policy(world, rng):
+    """Press a random arrow key (or nothing) every tick"""
+    return Action(rng.randint(0, len(Action) - 1))
+
+def greedy_policy(world, rng):
+    """Walk straight towards the target, ignoring every other agent"""
+    return _best_action(world, rng, avoid_danger=False)
+
+def cautious_policy(world, rng):
+    """Walk towards the target but never next to a deadly agent if it can help it"""
+    return _best_action(world, rng, avoid_danger=True)
+
+def _best_action(world, rng, avoid_danger):
+    player = world.user_agent
+    target = world.agents[TARGET_INDEX]
+    hostile = [a for i, a in enumerate(world.agents)
+               if i != TARGET_INDEX and a.strategy != Strategy.DEFENSIVE]
+    best_cost = None
+    best_actions = []
+    for action in Action:
+        dx, dy = ACTION_DELTAS[action]
+        x, y = player.x + dx, player.y + dy
+        if not world.grid.is_valid_position(x, y):
+            continue
+        cost = abs(target.x - x) + abs(target.y - y)
+        if avoid_danger and any(abs(a.x - x) + abs(a.y - y) <= 1 for a in hostile):
+            cost += DANGER_PENALTY
+        if best_cost is None or cost < best_cost:
+            best_cost = cost
+            best_actions = [action]
+        elif cost == best_cost:
+            best_actions.append(action)
+    return rng.choice(best_actions)
+
+POLICIES = {
+    'random': random_policy,
+    'greedy': greedy_policy,
+    'cautious': cautious_policy
+}
+
+def game_seed(master_seed, difficulty, index):
+    """Seed of one game, independent of how games are split between workers"""
+    return random.Random(f"{master_seed}:{difficulty}:{index}").getrandbits(64)
+
+def play_game(task):
+    """Play one headless game to the end (or max_ticks) and return its result"""
+    difficulty, index, seed, policy_name, max_ticks = task
+    world = World(difficulty, seed=seed)
+    policy = POLICIES[policy_name]
+    policy_rng = random.Random(seed ^ 0x5EED)
+    while not world.finished and world.tick < max_ticks:
+        world.step(policy(world, policy_rng))
+
+    if world.game_over:
+        cause_of_death = world.cause_of_death
+    elif world.game_won:
+        cause_of_death = None
+    else:
+        cause_of_death = 'timeout'
+    return {
+        'difficulty': difficulty,
+        'index': index,
+        'seed': seed,
+        'won': world.game_won,
+        'ticks': world.tick,
+        'score': world.score,
+        'cause_of_death': cause_of_death
+    }
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1)))))
+    return sorted_values[rank]
+
+def summarize(results):
+    """Aggregate per-game results into per-difficulty statistics"""
+    summary = {}
+    for name, difficulty in DIFFICULTY_NAMES.items():
+        games = [r for r in results if r['difficulty'] == difficulty]
+        if not games:
+            continue
+        scores = sorted(r['score'] for r in games)
+        ticks = [r['ticks'] for r in games]
+        causes = {}
+        for r in games:
+            if r['cause_of_death']:
+                causes[r['cause_of_death']] = causes.get(r['cause_of_death'], 0) + 1
+        summary[name] = {
+            'games': len(games),
+            'win_rate': sum(r['won'] for r in games) / len(games),
+            'mean_ticks': statistics.fmean(ticks),
+            'score_mean': statistics.fmean(scores),
+            'score_min': scores[0],
+            'score_p10': percentile(scores, 0.10),
+            'score_median': percentile(scores, 0.50),
+            'score_p90': percentile(scores, 0.90),
+            'score_max': scores[-1],
+            'score_histogram': {str(score): scores.count(score) for score in sorted(set(scores))},
+            'causes_of_death': dict(sorted(causes.items()))
+        }
+    return summary
+
+def print_summary(summary, out=sys.stdout):
+    for name, stats in summary.items():
+        print(f"\n{name.upper()}  ({stats['games']} games)", file=out)
+        print(f"  win rate     {stats['win_rate']:.1%}", file=out)
+        print(f"  mean ticks   {stats['mean_ticks']:.1f}", file=out)
+        print(f"  score        mean {stats['score_mean']:.1f}  min {stats['score_min']}  "
+              f"p10 {stats['score_p10']}  median {stats['score_median']}  "
+              f"p90 {stats['score_p90']}  max {stats['score_max']}", file=out)
+        print(f"  deaths       {stats['causes_of_death']}", file=out)
+        largest = max(stats['score_histogram'].values())
+        for score, count in stats['score_histogram'].items():
+            bar = '#' * max(1, round(40 * count / largest))
+            print(f"  {score:>6} | {bar} {count}", file=out)
+
+def run_tournament(games, difficulties, seed, policy='cautious', max_ticks=2000,
+                   workers=None, on_result=None):
+    """Play games per difficulty on a process pool; returns results ordered by game"""
+    tasks = [(difficulty, index, game_seed(seed, difficulty, index), policy, max_ticks)
+             for difficulty in difficulties
+             for index in range(games)]
+    workers = workers or os.cpu_count() or 1
+    results = []
+    if workers == 1:
+        stream = map(play_game, tasks)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(workers)
+        stream = pool.imap_unordered(play_game, tasks, chunksize=max(1, len(tasks) // (workers * 16)))
+    try:
+        for result in stream:
+            results.append(result)
+            if on_result:
+                on_result(result)
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+    results.sort(key=lambda r: (r['difficulty'], r['index']))
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--games', type=int, default=1000, help='games per difficulty')
+    parser.add_argument('--difficulty', action='append', choices=sorted(DIFFICULTY_NAMES),
+                        help='difficulty to play (repeatable, default: all)')
+    parser.add_argument('--seed', type=int, default=0, help='master seed')
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='cautious')
+    parser.add_argument('--max-ticks', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=None, help='default: all cores')
+    parser.add_argument('--results', help='stream per-game results to this JSON lines file')
+    parser.add_argument('--summary', help='write the aggregate summary to this JSON file')
+    args = parser.parse_args(argv)
+
+    difficulties = [DIFFICULTY_NAMES[name] for name in (args.difficulty or DIFFICULTY_NAMES)]
+    results_file = open(args.results, 'w') if args.results else None
+    total = args.games * len(difficulties)
+    done = [0]
+
+    def on_result(result):
+        done[0] += 1
+        if results_file:
+            results_file.write(json.dumps(result) + '\n')
+        if done[0] % max(1, total // 20) == 0 or done[0] == total:
+            print(f"\r{done[0]}/{total} games", end='', file=sys.stderr, flush=True)
+
+    start = time.perf_counter()
+    try:
+        results = run_tournament(args.games, difficulties, args.seed, args.policy,
+                                 args.max_ticks, args.workers, on_result)
+    finally:
+        if results_file:
+            results_file.close()
+    elapsed = time.perf_counter() - start
+    print(f"\n{total} games in {elapsed:.1f}s "
+          f"({sum(r['ticks'] for r in results) / elapsed:,.0f} ticks/s)", file=sys.stderr)
+
+    summary = summarize(results)
+    print_summary(summary)
+    if args.summary:
+        with open(args.summary, 'w') as f:
+            json.dump({'seed': args.seed, 'policy': args.policy, 'max_ticks': args.max_ticks,
+                       'difficulties': summary}, f, indent=2)
+
+if __name__ == '__main__':
+    main()
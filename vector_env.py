@@ -0,0 +1,174 @@
+"""Batched, gym-style training environment running many headless games in lock-step.
+
+Example:
+    env = VectorEnv(64, Difficulty.MEDIUM, seed=1)
+    observations, infos = env.reset()
+    while training:
+        observations, rewards, terminated, truncated, infos = env.step(policy(observations))
+"""
+import random
+
+import numpy as np
+
+from agent import Strategy
+from grid import WALL, SLOW
+from settings import Difficulty
+from world import World, Action, TARGET_INDEX
+
+# Observation channels, each a 0/1 (or agent count) occupancy map of the board
+CHANNELS = ('player', 'target', 'hostile', 'defensive', 'wall', 'slow')
+PLAYER_CHANNEL, TARGET_CHANNEL, HOSTILE_CHANNEL, DEFENSIVE_CHANNEL, WALL_CHANNEL, SLOW_CHANNEL = range(len(CHANNELS))
+
+# Added to the score change of the tick in which the player dies
+DEATH_REWARD = -10.0
+
+def episode_seed(master_seed, env_index, episode):
+    """World seed of one episode, independent of how many environments run beside it"""
+    return random.Random(f"{master_seed}:{env_index}:{episode}").getrandbits(64)
+
+class VectorEnv:
+    """num_envs Worlds of one difficulty, stepped together with one Action each.
+
+    Observations live in a single preallocated uint8 array of shape
+    (num_envs, len(CHANNELS), height, width) that reset() and step() return
+    itself, so torch.from_numpy and friends can share it without copying.
+    Agent channels are updated in place by clearing only the cells agents left
+    and marking the ones they entered; terrain channels are written when an
+    episode starts. Rewards, flags and info arrays are reused the same way, so
+    a caller that keeps them past the next step must copy them.
+
+    A game that ends is reset inside step(): the returned observation is the
+    first one of its next episode, while the last one of the finished episode
+    is copied to final_observations and flagged in infos['final'];
+    infos['score'] and infos['tick'] still describe the finished episode.
+    """
+
+    def __init__(self, num_envs, difficulty=Difficulty.EASY, seed=None, max_ticks=2000, terrain=None,
+                 death_reward=DEATH_REWARD):
+        self.num_envs = num_envs
+        self.difficulty = difficulty
+        self.seed = seed if seed is not None else random.getrandbits(64)
+        self.max_ticks = max_ticks
+        self.death_reward = death_reward
+        self.num_actions = len(Action)
+        self.episodes = np.zeros(num_envs, dtype=np.int64)
+        self.worlds = [World(difficulty, seed=episode_seed(self.seed, i, 0), terrain=terrain)
+                       for i in range(num_envs)]
+
+        grid = self.worlds[0].grid
+        self.width, self.height = grid.width, grid.height
+        self.observation_shape = (len(CHANNELS), self.height, self.width)
+        self.observations = np.zeros((num_envs,) + self.observation_shape, dtype=np.uint8)
+        self.final_observations = np.zeros_like(self.observations)
+        self._flat = self.observations.reshape(-1)
+
+        # Channel of every agent slot (World.agents, then the player); World.reset
+        # creates the same strategies in the same order, so it never changes
+        world = self.worlds[0]
+        channels = [TARGET_CHANNEL if i == TARGET_INDEX
+                    else DEFENSIVE_CHANNEL if agent.strategy == Strategy.DEFENSIVE
+                    else HOSTILE_CHANNEL
+                    for i, agent in enumerate(world.agents)] + [PLAYER_CHANNEL]
+        plane = self.height * self.width
+        env_offsets = np.arange(num_envs, dtype=np.intp)[:, None] * (len(CHANNELS) * plane)
+        self._slot_offsets = env_offsets + np.array(channels, dtype=np.intp) * plane
+        # Flat observation index of every agent as last drawn, per environment
+        self._cells = np.zeros((num_envs, len(channels)), dtype=np.intp)
+        self._positions = np.zeros((num_envs, len(channels), 2), dtype=np.intp)
+
+        self.rewards = np.zeros(num_envs, dtype=np.float32)
+        self.terminated = np.zeros(num_envs, dtype=bool)
+        self.truncated = np.zeros(num_envs, dtype=bool)
+        self.scores = np.zeros(num_envs, dtype=np.int32)
+        self.ticks = np.zeros(num_envs, dtype=np.int32)
+        self.final = np.zeros(num_envs, dtype=bool)
+        self.infos = {'score': self.scores, 'tick': self.ticks, 'final': self.final,
+                      'final_observations': self.final_observations}
+
+    def reset(self, seed=None):
+        """Start a new episode in every environment; returns (observations, infos)"""
+        if seed is not None:
+            self.seed = seed
+            self.episodes[:] = 0
+        self.observations[:, :WALL_CHANNEL] = 0
+        for i, world in enumerate(self.worlds):
+            self._reset_world(i, world)
+        self._cells[...] = self._positions_to_cells()
+        np.add.at(self._flat, self._cells.reshape(-1), 1)
+        self.scores[:] = 0
+        self.ticks[:] = 0
+        self.final[:] = False
+        return self.observations, self.infos
+
+    def step(self, actions):
+        """Apply one Action per environment and advance every game by a tick.
+
+        Returns (observations, rewards, terminated, truncated, infos) as in the
+        Gymnasium vector API; terminated marks wins and deaths, truncated games
+        that reached max_ticks.
+        """
+        # Gathered in lists and stored with one bulk write per array, which is
+        # much cheaper than element-wise NumPy stores per environment
+        rewards, scores, ticks, finished, coordinates = [], [], [], [], []
+        death_reward = self.death_reward
+        for world, action in zip(self.worlds, np.asarray(actions).tolist()):
+            score = world.score
+            world.step(action)
+            rewards.append(world.score - score + (death_reward if world.game_over else 0))
+            scores.append(world.score)
+            ticks.append(world.tick)
+            finished.append(world.finished)
+            coordinates += _agent_coordinates(world)
+
+        self.rewards[:] = rewards
+        self.scores[:] = scores
+        self.ticks[:] = ticks
+        self.terminated[:] = finished
+        np.greater_equal(self.ticks, self.max_ticks, out=self.truncated)
+        self.truncated &= ~self.terminated
+        np.logical_or(self.terminated, self.truncated, out=self.final)
+        self._positions.reshape(-1)[:] = coordinates
+        self._move_agents()
+        if self.final.any():
+            self._reset_finished()
+        return self.observations, self.rewards, self.terminated, self.truncated, self.infos
+
+    def _positions_to_cells(self, i=slice(None)):
+        """Flat observation indices of the agents at _positions, of every or one environment"""
+        positions = self._positions[i]
+        return self._slot_offsets[i] + positions[..., 1] * self.width + positions[..., 0]
+
+    def _move_agents(self):
+        """Move every agent's mark from its previous cell to its current one"""
+        cells = self._positions_to_cells()
+        moved = cells != self._cells
+        np.subtract.at(self._flat, self._cells[moved], 1)
+        np.add.at(self._flat, cells[moved], 1)
+        self._cells[...] = cells
+
+    def _reset_finished(self):
+        """Keep the final observation of every finished game, then start its next episode"""
+        for i in np.flatnonzero(self.final).tolist():
+            self.final_observations[i] = self.observations[i]
+            np.subtract.at(self._flat, self._cells[i], 1)
+            self.episodes[i] += 1
+            self._reset_world(i, self.worlds[i])
+            self._cells[i] = self._positions_to_cells(i)
+            np.add.at(self._flat, self._cells[i], 1)
+
+    def _reset_world(self, i, world):
+        """Start environment i's next episode and write its terrain channels"""
+        world.seed = episode_seed(self.seed, i, int(self.episodes[i]))
+        world.reset()
+        terrain = world.grid.grid.to_array()
+        self.observations[i, WALL_CHANNEL] = terrain == WALL
+        self.observations[i, SLOW_CHANNEL] = terrain == SLOW
+        self._positions[i].reshape(-1)[:] = _agent_coordinates(world)
+
+def _agent_coordinates(world):
+    """x0, y0, x1, y1, ... of World.agents followed by the player"""
+    coordinates = []
+    for agent in world.agents:
+        coordinates += (agent.x, agent.y)
+    coordinates += (world.user_agent.x, world.user_agent.y)
+    return coordinates
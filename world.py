@@ -0,0 +1,365 @@
+"""Display-free simulation core: grid, agents, scoring and collision rules."""
+import random
+import struct
+import zlib
+from collections import namedtuple
+from enum import IntEnum
+
+from agent import Agent, Strategy
+from compact_random import CompactRandom
+from grid import Grid
+from search import Planner
+from settings import (GRID_SIZE, CELL_SIZE, DIFFICULTY_SETTINGS, Difficulty,
+                      RED, GREEN, BLUE, YELLOW, PURPLE, CYAN)
+
+class Action(IntEnum):
+    NONE = 0
+    UP = 1
+    DOWN = 2
+    LEFT = 3
+    RIGHT = 4
+
+ACTION_DELTAS = {
+    Action.NONE: (0, 0),
+    Action.UP: (0, -1),
+    Action.DOWN: (0, 1),
+    Action.LEFT: (-1, 0),
+    Action.RIGHT: (1, 0)
+}
+
+# Index of the green target agent in World.agents
+TARGET_INDEX = 1
+
+# Points lost when touching the defensive agent
+DEFENSIVE_PENALTY = 5
+
+# Spawn positions tried before settling for any open cell on a crowded board
+SPAWN_ATTEMPTS = 100
+
+# Ticks between emptying the searching agents' transposition tables, except in
+# live worlds; snapshots restored at a multiple of this tick replay their moves exactly
+SEARCH_EPOCH = 10
+
+# Profiler scope of each strategy's Agent.move
+MOVE_SCOPES = {strategy: f'move.{strategy.value}' for strategy in Strategy}
+
+# Values of World.cause_of_death, indexed by their code in snapshots
+CAUSES_OF_DEATH = (None,) + tuple(strategy.value for strategy in Strategy)
+
+# kind is 'score', 'penalty' or 'death'; value is the score delta or the strategy name
+Event = namedtuple('Event', ['kind', 'x', 'y', 'value'])
+
+def read_map(path):
+    """Terrain rows of a map text file, ignoring blank lines (see Grid.load_terrain)"""
+    with open(path) as f:
+        return [line for line in f.read().splitlines() if line.strip()]
+
+class World:
+    """Complete game state advanced one tick at a time, without any display.
+
+    A solo world has one player, user_agent, created on every reset. A shared
+    world (solo=False) starts without players; they join with add_player()
+    and play for one common score. A caught player leaves the board unless it
+    is the last one, which ends the game.
+
+    A live world is played in real time and never replayed: its searching
+    agents also stop at a per-tick time budget ('search_ms') and keep their
+    tables between ticks. Its games then depend on the machine's speed, so
+    replays, tournaments and recorded games use the default, where only the
+    node budget limits the search and every game is reproducible.
+    """
+
+    def __init__(self, difficulty=Difficulty.EASY, seed=None, terrain=None, size=None, profiler=None, solo=True,
+                 live=False):
+        self.difficulty = difficulty
+        self.settings = DIFFICULTY_SETTINGS[difficulty]
+        # Every game is seeded, so it can be recorded and replayed exactly
+        self.seed = seed if seed is not None else random.getrandbits(64)
+        # Map loaded on every reset (see Grid.load_terrain); None for an open board
+        self.terrain = terrain
+        # Board size in cells: the map's size, or GRID_SIZE for an open board
+        if size is None:
+            size = (len(terrain[0]), len(terrain)) if terrain is not None else GRID_SIZE
+        self.grid = Grid(size[0], size[1], CELL_SIZE)
+        self.solo = solo
+        self.live = live
+        # Optional Profiler timing Agent.move per strategy
+        self.profiler = profiler
+        # Optional Recorder notified of every player action and finished tick
+        self.recorder = None
+        self.reset()
+
+    def reset(self):
+        """Reset game state, replaying the same seed from the start"""
+        self.rng = CompactRandom(self.seed)
+        self.grid.clear()
+        if self.terrain is not None:
+            self.grid.load_terrain(self.terrain)
+        self.score = 0
+        self.tick = 0
+        self.game_over = False
+        self.game_won = False
+        self.cause_of_death = None
+        # Players that moved since the last tick; their new cells are checked for collisions
+        self.moved_players = set()
+
+        behaviors = self.settings['agent_behaviors']
+        self.agents = [
+            Agent(5, 5, Strategy.RANDOM, RED, self.grid, self.rng),
+            Agent(15, 5, Strategy.GREEDY, GREEN, self.grid, self.rng)
+        ]
+
+        extra_agents = [
+            (5, 10, Strategy.DEFENSIVE, BLUE, 'defensive'),
+            (15, 10, Strategy.PATROL, YELLOW, 'patrol'),
+            (10, 12, Strategy.RANDOM, CYAN, 'random')
+        ]
+        if 'search' in behaviors:
+            extra_agents[-1] = (10, 12, Strategy.SEARCH, CYAN, 'search')
+        for x, y, strategy, color, behavior in extra_agents[:self.settings['agent_count'] - 2]:
+            agent = Agent(x, y, strategy, color, self.grid, self.rng)
+            agent.move_chance = behaviors[behavior].get('move_chance')
+            agent.detection_range = behaviors[behavior]['detection_range']
+            if strategy == Strategy.SEARCH:
+                agent.planner = Planner(self.grid, behaviors[behavior]['search_depth'],
+                                        behaviors[behavior]['search_nodes'])
+                if self.live:
+                    agent.search_ms = behaviors[behavior]['search_ms']
+            self.agents.append(agent)
+
+        self.players = []
+        self.user_agent = None
+        if self.solo:
+            # Created last so it ranks after the other agents on distance ties
+            self.user_agent = Agent(10, 7, None, PURPLE, self.grid, self.rng)
+            self.players.append(self.user_agent)
+
+    @property
+    def finished(self):
+        return self.game_over or self.game_won
+
+    @property
+    def target_score(self):
+        return self.settings['target_score']
+
+    def get_random_position(self):
+        """Get random position on grid"""
+        return (self.rng.randint(0, self.grid.width - 1),
+                self.rng.randint(0, self.grid.height - 1))
+
+    def get_spawn_position(self):
+        """Random open cell at least 3 cells (on some axis) away from every agent.
+
+        After SPAWN_ATTEMPTS misses, as on a board crowded with players, any
+        open cell will do.
+        """
+        attempts = SPAWN_ATTEMPTS
+        new_x, new_y = self.get_random_position()
+        while (not self.grid.is_valid_position(new_x, new_y)
+               or (attempts and any(abs(new_x - a.x) < 3 and abs(new_y - a.y) < 3
+                                    for a in self.grid.agent_index.within(new_x, new_y, 4)))):
+            attempts = max(attempts - 1, 0)
+            new_x, new_y = self.get_random_position()
+        return new_x, new_y
+
+    def respawn_target(self):
+        """Respawn target agent (green) to new position"""
+        new_x, new_y = self.get_spawn_position()
+        target = self.agents[TARGET_INDEX]
+        target.x = new_x
+        target.y = new_y
+
+    def add_player(self, color=PURPLE):
+        """Add a player at a spawn position; returns its Agent"""
+        x, y = self.get_spawn_position()
+        player = Agent(x, y, None, color, self.grid, self.rng)
+        self.players.append(player)
+        return player
+
+    def remove_player(self, player):
+        """Take a player off the board"""
+        self.players.remove(player)
+        self.moved_players.discard(player)
+        self.grid.agent_index.remove(player)
+
+    def move_player(self, action, player=None):
+        """Move a player (the user agent by default) one cell; returns True if it moved.
+
+        Like the other agents, the player spends extra moves on slow tiles.
+        """
+        if self.finished:
+            return False
+        dx, dy = ACTION_DELTAS[Action(action)]
+        if not (dx or dy):
+            return False
+        if self.recorder is not None:
+            self.recorder.record_action(action)
+        if player is None:
+            player = self.user_agent
+        if player.move_delay:
+            player.move_delay -= 1
+            return False
+        new_x, new_y = player.x + dx, player.y + dy
+        if self.grid.is_valid_position(new_x, new_y):
+            player.x = new_x
+            player.y = new_y
+            player.move_delay = self.grid.move_cost(new_x, new_y) - 1
+            self.moved_players.add(player)
+            return True
+        return False
+
+    def step(self, player_action=Action.NONE):
+        """Apply the player's action, move every agent once and resolve collisions.
+
+        Collisions are found through the grid's occupancy table: an agent that
+        moved checks its new cell for players as soon as it arrives, and every
+        player that moved since the last tick then collides with the agents
+        still on its cell, in creation order. Work per tick is proportional to
+        the agents that moved, and an agent resting on a player's cell collides
+        once, not on every tick. Returns the list of Events produced.
+        """
+        events = []
+        if self.finished:
+            return events
+
+        self.move_player(player_action)
+        if not self.live and self.tick % SEARCH_EPOCH == 0:
+            self._clear_planners()
+        profiler = self.profiler
+        movers = set()
+        for i, agent in enumerate(self.agents):
+            if i == TARGET_INDEX:  # The green target agent stays still
+                continue
+            if profiler is None:
+                moved = agent.move()
+            else:
+                with profiler.scope(MOVE_SCOPES[agent.strategy]):
+                    moved = agent.move()
+            if moved:
+                movers.add(agent)
+                x, y = agent.x, agent.y
+                for player in [a for a in self.grid.agents_at(x, y) if a.strategy is None]:
+                    self._collide(i, agent, player, events)
+
+        if self.moved_players:
+            moved_players = [player for player in self.players if player in self.moved_players]
+            self.moved_players.clear()
+            for player in moved_players:
+                x, y = player.x, player.y
+                for agent in [a for a in self.grid.agents_at(x, y) if a.strategy is not None and a not in movers]:
+                    if (agent.x, agent.y) == (x, y) and player in self.grid.agent_index:
+                        self._collide(self.agents.index(agent), agent, player, events)
+
+        self.tick += 1
+        if self.recorder is not None:
+            self.recorder.end_tick(self)
+        return events
+
+    def _collide(self, index, agent, player, events):
+        """Apply the collision rules for an agent sharing a player's cell"""
+        if index == TARGET_INDEX:
+            score_increase = 10 * self.settings['score_multiplier']
+            self.score += score_increase
+            events.append(Event('score', agent.x, agent.y, score_increase))
+            self.respawn_target()
+
+            # Check for win condition
+            if self.score >= self.target_score:
+                self.game_won = True
+        elif agent.strategy == Strategy.DEFENSIVE:
+            self.score -= DEFENSIVE_PENALTY
+            events.append(Event('penalty', agent.x, agent.y, -DEFENSIVE_PENALTY))
+        else:
+            self.cause_of_death = agent.strategy.value
+            events.append(Event('death', agent.x, agent.y, agent.strategy.value))
+            if len(self.players) > 1:
+                self.remove_player(player)
+            else:
+                self.game_over = True
+
+    def _clear_planners(self):
+        for agent in self.agents:
+            if agent.planner is not None:
+                agent.planner.clear()
+
+    def state_hash(self):
+        """CRC32 of the packed snapshot: tick, score, flags, RNG, every agent and player"""
+        return zlib.crc32(self.snapshot().data)
+
+    def snapshot(self):
+        """Packed copy of the mutable game state, a few dozen bytes (see restore)"""
+        packer = _snapshot_packer(len(self.agents), len(self.players))
+        values = [self.tick, self.score, self.game_over | self.game_won << 1,
+                  CAUSES_OF_DEATH.index(self.cause_of_death), self.rng.getstate()]
+        for agent in self.agents:
+            values += (agent.x, agent.y, agent.move_delay, agent.current_patrol_index)
+        for player in self.players:
+            values += (player.x, player.y, player.move_delay, player in self.moved_players)
+        # The terrain is referenced by its last edit, not copied (see Grid.rewind_terrain)
+        return Snapshot(packer.pack(*values), self.grid.terrain_edits)
+
+    def restore(self, snapshot):
+        """Return to a state taken by snapshot() from a world with the same difficulty, map and player count"""
+        agents = self.agents
+        values = _snapshot_packer(len(agents), len(self.players)).unpack(snapshot.data)
+        self.tick, self.score, flags, cause, state = values[:5]
+        self.game_over = bool(flags & 1)
+        self.game_won = bool(flags & 2)
+        self.cause_of_death = CAUSES_OF_DEATH[cause]
+        self.rng.setstate(state)
+        self._clear_planners()
+        for i, agent in enumerate(agents):
+            x, y, agent.move_delay, agent.current_patrol_index = values[5 + 4 * i:9 + 4 * i]
+            if agent.x != x:
+                agent.x = x
+            if agent.y != y:
+                agent.y = y
+        self.moved_players.clear()
+        offset = 5 + 4 * len(agents)
+        for i, player in enumerate(self.players):
+            x, y, player.move_delay, moved = values[offset + 4 * i:offset + 4 * i + 4]
+            if player.x != x:
+                player.x = x
+            if player.y != y:
+                player.y = y
+            if moved:
+                self.moved_players.add(player)
+
+        if snapshot.terrain is not self.grid.terrain_edits:
+            self.grid.rewind_terrain(snapshot.terrain)
+
+    def fork(self):
+        """Independent copy of the world that can be stepped without touching this one"""
+        world = World.__new__(World)
+        world.__dict__.update(self.__dict__)
+        world.profiler = None
+        world.recorder = None
+        world.rng = CompactRandom(0)
+        world.rng.setstate(self.rng.getstate())
+        world.grid = self.grid.copy()
+        # Cloned in creation order so spatial index ties break the same way
+        world.agents = [agent.clone(world.grid, world.rng) for agent in self.agents]
+        world.players = [player.clone(world.grid, world.rng) for player in self.players]
+        world.moved_players = {clone for player, clone in zip(self.players, world.players)
+                               if player in self.moved_players}
+        world.user_agent = world.players[0] if self.user_agent is not None else None
+        return world
+
+class Snapshot(namedtuple('Snapshot', ['data', 'terrain'])):
+    """World.snapshot() result: packed state bytes, plus the last terrain edit since reset (None if unedited)"""
+    __slots__ = ()
+
+    @property
+    def tick(self):
+        return _TICK.unpack_from(self.data)[0]
+
+_TICK = struct.Struct('<I')
+_snapshot_packers = {}
+
+def _snapshot_packer(agent_count, player_count):
+    """Struct for tick, score, flags, cause of death, RNG state, agent_count agents and player_count players"""
+    key = (agent_count, player_count)
+    packer = _snapshot_packers.get(key)
+    if packer is None:
+        packer = _snapshot_packers[key] = struct.Struct('<IiBBQ' + 'hhBB' * agent_count + 'hhB?' * player_count)
+    return packer